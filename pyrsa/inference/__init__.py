@@ -18,8 +18,12 @@ from .crossvalsets import sets_k_fold
 from .crossvalsets import sets_k_fold_pattern
 from .crossvalsets import sets_k_fold_rdm
 from .crossvalsets import sets_of_k_pattern
+from .crossvalsets import sets_random
+from .crossvalsets import Fold
 from .noise_ceiling import cv_noise_ceiling
 from .noise_ceiling import boot_noise_ceiling
 from .result import load_results
 from .result import Result
 from .result import result_from_dict
+from .plan import ResamplingPlan
+from .plan import load_plan
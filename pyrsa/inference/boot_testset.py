@@ -7,15 +7,21 @@ a testset
 """
 
 import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs, parallel_backend
+from pyrsa.rdm import compare
 from pyrsa.util.inference_util import input_check_model
-from .bootstrap import bootstrap_sample
-from .bootstrap import bootstrap_sample_rdm
-from .bootstrap import bootstrap_sample_pattern
+from pyrsa.util.rdm_utils import _subsample_index
+from pyrsa.model.fitter import _pattern_index
+from pyrsa.model.cache import prediction_cache, _cached_prediction
+from .bootstrap import _draw_counts
+from .crossvalsets import Fold, _rdm_pos, _pattern_pos
 from .evaluate import crossval
+from .evaluate import _method_independent
 
 
 def bootstrap_testset(models, data, method='cosine', fitter=None, N=1000,
-                      pattern_descriptor=None, rdm_descriptor=None):
+                      pattern_descriptor=None, rdm_descriptor=None,
+                      plan=None, n_jobs=1):
     """takes a bootstrap sample and evaluates on the rdms and patterns not
     sampled
     also returns the size of each test_set to allow later weighting
@@ -28,6 +34,9 @@ def bootstrap_testset(models, data, method='cosine', fitter=None, N=1000,
         fitter(function): fitting function
         pattern_descriptor(string): descriptor to group patterns
         rdm_descriptor(string): descriptor to group rdms
+        plan(pyrsa.inference.ResamplingPlan): precomputed samples to
+            evaluate on, which replace N
+        n_jobs(int): number of parallel jobs for fitted models
 
     Returns:
         numpy.ndarray: vector of evaluations of length N
@@ -35,43 +44,25 @@ def bootstrap_testset(models, data, method='cosine', fitter=None, N=1000,
         numpy.ndarray: n_pattern for each test_set
 
     """
-    models, evaluations, _, fitter = input_check_model(models, None, fitter, N)
-    n_rdm = np.zeros(N, dtype=np.int)
-    n_pattern = np.zeros(N, dtype=np.int)
     if pattern_descriptor is None:
         data.pattern_descriptors['index'] = np.arange(data.n_cond)
         pattern_descriptor = 'index'
     if rdm_descriptor is None:
         data.rdm_descriptors['index'] = np.arange(data.n_rdm)
         rdm_descriptor = 'index'
-    for i_sample in range(N):
-        sample, rdm_idx, pattern_idx = bootstrap_sample(
-            data,
-            rdm_descriptor=rdm_descriptor,
-            pattern_descriptor=pattern_descriptor)
-        train_set = [[sample, pattern_idx]]
-        rdm_idx_test = data.rdm_descriptors[rdm_descriptor]
-        rdm_idx_test = np.setdiff1d(rdm_idx_test, rdm_idx)
-        pattern_idx_test = data.pattern_descriptors[pattern_descriptor]
-        pattern_idx_test = np.setdiff1d(pattern_idx_test, pattern_idx)
-        if len(pattern_idx_test) >= 3 and len(rdm_idx_test) >= 1:
-            rdms_test = data.subsample_pattern(pattern_descriptor,
-                                               pattern_idx_test)
-            rdms_test = rdms_test.subsample(rdm_descriptor, rdm_idx_test)
-            test_set = [[rdms_test, pattern_idx_test]]
-            evaluations[i_sample] = crossval(
-                models, data, train_set, test_set,
-                method=method, fitter=fitter,
-                pattern_descriptor=pattern_descriptor).evaluations[:, 0]
-        else:
-            evaluations[i_sample] = np.nan
-        n_rdm[i_sample] = len(rdm_idx_test)
-        n_pattern[i_sample] = len(pattern_idx_test)
+    if plan is not None:
+        plan.check(data, pattern_descriptor, rdm_descriptor)
+        N = plan.n_samples
+    models, _, _, fitter = input_check_model(models, None, fitter, N)
+    evaluations, n_rdm, n_pattern = _eval_testsets(
+        models, data, method, fitter, 'both', pattern_descriptor,
+        rdm_descriptor, N, plan, n_jobs)
     return evaluations, n_rdm, n_pattern
 
 
 def bootstrap_testset_pattern(models, data, method='cosine', fitter=None,
-                              N=1000, pattern_descriptor=None):
+                              N=1000, pattern_descriptor=None, plan=None,
+                              n_jobs=1):
     """takes a bootstrap sample and evaluates on the patterns not
     sampled
     also returns the size of each test_set to allow later weighting
@@ -83,39 +74,32 @@ def bootstrap_testset_pattern(models, data, method='cosine', fitter=None,
         method(string): comparison method to use
         fitter(function): fitting function for the model
         pattern_descriptor(string): descriptor to group patterns
+        plan(pyrsa.inference.ResamplingPlan): precomputed samples to
+            evaluate on, which replace N
+        n_jobs(int): number of parallel jobs for fitted models
 
     Returns:
         numpy.ndarray: vector of evaluations of length
         numpy.ndarray: n_pattern for each test_set
 
     """
-    models, evaluations, _, fitter = input_check_model(models, None, fitter, N)
-    n_pattern = np.zeros(N, dtype=np.int)
     if pattern_descriptor is None:
         data.pattern_descriptors['index'] = np.arange(data.n_cond)
         pattern_descriptor = 'index'
-    for i_sample in range(N):
-        sample, pattern_idx = bootstrap_sample_pattern(
-            data, pattern_descriptor=pattern_descriptor)
-        train_set = [[sample, pattern_idx]]
-        pattern_idx_test = data.pattern_descriptors[pattern_descriptor]
-        pattern_idx_test = np.setdiff1d(pattern_idx_test, pattern_idx)
-        if len(pattern_idx_test) >= 3:
-            rdms_test = data.subsample_pattern(pattern_descriptor,
-                                               pattern_idx_test)
-            test_set = [[rdms_test, pattern_idx_test]]
-            evaluations[i_sample] = crossval(
-                models, data, train_set, test_set,
-                method=method, fitter=fitter,
-                pattern_descriptor=pattern_descriptor).evaluations[:, 0]
-        else:
-            evaluations[i_sample] = np.nan
-        n_pattern[i_sample] = len(pattern_idx_test)
+    rdm_descriptor = 'index'
+    if plan is not None:
+        plan.check(data, pattern_descriptor, plan.rdm_descriptor)
+        N = plan.n_samples
+        rdm_descriptor = plan.rdm_descriptor
+    models, _, _, fitter = input_check_model(models, None, fitter, N)
+    evaluations, _, n_pattern = _eval_testsets(
+        models, data, method, fitter, 'pattern', pattern_descriptor,
+        rdm_descriptor, N, plan, n_jobs)
     return evaluations, n_pattern
 
 
 def bootstrap_testset_rdm(models, data, method='cosine', fitter=None, N=1000,
-                          rdm_descriptor=None):
+                          rdm_descriptor=None, plan=None, n_jobs=1):
     """takes a bootstrap sample and evaluates on the patterns not
     sampled
     also returns the size of each test_set to allow later weighting
@@ -127,34 +111,180 @@ def bootstrap_testset_rdm(models, data, method='cosine', fitter=None, N=1000,
         method(string): comparison method to use
         fitter(function): fitting function for the model
         pattern_descriptor(string): descriptor to group patterns
+        plan(pyrsa.inference.ResamplingPlan): precomputed samples to
+            evaluate on, which replace N
+        n_jobs(int): number of parallel jobs for fitted models
 
     Returns:
         numpy.ndarray: vector of evaluations of length
         numpy.ndarray: n_pattern for each test_set
 
     """
-    models, evaluations, _, fitter = input_check_model(models, None, fitter, N)
-    n_rdm = np.zeros(N, dtype=np.int)
     if rdm_descriptor is None:
         data.rdm_descriptors['index'] = np.arange(data.n_rdm)
         rdm_descriptor = 'index'
+    if plan is not None:
+        plan.check(data, plan.pattern_descriptor, rdm_descriptor)
+        N = plan.n_samples
+    models, _, _, fitter = input_check_model(models, None, fitter, N)
     data.pattern_descriptors['index'] = np.arange(data.n_cond)
-    pattern_descriptor = 'index'
-    for i_sample in range(N):
-        sample, rdm_idx = bootstrap_sample_rdm(
-            data, rdm_descriptor=rdm_descriptor)
-        pattern_idx = np.arange(data.n_cond)
-        train_set = [[sample, pattern_idx]]
-        rdm_idx_test = data.rdm_descriptors[rdm_descriptor]
-        rdm_idx_test = np.setdiff1d(rdm_idx_test, rdm_idx)
-        if len(rdm_idx_test) >= 1:
-            rdms_test = data.subsample(rdm_descriptor, rdm_idx_test)
-            test_set = [[rdms_test, pattern_idx]]
-            evaluations[i_sample] = crossval(
-                models, data, train_set, test_set,
-                method=method, fitter=fitter,
-                pattern_descriptor=pattern_descriptor).evaluations[:, 0]
-        else:
-            evaluations[i_sample] = np.nan
-        n_rdm[i_sample] = len(rdm_idx_test)
+    evaluations, n_rdm, _ = _eval_testsets(
+        models, data, method, fitter, 'rdm', 'index',
+        rdm_descriptor, N, plan, n_jobs)
     return evaluations, n_rdm
+
+
+def _eval_testsets(models, data, method, fitter, boot_type,
+                   pattern_descriptor, rdm_descriptor, N, plan=None,
+                   n_jobs=1):
+    """ evaluates the models on the rdms and patterns not drawn into N
+    bootstrap samples along the dimensions given by boot_type
+
+    The out-of-bag groups of all samples are derived from the counts of
+    the draws at once. Models which are not fitted are evaluated on the
+    test sets directly, fitted models are trained on the bootstrap samples
+    by crossval, in parallel for n_jobs other than 1.
+
+    Returns:
+        evaluations (N x n_models), number of rdm and pattern groups in
+        each test set
+
+    """
+    rdm_select = np.unique(data.rdm_descriptors[rdm_descriptor])
+    pattern_select = np.unique(data.pattern_descriptors[pattern_descriptor])
+    rdm_draws, pattern_draws = _draw_groups(
+        len(rdm_select), len(pattern_select), boot_type, N, plan)
+    rdm_oob = _draw_counts(rdm_draws, len(rdm_select)) == 0
+    pattern_oob = _draw_counts(pattern_draws, len(pattern_select)) == 0
+    if boot_type == 'pattern':
+        rdm_oob[:] = True
+    if boot_type == 'rdm':
+        pattern_oob[:] = True
+    n_rdm = np.sum(rdm_oob, axis=1)
+    n_pattern = np.sum(pattern_oob, axis=1)
+    valid = (n_rdm >= 1) & (n_pattern >= 3)
+    sets = [None] * N
+    for i_sample in np.flatnonzero(valid):
+        if boot_type == 'pattern':
+            rdm_pos_train = rdm_pos_test = np.arange(data.n_rdm)
+        else:
+            rdm_pos_train = _rdm_pos(data, rdm_descriptor,
+                                     rdm_select[rdm_draws[i_sample]])
+            rdm_pos_test = _rdm_pos(data, rdm_descriptor,
+                                    rdm_select[rdm_oob[i_sample]])
+        if boot_type == 'rdm':
+            pattern_idx_train = pattern_idx_test = np.arange(data.n_cond)
+        else:
+            pattern_idx_train = pattern_select[pattern_draws[i_sample]]
+            pattern_idx_test = pattern_select[pattern_oob[i_sample]]
+        sets[i_sample] = (
+            Fold(data, rdm_pos_train,
+                 _pattern_pos(data, pattern_descriptor, pattern_idx_train),
+                 pattern_idx_train),
+            Fold(data, rdm_pos_test,
+                 _pattern_pos(data, pattern_descriptor, pattern_idx_test),
+                 pattern_idx_test))
+    if all(_method_independent(fit) for fit in fitter):
+        evaluations = _eval_testsets_fixed(
+            models, data, method, fitter, pattern_descriptor, sets,
+            same_patterns=boot_type == 'rdm')
+    elif effective_n_jobs(n_jobs) == 1:
+        evaluations = _eval_testsets_fitted(
+            models, data, method, fitter, pattern_descriptor, sets)
+    else:
+        chunks = np.array_split(np.arange(N),
+                                min(effective_n_jobs(n_jobs), N))
+        with parallel_backend('loky', inner_max_num_threads=1):
+            outputs = Parallel(n_jobs=n_jobs)(
+                delayed(_eval_testsets_fitted)(
+                    models, data, method, fitter, pattern_descriptor,
+                    [sets[i] for i in chunk])
+                for chunk in chunks)
+        evaluations = np.concatenate(outputs)
+    if boot_type == 'rdm':
+        n_pattern[:] = data.n_cond
+    return evaluations, n_rdm, n_pattern
+
+
+def _draw_groups(n_rdm, n_pattern, boot_type, N, plan=None):
+    """ draws the rdm and pattern groups of N bootstrap samples from the
+    global numpy random state in the order of _draw_sample, or takes them
+    from the plan
+
+    Returns:
+        numpy.ndarray: rdm group indices (N x n_rdm)
+        numpy.ndarray: pattern group indices (N x n_pattern)
+
+    """
+    if plan is not None:
+        return plan.rdm_draws, plan.pattern_draws
+    rdm_draws = np.zeros((N, n_rdm), dtype=np.int64)
+    pattern_draws = np.zeros((N, n_pattern), dtype=np.int64)
+    for i_sample in range(N):
+        if boot_type != 'pattern':
+            rdm_draws[i_sample] = np.random.randint(0, n_rdm, size=n_rdm)
+        if boot_type != 'rdm':
+            pattern_draws[i_sample] = np.random.randint(0, n_pattern,
+                                                        size=n_pattern)
+    return rdm_draws, pattern_draws
+
+
+def _eval_testsets_fixed(models, data, method, fitter, pattern_descriptor,
+                         sets, same_patterns=False):
+    """ evaluates models, which are not fitted, on the test sets.
+    The predictions for each pattern subset are computed once and compared
+    to the test rdm vectors directly. If all test sets contain all patterns
+    and the data contain no missing values, the rdms are evaluated once
+    and averaged per test set.
+    """
+    thetas = [fitter[j](model, data, method=method,
+                        pattern_descriptor=pattern_descriptor)
+              for j, model in enumerate(models)]
+    predictions = [model.predict_vectors(thetas[j])
+                   for j, model in enumerate(models)]
+    vectors = data.get_vectors()
+    evaluations = np.full((len(sets), len(models)), np.nan)
+    valid = np.array([test_sets is not None for test_sets in sets],
+                     dtype=bool)
+    if not np.any(valid):
+        return evaluations
+    if same_patterns and not np.any(np.isnan(vectors)):
+        evals = np.array([np.mean(compare(pred, vectors, method), axis=0)
+                          for pred in predictions])
+        weights = np.zeros((len(sets), data.n_rdm))
+        for i_sample in np.flatnonzero(valid):
+            np.add.at(weights[i_sample], sets[i_sample][1].rdm_pos, 1)
+        evaluations[valid] = (weights[valid] @ evals.T) \
+            / np.sum(weights[valid], axis=1, keepdims=True)
+        return evaluations
+    with prediction_cache(models):
+        for i_sample in np.flatnonzero(valid):
+            test = sets[i_sample][1]
+            index, _ = _subsample_index(test.pattern_pos, data.n_cond)
+            test_vectors = vectors[test.rdm_pos][:, index]
+            for j, model in enumerate(models):
+                pred = _cached_prediction(
+                    model, thetas[j],
+                    _pattern_index(model, test.pattern_idx,
+                                   pattern_descriptor))
+                evaluations[i_sample, j] = np.mean(compare(
+                    pred, test_vectors, method))
+    return evaluations
+
+
+def _eval_testsets_fitted(models, data, method, fitter, pattern_descriptor,
+                          sets):
+    """ fits the models on the bootstrap samples and evaluates them on the
+    test sets, given as pairs of training and test Folds
+    """
+    evaluations = np.full((len(sets), len(models)), np.nan)
+    with prediction_cache(models):
+        for i_sample, test_sets in enumerate(sets):
+            if test_sets is not None:
+                train, test = test_sets
+                evaluations[i_sample] = crossval(
+                    models, data, [train], [test],
+                    method=method, fitter=fitter,
+                    pattern_descriptor=pattern_descriptor,
+                    calc_noise_ceil=False).evaluations[0, :, 0]
+    return evaluations
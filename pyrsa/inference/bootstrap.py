@@ -5,9 +5,12 @@
 
 import numpy as np
 from pyrsa.util.rdm_utils import add_pattern_index
+from pyrsa.util.rdm_utils import _subsample_selection
+from pyrsa.util.rdm_utils import _subsample_index
 
 
-def bootstrap_sample(rdms, rdm_descriptor='index', pattern_descriptor='index'):
+def bootstrap_sample(rdms, rdm_descriptor='index', pattern_descriptor='index',
+                     rng=None):
     """Draws a bootstrap_sample from the data.
 
     This function generates a bootstrap sample of RDMs resampled over
@@ -27,6 +30,10 @@ def bootstrap_sample(rdms, rdm_descriptor='index', pattern_descriptor='index'):
             descriptor to group the patterns by. Each group of patterns will
             be in or out of the sample as a whole
 
+        rng(numpy.random.RandomState):
+            random number generator to draw from.
+            defaults to the global numpy random state
+
     Returns:
         pyrsa.rdm.rdms.RDMs: rdms
             subsampled dataset with equal number of groups in both patterns
@@ -39,22 +46,20 @@ def bootstrap_sample(rdms, rdm_descriptor='index', pattern_descriptor='index'):
             sampled pattern descriptor indices
 
     """
+    if rng is None:
+        rng = np.random
     rdm_select = np.unique(rdms.rdm_descriptors[rdm_descriptor])
     pattern_descriptor, pattern_select = \
         add_pattern_index(rdms, pattern_descriptor)
-    rdm_idx = np.random.randint(0, len(rdm_select),
-                                size=len(rdm_select))
-    rdm_idx = rdm_select[rdm_idx]
+    rdm_idx = _draw_index(rdm_select, rng)
     rdms = rdms.subsample(rdm_descriptor, rdm_idx)
-    pattern_idx = np.random.randint(0, len(pattern_select),
-                                    size=len(pattern_select))
-    pattern_idx = pattern_select[pattern_idx]
+    pattern_idx = _draw_index(pattern_select, rng)
     rdms = rdms.subsample_pattern(pattern_descriptor,
                                   pattern_idx)
     return rdms, rdm_idx, pattern_idx
 
 
-def bootstrap_sample_rdm(rdms, rdm_descriptor='index'):
+def bootstrap_sample_rdm(rdms, rdm_descriptor='index', rng=None):
     """Draws a bootstrap_sample from the data.
 
     This function generates a bootstrap sample of RDMs resampled over
@@ -69,6 +74,10 @@ def bootstrap_sample_rdm(rdms, rdm_descriptor='index'):
             the descriptor each sample will either contain all RDMs with
             this value or none
 
+        rng(numpy.random.RandomState):
+            random number generator to draw from.
+            defaults to the global numpy random state
+
     Returns:
         pyrsa.rdm.rdms.RDMs: rdm_idx
             subsampled dataset with equal number of groups of rdms
@@ -80,15 +89,15 @@ def bootstrap_sample_rdm(rdms, rdm_descriptor='index'):
             rdm group descritor values
 
     """
+    if rng is None:
+        rng = np.random
     rdm_select = np.unique(rdms.rdm_descriptors[rdm_descriptor])
-    rdm_sample = np.random.randint(0, len(rdm_select),
-                                   size=len(rdm_select))
-    rdm_idx = rdm_select[rdm_sample]
+    rdm_idx = _draw_index(rdm_select, rng)
     rdms = rdms.subsample(rdm_descriptor, rdm_idx)
     return rdms, rdm_idx
 
 
-def bootstrap_sample_pattern(rdms, pattern_descriptor='index'):
+def bootstrap_sample_pattern(rdms, pattern_descriptor='index', rng=None):
     """Draws a bootstrap_sample from the data.
 
     This function generates a bootstrap sample of RDMs resampled over
@@ -102,6 +111,10 @@ def bootstrap_sample_pattern(rdms, pattern_descriptor='index'):
             descriptor to group the patterns by. Each group of patterns will
             be in or out of the sample as a whole
 
+        rng(numpy.random.RandomState):
+            random number generator to draw from.
+            defaults to the global numpy random state
+
     Returns:
         pyrsa.rdm.rdms.RDMs: rdm_idx
             subsampled dataset with equal number of pattern groups
@@ -109,11 +122,98 @@ def bootstrap_sample_pattern(rdms, pattern_descriptor='index'):
         numpy.ndarray: pattern_idx
             sampled pattern descriptor index values for subsampling other rdms
     """
+    if rng is None:
+        rng = np.random
     pattern_descriptor, pattern_select = \
         add_pattern_index(rdms, pattern_descriptor)
-    pattern_idx = np.random.randint(0, len(pattern_select),
-                                    size=len(pattern_select))
-    pattern_idx = pattern_select[pattern_idx]
+    pattern_idx = _draw_index(pattern_select, rng)
     rdms = rdms.subsample_pattern(pattern_descriptor,
                                   pattern_idx)
     return rdms, pattern_idx
+
+
+def pattern_sample_index(rdms, pattern_descriptor, pattern_idx):
+    """Computes the indices into the rdm vectors for a pattern sample.
+
+    Applying these indices with pyrsa.util.rdm_utils._take_subsample
+    to the vectors of rdms or of any model prediction for the same patterns
+    yields the same result as subsample_pattern, but without creating
+    new RDMs objects.
+
+    Args:
+        rdms(pyrsa.rdm.rdms.RDMs): Data the sample was drawn for
+
+        pattern_descriptor(string):
+            descriptor the patterns were sampled by
+
+        pattern_idx(numpy.ndarray):
+            sampled pattern descriptor values
+
+    Returns:
+        numpy.ndarray: index
+            indices into the rdm vectors
+
+        numpy.ndarray: self_pair
+            mask of entries comparing a pattern to itself, which are nan
+
+    """
+    selection = _subsample_selection(
+        rdms.pattern_descriptors[pattern_descriptor], pattern_idx)
+    return _subsample_index(selection, rdms.n_cond)
+
+
+def bootstrap_weights(rdms, rdm_descriptor='index', N=1, rng=None):
+    """Draws N bootstrap samples over rdms as weights for the rdms.
+
+    Resampling the groups of rdms with replacement is equivalent to
+    weighting each rdm by the number of times its group was drawn. These
+    counts follow a multinomial distribution, which is drawn for all
+    samples at once.
+
+    Args:
+        rdms(pyrsa.rdm.rdms.RDMs): Data to be used
+
+        rdm_descriptor(string):
+            descriptor to group the rdms by
+
+        N(int): number of bootstrap samples
+
+        rng(numpy.random.RandomState):
+            random number generator to draw from.
+            defaults to the global numpy random state
+
+    Returns:
+        numpy.ndarray: weights
+            number of copies of each rdm per sample (N x n_rdm)
+
+    """
+    if rng is None:
+        rng = np.random
+    _, groups = np.unique(rdms.rdm_descriptors[rdm_descriptor],
+                          return_inverse=True)
+    n_group = np.max(groups) + 1
+    counts = rng.multinomial(n_group, np.ones(n_group) / n_group, size=N)
+    return counts[:, groups]
+
+
+def _draw_index(select, rng):
+    """ draws len(select) values from select with replacement """
+    return select[rng.randint(0, len(select), size=len(select))]
+
+
+def _draw_counts(draws, n_select):
+    """ number of times each group was drawn in each sample
+
+    Args:
+        draws(numpy.ndarray): drawn group indices (N x n_draws)
+        n_select(int): number of groups
+
+    Returns:
+        numpy.ndarray: counts (N x n_select)
+
+    """
+    n_sample = draws.shape[0]
+    offsets = n_select * np.arange(n_sample)[:, None]
+    return np.bincount((draws + offsets).flatten(),
+                       minlength=n_select * n_sample).reshape(
+                           n_sample, n_select)
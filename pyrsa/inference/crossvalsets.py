@@ -2,13 +2,95 @@
 # -*- coding: utf-8 -*-
 """
 generation of crossvalidation splits
+
+The sets are lists of Fold objects, which store the positions of their
+rdms and patterns in the complete data and create their RDMs only when
+these are accessed.
 """
 
 import numpy as np
 from pyrsa.util.rdm_utils import add_pattern_index
+from pyrsa.util.rdm_utils import _subsample_selection
 from pyrsa.util.inference_util import default_k_pattern, default_k_rdm
 
 
+class Fold:
+    """ lazy training, test or ceiling set of a crossvalidation, which
+    behaves as the list [rdms, pattern_idx]
+
+    The RDMs object is taken from the complete data in one step when it is
+    first accessed, such that sets which are never used cost no copies.
+
+    Args:
+        data(pyrsa.rdm.RDMs): the complete data
+        rdm_pos(numpy.ndarray): positions of the rdms in data
+        pattern_pos(numpy.ndarray): positions of the patterns in data
+        pattern_idx(numpy.ndarray): pattern descriptor values of the set
+
+    Attributes:
+        rdms(pyrsa.rdm.RDMs): the rdms of the set
+        pattern_idx(numpy.ndarray): pattern descriptor values of the set
+        n_rdm(int): number of rdms
+        n_cond(int): number of patterns
+
+    """
+
+    def __init__(self, data, rdm_pos, pattern_pos, pattern_idx):
+        self.data = data
+        self.rdm_pos = np.asarray(rdm_pos, dtype=np.int64)
+        self.pattern_pos = np.asarray(pattern_pos, dtype=np.int64)
+        self.pattern_idx = pattern_idx
+        self._rdms = None
+
+    @property
+    def rdms(self):
+        """ the rdms of the set, created on first access """
+        if self._rdms is None:
+            self._rdms = self.data._take_positions(self.rdm_pos,
+                                                   self.pattern_pos)
+        return self._rdms
+
+    @rdms.setter
+    def rdms(self, rdms):
+        self._rdms = rdms
+
+    @property
+    def n_rdm(self):
+        """ number of rdms in the set """
+        if self._rdms is not None:
+            return self._rdms.n_rdm
+        return len(self.rdm_pos)
+
+    @property
+    def n_cond(self):
+        """ number of patterns in the set """
+        if self._rdms is not None:
+            return self._rdms.n_cond
+        return len(self.pattern_pos)
+
+    def __getitem__(self, idx):
+        if idx in (0, -2):
+            return self.rdms
+        if idx in (1, -1):
+            return self.pattern_idx
+        raise IndexError('a fold contains only rdms and pattern_idx')
+
+    def __setitem__(self, idx, value):
+        if idx in (0, -2):
+            self.rdms = value
+        elif idx in (1, -1):
+            self.pattern_idx = value
+        else:
+            raise IndexError('a fold contains only rdms and pattern_idx')
+
+    def __len__(self):
+        return 2
+
+    def __iter__(self):
+        yield self.rdms
+        yield self.pattern_idx
+
+
 def sets_leave_one_out_pattern(rdms, pattern_descriptor):
     """ generates training and test set combinations by leaving one level
     of pattern_descriptor out as a test set.
@@ -22,28 +104,30 @@ def sets_leave_one_out_pattern(rdms, pattern_descriptor):
         pattern_descriptor(String): descriptor to select groups
 
     Returns:
-        train_set(list): list of tuples (rdms, pattern_idx)
-        test_set(list): list of tuples (rdms, pattern_idx)
-        ceil_set(list): list of tuples (rdms, pattern_idx)
+        train_set(list): list of Folds (rdms, pattern_idx)
+        test_set(list): list of Folds (rdms, pattern_idx)
+        ceil_set(list): list of Folds (rdms, pattern_idx)
 
     """
     pattern_descriptor, pattern_select = \
         add_pattern_index(rdms, pattern_descriptor)
+    rdm_pos = np.arange(rdms.n_rdm)
     train_set = []
     test_set = []
     ceil_set = []
     for i_pattern in pattern_select:
         pattern_idx_train = np.setdiff1d(pattern_select, i_pattern)
-        rdms_train = rdms.subset_pattern(pattern_descriptor,
-                                         pattern_idx_train)
         pattern_idx_test = [i_pattern]
-        rdms_test = rdms.subset_pattern(pattern_descriptor,
-                                        pattern_idx_test)
-        rdms_ceil = rdms.subset_pattern(pattern_descriptor,
+        pattern_pos_train = _pattern_pos(rdms, pattern_descriptor,
+                                         pattern_idx_train)
+        pattern_pos_test = _pattern_pos(rdms, pattern_descriptor,
                                         pattern_idx_test)
-        train_set.append((rdms_train, pattern_idx_train))
-        test_set.append((rdms_test, pattern_idx_test))
-        ceil_set.append((rdms_ceil, pattern_idx_test))
+        train_set.append(Fold(rdms, rdm_pos, pattern_pos_train,
+                              pattern_idx_train))
+        test_set.append(Fold(rdms, rdm_pos, pattern_pos_test,
+                             pattern_idx_test))
+        ceil_set.append(Fold(rdms, rdm_pos, pattern_pos_test,
+                             pattern_idx_test))
     return train_set, test_set, ceil_set
 
 
@@ -56,25 +140,28 @@ def sets_leave_one_out_rdm(rdms, rdm_descriptor='index'):
         rdm_descriptor(String): descriptor to select groups
 
     Returns:
-        train_set(list): list of tuples (rdms, pattern_idx)
-        test_set(list): list of tuples (rdms, pattern_idx)
-        ceil_set(list): list of tuples (rdms, pattern_idx)
+        train_set(list): list of Folds (rdms, pattern_idx)
+        test_set(list): list of Folds (rdms, pattern_idx)
+        ceil_set(list): list of Folds (rdms, pattern_idx)
 
     """
     rdm_select = rdms.rdm_descriptors[rdm_descriptor]
     rdm_select = np.unique(rdm_select)
     if len(rdm_select) > 1:
+        pattern_pos = np.arange(rdms.n_cond)
         train_set = []
         test_set = []
         for i_pattern in rdm_select:
             rdm_idx_train = np.setdiff1d(rdm_select, i_pattern)
-            rdms_train = rdms.subset(rdm_descriptor,
-                                     rdm_idx_train)
+            rdm_pos_train = _subsample_selection(
+                rdms.rdm_descriptors[rdm_descriptor], rdm_idx_train)
             rdm_idx_test = [i_pattern]
-            rdms_test = rdms.subset(rdm_descriptor,
-                                    rdm_idx_test)
-            train_set.append((rdms_train, np.arange(rdms.n_cond)))
-            test_set.append((rdms_test, np.arange(rdms.n_cond)))
+            rdm_pos_test = _subsample_selection(
+                rdms.rdm_descriptors[rdm_descriptor], rdm_idx_test)
+            train_set.append(Fold(rdms, rdm_pos_train, pattern_pos,
+                                  np.arange(rdms.n_cond)))
+            test_set.append(Fold(rdms, rdm_pos_test, pattern_pos,
+                                 np.arange(rdms.n_cond)))
         ceil_set = train_set
     else:
         Warning('leave one out called with only one group')
@@ -85,7 +172,8 @@ def sets_leave_one_out_rdm(rdms, rdm_descriptor='index'):
 
 
 def sets_k_fold(rdms, k_rdm=None, k_pattern=None, random=True,
-                pattern_descriptor='index', rdm_descriptor='index'):
+                pattern_descriptor='index', rdm_descriptor='index',
+                rng=None, rdm_order=None, pattern_order=None):
     """ generates training and test set combinations by splitting into k
     similar sized groups. This version splits both over rdms and over patterns
     resulting in k_rdm * k_pattern (training, test) pairs.
@@ -99,11 +187,18 @@ def sets_k_fold(rdms, k_rdm=None, k_pattern=None, random=True,
         k_rdm(int): number of rdm groups
         k_pattern(int): number of pattern groups
         random(bool): whether the assignment shall be randomized
+        rng(numpy.random.RandomState): random number generator for the
+            random assignment. defaults to the global numpy random state
+        rdm_order(numpy.ndarray): rdm groups in the order to assign them to
+            folds, replacing the random assignment. Groups, which are not
+            in rdms are skipped
+        pattern_order(numpy.ndarray): pattern groups in the order to assign
+            them to folds
 
     Returns:
-        train_set(list): list of tuples (rdms, pattern_idx)
-        test_set(list): list of tuples (rdms, pattern_idx)
-        ceil_set(list): list of tuples (rdms, pattern_idx)
+        train_set(list): list of Folds (rdms, pattern_idx)
+        test_set(list): list of Folds (rdms, pattern_idx)
+        ceil_set(list): list of Folds (rdms, pattern_idx)
 
     """
     rdm_select = rdms.rdm_descriptors[rdm_descriptor]
@@ -116,8 +211,14 @@ def sets_k_fold(rdms, k_rdm=None, k_pattern=None, random=True,
         k_pattern = default_k_pattern(len(pattern_select))
     assert k_rdm <= len(rdm_select), \
         'Can make at most as many groups as rdms'
-    if random:
-        np.random.shuffle(rdm_select)
+    assert k_pattern <= len(pattern_select), \
+        'Can make at most as many groups as conditions'
+    if rng is None:
+        rng = np.random
+    if rdm_order is not None:
+        rdm_select = _ordered(rdm_select, rdm_order)
+    elif random:
+        rng.shuffle(rdm_select)
     group_size_rdm = np.floor(len(rdm_select) / k_rdm)
     additional_rdms = len(rdm_select) % k_rdm
     train_set = []
@@ -135,25 +236,25 @@ def sets_k_fold(rdms, k_rdm=None, k_pattern=None, random=True,
                                      test_idx)
         rdm_idx_test = [rdm_select[int(idx)] for idx in test_idx]
         rdm_idx_train = [rdm_select[int(idx)] for idx in train_idx]
-        rdms_test = rdms.subsample(rdm_descriptor,
-                                   rdm_idx_test)
-        rdms_train = rdms.subsample(rdm_descriptor,
-                                    rdm_idx_train)
-        train_new, test_new, _ = sets_k_fold_pattern(
-            rdms_train, k=k_pattern,
-            pattern_descriptor=pattern_descriptor, random=random)
-        ceil_new = test_new.copy()
-        for i_pattern in range(k_pattern):
-            test_new[i_pattern][0] = rdms_test.subsample_pattern(
-                by=pattern_descriptor,
-                value=test_new[i_pattern][1])
-        train_set += train_new
-        test_set += test_new
-        ceil_set += ceil_new
+        rdm_pos_test = _rdm_pos(rdms, rdm_descriptor, rdm_idx_test)
+        rdm_pos_train = _rdm_pos(rdms, rdm_descriptor, rdm_idx_train)
+        for pattern_idx_train, pattern_idx_test in _pattern_splits(
+                pattern_select, k_pattern, random, rng, pattern_order):
+            train_set.append(Fold(
+                rdms, rdm_pos_train,
+                _pattern_pos(rdms, pattern_descriptor, pattern_idx_train),
+                pattern_idx_train))
+            test = Fold(
+                rdms, rdm_pos_test,
+                _pattern_pos(rdms, pattern_descriptor, pattern_idx_test),
+                pattern_idx_test)
+            test_set.append(test)
+            ceil_set.append(test)
     return train_set, test_set, ceil_set
 
 
-def sets_k_fold_rdm(rdms, k_rdm=None, random=True, rdm_descriptor='index'):
+def sets_k_fold_rdm(rdms, k_rdm=None, random=True, rdm_descriptor='index',
+                    rng=None):
     """ generates training and test set combinations by splitting into k
     similar sized groups. This version splits both over rdms and over patterns
     resulting in k_rdm * k_pattern (training, test) pairs.
@@ -163,10 +264,12 @@ def sets_k_fold_rdm(rdms, k_rdm=None, random=True, rdm_descriptor='index'):
         rdm_descriptor(String): descriptor to select rdm groups
         k_rdm(int): number of rdm groups
         random(bool): whether the assignment shall be randomized
+        rng(numpy.random.RandomState): random number generator for the
+            random assignment. defaults to the global numpy random state
 
     Returns:
-        train_set(list): list of tuples (rdms, pattern_idx)
-        test_set(list): list of tuples (rdms, pattern_idx)
+        train_set(list): list of Folds (rdms, pattern_idx)
+        test_set(list): list of Folds (rdms, pattern_idx)
 
     """
     rdm_select = rdms.rdm_descriptors[rdm_descriptor]
@@ -175,10 +278,13 @@ def sets_k_fold_rdm(rdms, k_rdm=None, random=True, rdm_descriptor='index'):
         k_rdm = default_k_rdm(len(rdm_select))
     assert k_rdm <= len(rdm_select), \
         'Can make at most as many groups as rdms'
+    if rng is None:
+        rng = np.random
     if random:
-        np.random.shuffle(rdm_select)
+        rng.shuffle(rdm_select)
     group_size_rdm = np.floor(len(rdm_select) / k_rdm)
     additional_rdms = len(rdm_select) % k_rdm
+    pattern_pos = np.arange(rdms.n_cond)
     train_set = []
     test_set = []
     for i_group in range(k_rdm):
@@ -190,18 +296,18 @@ def sets_k_fold_rdm(rdms, k_rdm=None, random=True, rdm_descriptor='index'):
                                  test_idx)
         rdm_idx_test = [rdm_select[int(idx)] for idx in test_idx]
         rdm_idx_train = [rdm_select[int(idx)] for idx in train_idx]
-        rdms_test = rdms.subsample(rdm_descriptor,
-                                   rdm_idx_test)
-        rdms_train = rdms.subsample(rdm_descriptor,
-                                    rdm_idx_train)
-        train_set.append([rdms_train, np.arange(rdms_train.n_cond)])
-        test_set.append([rdms_test, np.arange(rdms_train.n_cond)])
+        train_set.append(Fold(
+            rdms, _rdm_pos(rdms, rdm_descriptor, rdm_idx_train),
+            pattern_pos, np.arange(rdms.n_cond)))
+        test_set.append(Fold(
+            rdms, _rdm_pos(rdms, rdm_descriptor, rdm_idx_test),
+            pattern_pos, np.arange(rdms.n_cond)))
     ceil_set = train_set
     return train_set, test_set, ceil_set
 
 
 def sets_k_fold_pattern(rdms, pattern_descriptor='index',
-                        k=None, random=False):
+                        k=None, random=False, rng=None, order=None):
     """ generates training and test set combinations by splitting into k
     similar sized groups. This version splits in the given order or
     randomizes the order. For k=1 training and test_set are whole dataset,
@@ -218,10 +324,15 @@ def sets_k_fold_pattern(rdms, pattern_descriptor='index',
         pattern_descriptor(String): descriptor to select groups
         k(int): number of groups
         random(bool): whether the assignment shall be randomized
+        rng(numpy.random.RandomState): random number generator for the
+            random assignment. defaults to the global numpy random state
+        order(numpy.ndarray): pattern groups in the order to assign them to
+            folds, replacing the random assignment. Groups, which are not
+            in rdms are skipped
 
     Returns:
-        train_set(list): list of tuples (rdms, pattern_idx)
-        test_set(list): list of tuples (rdms, pattern_idx)
+        train_set(list): list of Folds (rdms, pattern_idx)
+        test_set(list): list of Folds (rdms, pattern_idx)
         ceil_set = None
 
     """
@@ -231,30 +342,21 @@ def sets_k_fold_pattern(rdms, pattern_descriptor='index',
         k = default_k_pattern(len(pattern_select))
     assert k <= len(pattern_select), \
         'Can make at most as many groups as conditions'
-    if random:
-        np.random.shuffle(pattern_select)
-    group_size = np.floor(len(pattern_select) / k)
-    additional_patterns = len(pattern_select) % k
+    if rng is None:
+        rng = np.random
+    rdm_pos = np.arange(rdms.n_rdm)
     train_set = []
     test_set = []
-    for i_group in range(k):
-        test_idx = np.arange(i_group * group_size,
-                             (i_group + 1) * group_size)
-        if i_group < additional_patterns:
-            test_idx = np.concatenate((test_idx, [-(i_group+1)]))
-        if k <= 1:
-            train_idx = test_idx
-        else:
-            train_idx = np.setdiff1d(np.arange(len(pattern_select)),
-                                     test_idx)
-        pattern_idx_test = [pattern_select[int(idx)] for idx in test_idx]
-        pattern_idx_train = [pattern_select[int(idx)] for idx in train_idx]
-        rdms_test = rdms.subset_pattern(pattern_descriptor,
-                                        pattern_idx_test)
-        rdms_train = rdms.subset_pattern(pattern_descriptor,
-                                         pattern_idx_train)
-        test_set.append([rdms_test, pattern_idx_test])
-        train_set.append([rdms_train, pattern_idx_train])
+    for pattern_idx_train, pattern_idx_test in _pattern_splits(
+            pattern_select, k, random, rng, order):
+        test_set.append(Fold(
+            rdms, rdm_pos,
+            _pattern_pos(rdms, pattern_descriptor, pattern_idx_test),
+            pattern_idx_test))
+        train_set.append(Fold(
+            rdms, rdm_pos,
+            _pattern_pos(rdms, pattern_descriptor, pattern_idx_train),
+            pattern_idx_train))
     ceil_set = None
     return train_set, test_set, ceil_set
 
@@ -272,9 +374,9 @@ def sets_of_k_rdm(rdms, rdm_descriptor='index', k=5, random=False):
         random(bool): whether the assignment shall be randomized
 
     Returns:
-        train_set(list): list of tuples (rdms, pattern_idx)
-        test_set(list): list of tuples (rdms, pattern_idx)
-        ceil_set(list): list of tuples (rdms, pattern_idx)
+        train_set(list): list of Folds (rdms, pattern_idx)
+        test_set(list): list of Folds (rdms, pattern_idx)
+        ceil_set(list): list of Folds (rdms, pattern_idx)
 
     """
     rdm_select = rdms.rdm_descriptors[rdm_descriptor]
@@ -299,8 +401,8 @@ def sets_of_k_pattern(rdms, pattern_descriptor=None, k=5, random=False):
         random(bool): whether the assignment shall be randomized
 
     Returns:
-        train_set(list): list of tuples (rdms, pattern_idx)
-        test_set(list): list of tuples (rdms, pattern_idx)
+        train_set(list): list of Folds (rdms, pattern_idx)
+        test_set(list): list of Folds (rdms, pattern_idx)
 
     """
     pattern_descriptor, pattern_select = \
@@ -313,7 +415,8 @@ def sets_of_k_pattern(rdms, pattern_descriptor=None, k=5, random=False):
 
 
 def sets_random(rdms, n_rdm=None, n_pattern=None, n_cv=2,
-                pattern_descriptor='index', rdm_descriptor='index'):
+                pattern_descriptor='index', rdm_descriptor='index',
+                rng=None, rdm_order=None, pattern_order=None):
     """ generates training and test set combinations by selecting random
     test sets of n_rdm RDMs and n_pattern patterns and using the rest of
     the data as the training set.
@@ -326,11 +429,17 @@ def sets_random(rdms, n_rdm=None, n_pattern=None, n_cv=2,
         rdm_descriptor(String): descriptor to select rdm groups
         n_rdm(int): number of rdms per test set
         n_pattern(int): number of patterns per test set
+        rng(numpy.random.RandomState): random number generator for the
+            random assignment. defaults to the global numpy random state
+        rdm_order(numpy.ndarray): rdm groups in the order to draw them into
+            the test sets, one row per cv run. Replaces the random draws
+        pattern_order(numpy.ndarray): pattern groups in the order to draw
+            them into the test sets, one row per cv run
 
     Returns:
-        train_set(list): list of tuples (rdms, pattern_idx)
-        test_set(list): list of tuples (rdms, pattern_idx)
-        ceil_set(list): list of tuples (rdms, pattern_idx)
+        train_set(list): list of Folds (rdms, pattern_idx)
+        test_set(list): list of Folds (rdms, pattern_idx)
+        ceil_set(list): list of Folds (rdms, pattern_idx)
 
     """
     rdm_select = rdms.rdm_descriptors[rdm_descriptor]
@@ -343,13 +452,22 @@ def sets_random(rdms, n_rdm=None, n_pattern=None, n_cv=2,
     if n_pattern is None:
         k_pattern = default_k_pattern(len(pattern_select))
         n_pattern = int(np.floor(len(pattern_select) / k_pattern))
+    if rng is None:
+        rng = np.random
     train_set = []
     test_set = []
     ceil_set = []
-    for _i_group in range(n_cv):
+    for i_group in range(n_cv):
         # shuffle
-        np.random.shuffle(rdm_select)
-        np.random.shuffle(pattern_select)
+        if rdm_order is not None:
+            rdm_select = _ordered(rdm_select, rdm_order[i_group])
+        else:
+            rng.shuffle(rdm_select)
+        if pattern_order is not None:
+            pattern_select = _ordered(pattern_select,
+                                      pattern_order[i_group])
+        else:
+            rng.shuffle(pattern_select)
         # choose indices based on n_rdm
         if n_rdm == 0:
             train_idx = np.arange(len(rdm_select))
@@ -360,10 +478,8 @@ def sets_random(rdms, n_rdm=None, n_pattern=None, n_cv=2,
         # take subset of rdms
         rdm_idx_test = [rdm_select[int(idx)] for idx in test_idx]
         rdm_idx_train = [rdm_select[int(idx)] for idx in train_idx]
-        rdms_test = rdms.subsample(rdm_descriptor,
-                                   rdm_idx_test)
-        rdms_train = rdms.subsample(rdm_descriptor,
-                                    rdm_idx_train)
+        rdm_pos_test = _rdm_pos(rdms, rdm_descriptor, rdm_idx_test)
+        rdm_pos_train = _rdm_pos(rdms, rdm_descriptor, rdm_idx_train)
         # choose indices based on n_pattern
         if n_pattern == 0:
             train_idx = np.arange(len(pattern_select))
@@ -373,13 +489,73 @@ def sets_random(rdms, n_rdm=None, n_pattern=None, n_cv=2,
             train_idx = np.arange(n_pattern, len(pattern_select))
         pattern_idx_test = [pattern_select[int(idx)] for idx in test_idx]
         pattern_idx_train = [pattern_select[int(idx)] for idx in train_idx]
-        rdms_test = rdms_test.subset_pattern(pattern_descriptor,
-                                             pattern_idx_test)
-        rdms_ceil = rdms_train.subset_pattern(pattern_descriptor,
-                                              pattern_idx_test)
-        rdms_train = rdms_train.subset_pattern(pattern_descriptor,
-                                               pattern_idx_train)
-        test_set.append([rdms_test, pattern_idx_test])
-        train_set.append([rdms_train, pattern_idx_train])
-        ceil_set.append([rdms_ceil, pattern_idx_test])
+        pattern_pos_test = _pattern_pos(rdms, pattern_descriptor,
+                                        pattern_idx_test)
+        pattern_pos_train = _pattern_pos(rdms, pattern_descriptor,
+                                         pattern_idx_train)
+        test_set.append(Fold(rdms, rdm_pos_test, pattern_pos_test,
+                             pattern_idx_test))
+        train_set.append(Fold(rdms, rdm_pos_train, pattern_pos_train,
+                              pattern_idx_train))
+        ceil_set.append(Fold(rdms, rdm_pos_train, pattern_pos_test,
+                             pattern_idx_test))
     return train_set, test_set, ceil_set
+
+
+def _ordered(select, order):
+    """ sorts the groups in select into the given order """
+    return order[np.isin(order, select)]
+
+
+def _pattern_splits(pattern_select, k, random, rng, order=None):
+    """ splits the pattern groups into k folds
+
+    Returns:
+        list: (train groups, test groups) for each fold
+
+    """
+    if order is not None:
+        pattern_select = _ordered(pattern_select, order)
+    elif random:
+        pattern_select = np.copy(pattern_select)
+        rng.shuffle(pattern_select)
+    group_size = np.floor(len(pattern_select) / k)
+    additional_patterns = len(pattern_select) % k
+    splits = []
+    for i_group in range(k):
+        test_idx = np.arange(i_group * group_size,
+                             (i_group + 1) * group_size)
+        if i_group < additional_patterns:
+            test_idx = np.concatenate((test_idx, [-(i_group+1)]))
+        if k <= 1:
+            train_idx = test_idx
+        else:
+            train_idx = np.setdiff1d(np.arange(len(pattern_select)),
+                                     test_idx)
+        pattern_idx_test = [pattern_select[int(idx)] for idx in test_idx]
+        pattern_idx_train = [pattern_select[int(idx)] for idx in train_idx]
+        splits.append((pattern_idx_train, pattern_idx_test))
+    return splits
+
+
+def _rdm_pos(rdms, rdm_descriptor, rdm_idx):
+    """ positions of the rdms in rdms.subsample(rdm_descriptor, rdm_idx) """
+    return _subsample_selection(rdms.rdm_descriptors[rdm_descriptor],
+                                rdm_idx, sort=False)
+
+
+def _pattern_pos(rdms, pattern_descriptor, pattern_idx):
+    """ positions of the patterns in
+    rdms.subsample_pattern(pattern_descriptor, pattern_idx)
+    """
+    return _subsample_selection(rdms.pattern_descriptors[pattern_descriptor],
+                                pattern_idx)
+
+
+def _fold_size(fold):
+    """ number of rdms and patterns of a training or test set, without
+    creating the rdms of lazy folds
+    """
+    if isinstance(fold, Fold):
+        return fold.n_rdm, fold.n_cond
+    return fold[0].n_rdm, fold[0].n_cond
@@ -5,79 +5,137 @@ evaluate model performance
 """
 
 import numpy as np
-import tqdm
+from joblib import Parallel, delayed, effective_n_jobs, parallel_backend
 from pyrsa.rdm import compare
-from pyrsa.inference import bootstrap_sample
-from pyrsa.inference import bootstrap_sample_rdm
-from pyrsa.inference import bootstrap_sample_pattern
+from pyrsa.inference.bootstrap import pattern_sample_index
+from pyrsa.inference.bootstrap import _draw_index, _draw_counts
 from pyrsa.model import Model
+from pyrsa.model.fitter import fit_mock
+from pyrsa.model.fitter import _fit_iterations, _warm_startable
+from pyrsa.model.fitter import _pattern_index
+from pyrsa.model.cache import prediction_cache, _cached_prediction
 from pyrsa.util.inference_util import input_check_model
 from pyrsa.util.inference_util import default_k_pattern, default_k_rdm
+from pyrsa.util.rdm_utils import _take_subsample
 from .result import Result
-from .crossvalsets import sets_k_fold, sets_random
+from .crossvalsets import sets_k_fold, sets_random, _fold_size
 from .noise_ceiling import boot_noise_ceiling
 from .noise_ceiling import cv_noise_ceiling
+from .noise_ceiling import _boot_noise_ceiling_weights
+from .resampling import run_adaptive, sample_rng, sample_seeds
+from .resampling import sample_summary, variance_precision
+from .resampling import SampleMoments
+from .plan import PlanSample
 
 
-def eval_fancy(models, data, method='cosine', fitter=None, n_cv=1,
+def eval_fancy(models, data, method='cosine', fitter=None, n_cv=2,
                k_pattern=None, k_rdm=None, N=1000, boot_noise_ceil=False,
-               pattern_descriptor='index', rdm_descriptor='index'):
+               pattern_descriptor='index', rdm_descriptor='index',
+               use_correction=True, seed=None, n_jobs=1, executor=None,
+               cv_n_jobs=1, precision=None, batch_size=100,
+               streaming=False, thinning=None, checkpoint=None,
+               checkpoint_interval=100, plan=None):
     """evaluates a model by k-fold crossvalidation within a bootstrap
     Then uses the correction formula to get an estimate of the variance
     of the mean.
 
+    The bootstrap over both rdms and patterns, the one over rdms only and
+    the one over patterns only share their samples: Each bootstrap sample
+    is drawn once and the rdm-only and pattern-only samples are derived
+    from its rdm and pattern draws, as in dual_bootstrap.
+
     If a k is set to 1 no crossvalidation is performed over the
     corresponding dimension.
 
     Args:
         models(pyrsa.model.Model or list): Models to be evaluated
         data(pyrsa.rdm.RDMs): RDM data to use
-        method(string): comparison method to use
+        method(string or list): comparison method or list of methods.
+            For a list, one Result per method is returned, which are
+            computed on the same samples
         fitter(function): fitting method for models
-        n_cv(int): number of crossvalidation runs per sample
+        n_cv(int): number of crossvalidation runs per sample (default: 2)
         k_pattern(int): #folds over patterns
         k_rdm(int): #folds over rdms
         N(int): number of bootstrap samples (default: 1000)
+        boot_noise_ceil(bool): ignored, the noise ceilings are always
+            computed within the crossvalidations of the samples
         pattern_descriptor(string): descriptor to group patterns
         rdm_descriptor(string): descriptor to group rdms
-        random(bool): randomize group assignments (default: True)
+        use_correction(bool): switch for the correction for the
+            variance caused by crossvalidation (default: True)
+        seed(int or numpy.random.SeedSequence): seed for the random
+            draws. results are identical for the same seed irrespective
+            of n_jobs. defaults to a seed drawn from numpy.random
+        n_jobs(int): number of parallel jobs to split the samples into
+        executor(concurrent.futures.Executor): executor to run the jobs
+            instead of the default joblib process pool
+        cv_n_jobs(int): number of parallel jobs for fitting and evaluating
+            the models on the folds of each crossvalidation, see crossval,
+            and for fitting them on the full data to start these fits
+        precision(float): target relative Monte Carlo error of the
+            variance estimates. If given, samples are drawn in batches
+            until this precision or N samples are reached
+        batch_size(int): number of samples per batch for precision
+        streaming(bool): accumulate the moments needed for the variances
+            batch by batch instead of keeping all evaluations. The result
+            then holds only the mean evaluations and noise ceilings as a
+            single sample, or the thinned sample if thinning is set
+        thinning(int): for streaming, keep every thinning-th sample
+        checkpoint(str): path of an hdf5 file to save the completed
+            samples to. If the file exists, the run is resumed from it
+            and yields the same result as an uninterrupted run
+        checkpoint_interval(int): number of samples between checkpoints
+        plan(pyrsa.inference.ResamplingPlan): precomputed samples to
+            evaluate on, which replace N and seed
 
     Returns:
         numpy.ndarray: matrix of evaluations (N x k)
 
     """
-    result_full = bootstrap_crossval(
-        models, data, method=method, fitter=fitter,
-        k_pattern=k_pattern, k_rdm=k_rdm, N=N,
-        pattern_descriptor=pattern_descriptor, rdm_descriptor=rdm_descriptor)
-    result_rdm = bootstrap_crossval(
-        models, data, method=method, fitter=fitter,
-        k_pattern=k_pattern, k_rdm=k_rdm, N=N, boot_type='rdm',
-        pattern_descriptor=pattern_descriptor, rdm_descriptor=rdm_descriptor)
-    result_pattern = bootstrap_crossval(
-        models, data, method=method, fitter=fitter,
-        k_pattern=k_pattern, k_rdm=k_rdm, N=N, boot_type='pattern',
-        pattern_descriptor=pattern_descriptor, rdm_descriptor=rdm_descriptor)
-    evaluations = np.concatenate((
-        result_full.evaluations,
-        result_rdm.evaluations,
-        result_pattern.evaluations),
-        axis=-1)
-    variances = np.array([result_full.variances,
-                          result_rdm.variances,
-                          result_pattern.variances])
-    result = Result(models, evaluations, method=method,
-                    cv_method='fancy',
-                    noise_ceiling=result_full.noise_ceiling,
-                    variances=variances,
-                    dof=result_full.dof)
-    return result
+    if plan is not None:
+        plan.check(data, pattern_descriptor, rdm_descriptor, n_cv)
+        N = plan.n_samples
+    k_pattern, k_rdm = _default_boot_k(data, k_pattern, k_rdm,
+                                       pattern_descriptor, rdm_descriptor)
+    if isinstance(models, Model):
+        models = [models]
+    methods = _methods(method)
+    theta0 = _warm_start(models, data, methods[0], fitter,
+                         pattern_descriptor, cv_n_jobs)
+    results, n_samples, achieved = _run_crossval(
+        _dual_bootstrap_sample, N,
+        (models, data, methods, fitter, k_pattern, k_rdm, n_cv,
+         pattern_descriptor, rdm_descriptor, cv_n_jobs, theta0),
+        n_method=len(methods),
+        use_correction=use_correction, streaming=streaming,
+        thinning=thinning, precision=precision, batch_size=batch_size,
+        seed=seed, n_jobs=n_jobs, executor=executor,
+        checkpoint=checkpoint, checkpoint_interval=checkpoint_interval,
+        plan=plan)
+    eval_results = []
+    for method_i, (evaluations, noise_ceil, variances) in zip(
+            methods, results):
+        # concatenate the cv runs of the variants: both, rdm, pattern
+        evaluations = np.swapaxes(evaluations, -1, -2).reshape(
+            evaluations.shape[:-2] + (3 * n_cv,))
+        eval_results.append(Result(models, evaluations, method=method_i,
+                                   cv_method='fancy',
+                                   noise_ceiling=noise_ceil[..., 0],
+                                   variances=variances,
+                                   dof=min(data.n_rdm, data.n_cond) - 1,
+                                   n_samples=n_samples, precision=achieved))
+    return _method_results(method, eval_results)
 
 
 def dual_bootstrap(models, data, method='cosine', fitter=None,
                    k_pattern=1, k_rdm=1, N=1000, n_cv=2,
                    pattern_descriptor='index', rdm_descriptor='index',
-                   random=False, use_correction=True):
+                   random=False, use_correction=True,
+                   seed=None, n_jobs=1, executor=None, cv_n_jobs=1,
+                   precision=None, batch_size=100, streaming=False,
+                   thinning=None, checkpoint=None, checkpoint_interval=100,
+                   plan=None):
     """dual bootstrap evaluation of models
     i.e. models are evaluated in a bootstrap over rdms, one over patterns
     and a bootstrap over both using the same bootstrap samples for each.
@@ -99,6 +157,8 @@ def dual_bootstrap(models, data, method='cosine', fitter=None,
     variance of the variance estimate. Thus, this function by default
     applies this correction formula and sets n_cv=2, i.e. performs only two
     different assignments per fold.
+    Models fit by optimization start each fit from their fit on the full
+    data.
     This function nonetheless performs full crossvalidation schemes, i.e.
     in every bootstrap sample all crossvalidation folds are evaluated such
     that each RDM and each condition is in the test set n_cv times.
@@ -123,7 +183,9 @@ def dual_bootstrap(models, data, method='cosine', fitter=None,
     Args:
         models(pyrsa.model.Model): models to be evaluated
         data(pyrsa.rdm.RDMs): RDM data to use
-        method(string): comparison method to use
+        method(string or list): comparison method or list of methods.
+            For a list, one Result per method is returned, which are
+            computed on the same samples
         fitter(function): fitting method for models
         k_pattern(int): #folds over patterns
         k_rdm(int): #folds over rdms
@@ -136,98 +198,67 @@ def dual_bootstrap(models, data, method='cosine', fitter=None,
             alternatives: 'rdm', 'pattern'
         use_correction(bool): switch for the correction for the
             variance caused by crossvalidation (default: True)
+        seed(int or numpy.random.SeedSequence): seed for the random
+            draws. results are identical for the same seed irrespective
+            of n_jobs. defaults to a seed drawn from numpy.random
+        n_jobs(int): number of parallel jobs to split the samples into
+        executor(concurrent.futures.Executor): executor to run the jobs
+            instead of the default joblib process pool
+        cv_n_jobs(int): number of parallel jobs for fitting and evaluating
+            the models on the folds of each crossvalidation, see crossval,
+            and for fitting them on the full data to start these fits
+        precision(float): target relative Monte Carlo error of the
+            variance estimates. If given, samples are drawn in batches
+            until this precision or N samples are reached
+        batch_size(int): number of samples per batch for precision
+        streaming(bool): accumulate the moments needed for the variances
+            batch by batch instead of keeping all evaluations. The result
+            then holds only the mean evaluations and noise ceilings as a
+            single sample, or the thinned sample if thinning is set
+        thinning(int): for streaming, keep every thinning-th sample
+        checkpoint(str): path of an hdf5 file to save the completed
+            samples to. If the file exists, the run is resumed from it
+            and yields the same result as an uninterrupted run
+        checkpoint_interval(int): number of samples between checkpoints
+        plan(pyrsa.inference.ResamplingPlan): precomputed samples to
+            evaluate on, which replace N and seed
 
     Returns:
         numpy.ndarray: matrix of evaluations (N x k)
 
     """
-    if k_pattern is None:
-        n_pattern = len(np.unique(data.pattern_descriptors[
-            pattern_descriptor]))
-        k_pattern = default_k_pattern((1 - 1 / np.exp(1)) * n_pattern)
-    if k_rdm is None:
-        n_rdm = len(np.unique(data.rdm_descriptors[
-            rdm_descriptor]))
-        k_rdm = default_k_rdm((1 - 1 / np.exp(1)) * n_rdm)
+    if plan is not None:
+        plan.check(data, pattern_descriptor, rdm_descriptor, n_cv)
+        N = plan.n_samples
+    k_pattern, k_rdm = _default_boot_k(data, k_pattern, k_rdm,
+                                       pattern_descriptor, rdm_descriptor)
     if k_rdm == 1 and k_pattern == 1:
         n_cv = 1
         use_correction = False
     if isinstance(models, Model):
         models = [models]
-    evaluations = np.zeros((N, len(models), k_pattern * k_rdm, n_cv, 3))
-    noise_ceil = np.zeros((2, N, n_cv, 3))
-    for i_sample in tqdm.trange(N):
-        sample, rdm_idx, pattern_idx = bootstrap_sample(
-            data,
-            rdm_descriptor=rdm_descriptor,
-            pattern_descriptor=pattern_descriptor)
-        sample_rdm = data.subsample(rdm_descriptor, rdm_idx)
-        sample_pattern = data.subsample_pattern(
-            pattern_descriptor, pattern_idx)
-        if len(np.unique(rdm_idx)) >= k_rdm \
-           and len(np.unique(pattern_idx)) >= 3 * k_pattern:
-            for i_rep in range(n_cv):
-                evals, cv_nc = _internal_cv(
-                    models, sample,
-                    pattern_descriptor, rdm_descriptor, pattern_idx,
-                    k_pattern, k_rdm,
-                    method, fitter)
-                noise_ceil[:, i_sample, i_rep, 0] = cv_nc
-                evaluations[i_sample, :, :, i_rep, 0] = evals[0]
-                evals, cv_nc = _internal_cv(
-                    models, sample_rdm,
-                    pattern_descriptor, rdm_descriptor,
-                    np.unique(data.pattern_descriptors[pattern_descriptor]),
-                    k_pattern, k_rdm,
-                    method, fitter)
-                noise_ceil[:, i_sample, i_rep, 1] = cv_nc
-                evaluations[i_sample, :, :, i_rep, 1] = evals[0]
-                evals, cv_nc = _internal_cv(
-                    models, sample_pattern,
-                    pattern_descriptor, rdm_descriptor, pattern_idx,
-                    k_pattern, k_rdm,
-                    method, fitter)
-                noise_ceil[:, i_sample, i_rep, 2] = cv_nc
-                evaluations[i_sample, :, :, i_rep, 2] = evals[0]
-        else:  # sample does not allow desired crossvalidation
-            evaluations[i_sample, :, :, :, :] = np.nan
-            noise_ceil[:, i_sample, :, :] = np.nan
+    methods = _methods(method)
+    theta0 = _warm_start(models, data, methods[0], fitter,
+                         pattern_descriptor, cv_n_jobs)
+    results, n_samples, achieved = _run_crossval(
+        _dual_bootstrap_sample, N,
+        (models, data, methods, fitter, k_pattern, k_rdm, n_cv,
+         pattern_descriptor, rdm_descriptor, cv_n_jobs, theta0),
+        n_method=len(methods),
+        use_correction=use_correction, streaming=streaming,
+        thinning=thinning, precision=precision, batch_size=batch_size,
+        seed=seed, n_jobs=n_jobs, executor=executor,
+        checkpoint=checkpoint, checkpoint_interval=checkpoint_interval,
+        plan=plan)
     cv_method = 'dual_bootstrap'
     dof = min(data.n_rdm, data.n_cond) - 1
-    eval_ok = ~np.isnan(evaluations[:, 0, 0, 0, 0])
-    if use_correction and n_cv > 1:
-        # we essentially project from the two points for 1 repetition and
-        # for n_cv repetitions to infinitely many cv repetitions
-        evals_mean = np.mean(np.mean(evaluations[eval_ok], -1), -1)
-        evals_1 = np.mean(evaluations[eval_ok], -2)
-        noise_ceil_mean = np.mean(noise_ceil[:, eval_ok], -1)
-        noise_ceil_1 = noise_ceil[:, eval_ok]
-        var_mean = np.cov(
-            np.concatenate([evals_mean.T, noise_ceil_mean]))
-        var_1 = []
-        for i in range(n_cv):
-            var_1.append(np.cov(np.concatenate([
-                evals_1[:, :, i].T, noise_ceil_1[:, :, i]])))
-        var_1 = np.mean(np.array(var_1), axis=0)
-        # this is the main formula for the correction:
-        variances = (n_cv * var_mean - var_1) / (n_cv - 1)
-    else:
-        if use_correction:
-            raise Warning('correction requested, but only one cv run'
-                          + ' per sample requested. This is invalid!'
-                          + ' We do not use the correction for now.')
-        evals_nonan = np.mean(np.mean(evaluations[eval_ok], -2), -2)
-        noise_ceil_nonan = np.mean(
-            noise_ceil[:, eval_ok], -2).transpose([1, 0, 2])
-        matrix = np.concatenate([evals_nonan, noise_ceil_nonan], 1)
-        matrix -= np.mean(matrix, 0, keepdims=True)
-        variances = np.einsum('ijk,ilk->kjl', matrix, matrix) \
-            / (matrix.shape[0] - 1)
-        variances = variances[:-2, :-2]
-    result = Result(models, evaluations, method=method,
-                    cv_method=cv_method, noise_ceiling=noise_ceil,
-                    variances=variances, dof=dof)
-    return result
+    return _method_results(method, [
+        Result(models, evaluations, method=method_i,
+               cv_method=cv_method, noise_ceiling=noise_ceil,
+               variances=variances, dof=dof,
+               n_samples=n_samples, precision=achieved)
+        for method_i, (evaluations, noise_ceil, variances)
+        in zip(methods, results)])
 
 
 def eval_fixed(models, data, theta=None, method='cosine'):
@@ -248,7 +279,7 @@ def eval_fixed(models, data, theta=None, method='cosine'):
     evaluations = np.repeat(np.expand_dims(evaluations, -1),
                             data.n_rdm, -1)
     for k, model in enumerate(models):
-        rdm_pred = model.predict_rdm(theta=theta[k])
+        rdm_pred = model.predict_vectors(theta=theta[k])
         evaluations[k] = compare(rdm_pred, data, method)
     evaluations = evaluations.reshape((1, len(models), data.n_rdm))
     noise_ceil = boot_noise_ceiling(
@@ -264,7 +295,9 @@ def eval_fixed(models, data, theta=None, method='cosine'):
 
 def eval_bootstrap(models, data, theta=None, method='cosine', N=1000,
                    pattern_descriptor='index', rdm_descriptor='index',
-                   boot_noise_ceil=True):
+                   boot_noise_ceil=True,
+                   seed=None, n_jobs=1, executor=None,
+                   precision=None, batch_size=100, plan=None):
     """evaluates models on data
     performs bootstrapping to get a sampling distribution
 
@@ -272,59 +305,66 @@ def eval_bootstrap(models, data, theta=None, method='cosine', N=1000,
         models(pyrsa.model.Model or list): models to be evaluated
         data(pyrsa.rdm.RDMs): data to evaluate on
         theta(numpy.ndarray): parameter vector for the models
-        method(string): comparison method to use
+        method(string or list): comparison method or list of methods.
+            For a list, one Result per method is returned, which are
+            computed on the same samples
         N(int): number of samples
         pattern_descriptor(string): descriptor to group patterns for bootstrap
         rdm_descriptor(string): descriptor to group rdms for bootstrap
+        seed(int or numpy.random.SeedSequence): seed for the random
+            draws. results are identical for the same seed irrespective
+            of n_jobs. defaults to a seed drawn from numpy.random
+        n_jobs(int): number of parallel jobs to split the samples into
+        executor(concurrent.futures.Executor): executor to run the jobs
+            instead of the default joblib process pool
+        precision(float): target relative Monte Carlo error of the
+            variance estimates. If given, samples are drawn in batches
+            until this precision or N samples are reached
+        batch_size(int): number of samples per batch for precision
+        plan(pyrsa.inference.ResamplingPlan): precomputed samples to
+            evaluate on, which replace N and seed
 
     Returns:
         numpy.ndarray: vector of evaluations
 
     """
+    if plan is not None:
+        plan.check(data, pattern_descriptor, rdm_descriptor)
+        N = plan.n_samples
     models, evaluations, theta, _ = \
         input_check_model(models, theta, None, N)
-    noise_min = []
-    noise_max = []
-    for i in tqdm.trange(N):
-        sample, rdm_idx, pattern_idx = \
-            bootstrap_sample(data, rdm_descriptor=rdm_descriptor,
-                             pattern_descriptor=pattern_descriptor)
-        if len(np.unique(pattern_idx)) >= 3:
-            for j, mod in enumerate(models):
-                rdm_pred = mod.predict_rdm(theta=theta[j])
-                rdm_pred = rdm_pred.subsample_pattern(pattern_descriptor,
-                                                      pattern_idx)
-                evaluations[i, j] = np.mean(compare(rdm_pred, sample,
-                                                    method))
-            if boot_noise_ceil:
-                noise_min_sample, noise_max_sample = boot_noise_ceiling(
-                    sample, method=method, rdm_descriptor=rdm_descriptor)
-                noise_min.append(noise_min_sample)
-                noise_max.append(noise_max_sample)
-        else:
-            evaluations[i, :] = np.nan
-            noise_min.append(np.nan)
-            noise_max.append(np.nan)
-    if boot_noise_ceil:
-        eval_ok = np.isfinite(evaluations[:, 0])
-        noise_ceil = np.array([noise_min, noise_max])
-        variances = np.cov(np.concatenate([evaluations[eval_ok, :].T,
-                                           noise_ceil[:, eval_ok]]))
+    predictions = _predict_vectors(models, theta)
+    methods = _methods(method)
+    if _weights_valid(predictions, data, methods):
+        sample_fun = _eval_weights_sample
     else:
-        eval_ok = np.isfinite(evaluations[:, 0])
-        noise_ceil = np.array(boot_noise_ceiling(
-            data, method=method, rdm_descriptor=rdm_descriptor))
-        variances = np.cov(evaluations[eval_ok, :].T)
+        sample_fun = _eval_bootstrap_sample
+    (evaluations, noise_ceil), achieved = run_adaptive(
+        sample_fun, N,
+        (predictions, data, methods, 'both',
+         pattern_descriptor, rdm_descriptor, boot_noise_ceil),
+        precision=precision, batch_size=batch_size,
+        seed=seed, n_jobs=n_jobs, executor=executor, plan=plan)
     dof = min(data.n_rdm, data.n_cond) - 1
-    result = Result(models, evaluations, method=method,
-                    cv_method='bootstrap', noise_ceiling=noise_ceil,
-                    variances=variances, dof=dof)
-    return result
+    results = []
+    for method_i, (evals, noise_ceil_i) in zip(
+            methods, _split_methods([evaluations, noise_ceil], len(methods))):
+        noise_ceil_i, variances = _fixed_variances(
+            evals, noise_ceil_i, data, method_i, rdm_descriptor,
+            boot_noise_ceil)
+        results.append(Result(models, evals, method=method_i,
+                              cv_method='bootstrap',
+                              noise_ceiling=noise_ceil_i,
+                              variances=variances, dof=dof,
+                              n_samples=evals.shape[0], precision=achieved))
+    return _method_results(method, results)
 
 
 def eval_bootstrap_pattern(models, data, theta=None, method='cosine', N=1000,
                            pattern_descriptor='index', rdm_descriptor='index',
-                           boot_noise_ceil=True):
+                           boot_noise_ceil=True,
+                           seed=None, n_jobs=1, executor=None,
+                           precision=None, batch_size=100, plan=None):
     """evaluates a models on data
     performs bootstrapping over patterns to get a sampling distribution
 
@@ -332,107 +372,150 @@ def eval_bootstrap_pattern(models, data, theta=None, method='cosine', N=1000,
         models(pyrsa.model.Model or list): models to be evaluated
         data(pyrsa.rdm.RDMs): data to evaluate on
         theta(numpy.ndarray): parameter vector for the models
-        method(string): comparison method to use
+        method(string or list): comparison method or list of methods.
+            For a list, one Result per method is returned, which are
+            computed on the same samples
         N(int): number of samples
         pattern_descriptor(string): descriptor to group patterns for bootstrap
         rdm_descriptor(string): descriptor to group patterns for noise
             ceiling calculation
+        seed(int or numpy.random.SeedSequence): seed for the random
+            draws. results are identical for the same seed irrespective
+            of n_jobs. defaults to a seed drawn from numpy.random
+        n_jobs(int): number of parallel jobs to split the samples into
+        executor(concurrent.futures.Executor): executor to run the jobs
+            instead of the default joblib process pool
+        precision(float): target relative Monte Carlo error of the
+            variance estimates. If given, samples are drawn in batches
+            until this precision or N samples are reached
+        batch_size(int): number of samples per batch for precision
+        plan(pyrsa.inference.ResamplingPlan): precomputed samples to
+            evaluate on, which replace N and seed
 
     Returns:
         numpy.ndarray: vector of evaluations
 
     """
+    if plan is not None:
+        plan.check(data, pattern_descriptor, rdm_descriptor)
+        N = plan.n_samples
     models, evaluations, theta, _ = \
         input_check_model(models, theta, None, N)
-    noise_min = []
-    noise_max = []
-    for i in tqdm.trange(N):
-        sample, pattern_idx = \
-            bootstrap_sample_pattern(data, pattern_descriptor)
-        if len(np.unique(pattern_idx)) >= 3:
-            for j, mod in enumerate(models):
-                rdm_pred = mod.predict_rdm(theta=theta[j])
-                rdm_pred = rdm_pred.subsample_pattern(pattern_descriptor,
-                                                      pattern_idx)
-                evaluations[i, j] = np.mean(compare(rdm_pred, sample,
-                                                    method))
-            if boot_noise_ceil:
-                noise_min_sample, noise_max_sample = boot_noise_ceiling(
-                    sample, method=method, rdm_descriptor=rdm_descriptor)
-                noise_min.append(noise_min_sample)
-                noise_max.append(noise_max_sample)
-        else:
-            evaluations[i, :] = np.nan
-            noise_min.append(np.nan)
-            noise_max.append(np.nan)
-    if boot_noise_ceil:
-        eval_ok = np.isfinite(evaluations[:, 0])
-        noise_ceil = np.array([noise_min, noise_max])
-        variances = np.cov(np.concatenate([evaluations[eval_ok, :].T,
-                                           noise_ceil[:, eval_ok]]))
+    predictions = _predict_vectors(models, theta)
+    methods = _methods(method)
+    if _weights_valid(predictions, data, methods):
+        sample_fun = _eval_weights_sample
     else:
-        eval_ok = np.isfinite(evaluations[:, 0])
-        noise_ceil = np.array(boot_noise_ceiling(
-            data, method=method, rdm_descriptor=rdm_descriptor))
-        variances = np.cov(evaluations[eval_ok, :].T)
+        sample_fun = _eval_bootstrap_sample
+    (evaluations, noise_ceil), achieved = run_adaptive(
+        sample_fun, N,
+        (predictions, data, methods, 'pattern',
+         pattern_descriptor, rdm_descriptor, boot_noise_ceil),
+        precision=precision, batch_size=batch_size,
+        seed=seed, n_jobs=n_jobs, executor=executor, plan=plan)
     dof = data.n_cond - 1
-    result = Result(models, evaluations, method=method,
-                    cv_method='bootstrap_pattern', noise_ceiling=noise_ceil,
-                    variances=variances, dof=dof)
-    return result
+    results = []
+    for method_i, (evals, noise_ceil_i) in zip(
+            methods, _split_methods([evaluations, noise_ceil], len(methods))):
+        noise_ceil_i, variances = _fixed_variances(
+            evals, noise_ceil_i, data, method_i, rdm_descriptor,
+            boot_noise_ceil)
+        results.append(Result(models, evals, method=method_i,
+                              cv_method='bootstrap_pattern',
+                              noise_ceiling=noise_ceil_i,
+                              variances=variances, dof=dof,
+                              n_samples=evals.shape[0], precision=achieved))
+    return _method_results(method, results)
 
 
 def eval_bootstrap_rdm(models, data, theta=None, method='cosine', N=1000,
-                       rdm_descriptor='index', boot_noise_ceil=True):
+                       rdm_descriptor='index', boot_noise_ceil=True,
+                       seed=None, n_jobs=1, executor=None,
+                       precision=None, batch_size=100, plan=None):
     """evaluates models on data
     performs bootstrapping to get a sampling distribution
 
+    For cosine and corr on data without missing values, all samples are
+    evaluated at once as weights of the rdms, unless precision, parallel
+    jobs or an executor are requested. The samples are the same in all
+    cases.
+
     Args:
         models(pyrsa.model.Model or list of these): models to be evaluated
         data(pyrsa.rdm.RDMs): data to evaluate on
         theta(numpy.ndarray): parameter vector for the models
-        method(string): comparison method to use
+        method(string or list): comparison method or list of methods.
+            For a list, one Result per method is returned, which are
+            computed on the same samples
         N(int): number of samples
         rdm_descriptor(string): rdm_descriptor to group rdms for bootstrap
+        seed(int or numpy.random.SeedSequence): seed for the random
+            draws. results are identical for the same seed irrespective
+            of n_jobs. defaults to a seed drawn from numpy.random
+        n_jobs(int): number of parallel jobs to split the samples into
+        executor(concurrent.futures.Executor): executor to run the jobs
+            instead of the default joblib process pool
+        precision(float): target relative Monte Carlo error of the
+            variance estimates. If given, samples are drawn in batches
+            until this precision or N samples are reached
+        batch_size(int): number of samples per batch for precision
+        plan(pyrsa.inference.ResamplingPlan): precomputed samples to
+            evaluate on, which replace N and seed
 
     Returns:
         numpy.ndarray: vector of evaluations
 
     """
+    if plan is not None:
+        plan.check(data, plan.pattern_descriptor, rdm_descriptor)
+        N = plan.n_samples
     models, evaluations, theta, _ = input_check_model(models, theta, None, N)
-    noise_min = []
-    noise_max = []
-    for i in tqdm.trange(N):
-        sample, rdm_idx = bootstrap_sample_rdm(data, rdm_descriptor)
-        for j, mod in enumerate(models):
-            rdm_pred = mod.predict_rdm(theta=theta[j])
-            evaluations[i, j] = np.mean(compare(rdm_pred, sample,
-                                                method))
-        if boot_noise_ceil:
-            noise_min_sample, noise_max_sample = boot_noise_ceiling(
-                sample, method=method, rdm_descriptor=rdm_descriptor)
-            noise_min.append(noise_min_sample)
-            noise_max.append(noise_max_sample)
-    if boot_noise_ceil:
-        eval_ok = np.isfinite(evaluations[:, 0])
-        noise_ceil = np.array([noise_min, noise_max])
-        variances = np.cov(np.concatenate([evaluations[eval_ok, :].T,
-                                           noise_ceil[:, eval_ok]]))
+    predictions = _predict_vectors(models, theta)
+    methods = _methods(method)
+    weights_valid = _weights_valid(predictions, data, methods)
+    if weights_valid and precision is None and executor is None \
+            and effective_n_jobs(n_jobs) == 1:
+        # all samples at once as weights of the rdms
+        groups = _rdm_groups(data, rdm_descriptor)
+        if plan is None:
+            weights = _rdm_weights(data, rdm_descriptor, N, seed)[:, groups]
+        else:
+            weights = plan.rdm_weights()[:, groups]
+        evaluations, noise_ceil = _eval_weights(
+            predictions, data.get_vectors(), weights, groups, methods,
+            boot_noise_ceil)
+        achieved = variance_precision(
+            sample_summary([evaluations, noise_ceil]))
     else:
-        eval_ok = np.isfinite(evaluations[:, 0])
-        noise_ceil = np.array(boot_noise_ceiling(
-            data, method=method, rdm_descriptor=rdm_descriptor))
-        variances = np.cov(evaluations[eval_ok, :].T)
+        if weights_valid:
+            sample_fun = _eval_weights_sample
+        else:
+            sample_fun = _eval_bootstrap_sample
+        (evaluations, noise_ceil), achieved = run_adaptive(
+            sample_fun, N,
+            (predictions, data, methods, 'rdm',
+             'index', rdm_descriptor, boot_noise_ceil),
+            precision=precision, batch_size=batch_size,
+            seed=seed, n_jobs=n_jobs, executor=executor, plan=plan)
     dof = data.n_rdm - 1
-    variances = np.cov(evaluations.T)
-    result = Result(models, evaluations, method=method,
-                    cv_method='bootstrap_rdm', noise_ceiling=noise_ceil,
-                    variances=variances, dof=dof)
-    return result
+    results = []
+    for method_i, (evals, noise_ceil_i) in zip(
+            methods, _split_methods([evaluations, noise_ceil], len(methods))):
+        noise_ceil_i, _ = _fixed_variances(
+            evals, noise_ceil_i, data, method_i, rdm_descriptor,
+            boot_noise_ceil)
+        variances = np.cov(evals.T)
+        results.append(Result(models, evals, method=method_i,
+                              cv_method='bootstrap_rdm',
+                              noise_ceiling=noise_ceil_i,
+                              variances=variances, dof=dof,
+                              n_samples=evals.shape[0], precision=achieved))
+    return _method_results(method, results)
 
 
 def crossval(models, rdms, train_set, test_set, ceil_set=None, method='cosine',
-             fitter=None, pattern_descriptor='index', calc_noise_ceil=True):
+             fitter=None, pattern_descriptor='index', calc_noise_ceil=True,
+             n_jobs=1, theta0=None):
     """evaluates models on cross-validation sets
 
     Args:
@@ -442,11 +525,20 @@ def crossval(models, rdms, train_set, test_set, ceil_set=None, method='cosine',
             (RDMs, pattern_idx)
         test_set(list): a list of the test RDMs with 2-tuple entries:
             (RDMs, pattern_idx)
-        method(string): comparison method to use
+        method(string or list): comparison method or list of methods
+            to use
         pattern_descriptor(string): descriptor to group patterns
+        n_jobs(int): number of parallel jobs to fit and evaluate the
+            models on the folds in. Each job fits a chunk of models on one
+            fold. The jobs run in a joblib process pool with one BLAS
+            thread each. -1 uses all processors
+        theta0(list): initial parameters for fitting each model, e.g. the
+            fits on the full data. None entries use the fitter defaults
 
     Returns:
-        numpy.ndarray: vector of evaluations
+        pyrsa.inference.Result: the results, a list with one result
+        per method if a list of methods is given. The number of optimizer
+        iterations per model and fold is stored as fit_iterations
 
     """
     assert len(train_set) == len(test_set), \
@@ -456,50 +548,183 @@ def crossval(models, rdms, train_set, test_set, ceil_set=None, method='cosine',
             'ceil_set and test_set must have the same length'
     if isinstance(models, Model):
         models = [models]
-    evaluations = []
+    methods = _methods(method)
+    folds = []
+    for train, test in zip(train_set, test_set):
+        n_rdm_train, n_cond_train = _fold_size(train)
+        n_rdm_test, n_cond_test = _fold_size(test)
+        folds.append(n_rdm_train > 0 and n_rdm_test > 0
+                     and n_cond_train > 2 and n_cond_test > 2)
+    if any(folds):
+        models, _, _, fitter = input_check_model(models, None, fitter)
+    tasks = [(i, chunk) for i in np.flatnonzero(folds)
+             for chunk in _model_chunks(len(models), sum(folds), n_jobs)]
+    if theta0 is None:
+        theta0 = [None] * len(models)
+    task_args = [([models[j] for j in chunk], [fitter[j] for j in chunk],
+                  train_set[i], test_set[i], methods, pattern_descriptor,
+                  [theta0[j] for j in chunk]) for i, chunk in tasks]
+    with prediction_cache(models):
+        outputs = _run_tasks(_fit_evaluate_models, task_args, n_jobs)
+    evaluations = np.full((len(train_set), len(methods), len(models)),
+                          np.nan)
+    iterations = np.zeros((len(train_set), len(methods), len(models)),
+                          dtype=int)
+    for (i, chunk), (evals, n_iter) in zip(tasks, outputs):
+        evaluations[i][:, chunk] = evals.T
+        iterations[i][:, chunk] = n_iter.T
     noise_ceil = []
-    for i in range(len(train_set)):
-        train = train_set[i]
-        test = test_set[i]
-        if (train[0].n_rdm == 0 or test[0].n_rdm == 0 or
-                train[0].n_cond <= 2 or test[0].n_cond <= 2):
-            evals = np.empty(len(models)) * np.nan
-        else:
-            models, evals, _, fitter = \
-                input_check_model(models, None, fitter)
-            for j, model in enumerate(models):
-                theta = fitter[j](model, train[0], method=method,
-                                  pattern_idx=train[1],
+    if ceil_set is None and calc_noise_ceil:
+        for i in np.flatnonzero(folds):
+            noise_ceil.append([boot_noise_ceiling(
+                rdms.subsample_pattern(by=pattern_descriptor,
+                                       value=test_set[i][1]),
+                method=method_i) for method_i in methods])
+    results = []
+    for i_method, method_i in enumerate(methods):
+        # .T to switch models/set order
+        evals = evaluations[:, i_method].T.reshape(
+            (1, len(models), len(train_set)))
+        if ceil_set is not None and calc_noise_ceil:
+            nc = cv_noise_ceiling(rdms, ceil_set, test_set,
+                                  method=method_i,
                                   pattern_descriptor=pattern_descriptor)
-                pred = model.predict_rdm(theta)
-                pred = pred.subsample_pattern(by=pattern_descriptor,
-                                              value=test[1])
-                evals[j] = np.mean(compare(pred, test[0], method))
-            if ceil_set is None and calc_noise_ceil:
-                noise_ceil.append(boot_noise_ceiling(
-                    rdms.subsample_pattern(by=pattern_descriptor,
-                                           value=test[1]),
-                    method=method))
-        evaluations.append(evals)
-    evaluations = np.array(evaluations).T  # .T to switch models/set order
-    evaluations = evaluations.reshape((1, len(models), len(train_set)))
-    if ceil_set is not None and calc_noise_ceil:
-        noise_ceil = cv_noise_ceiling(rdms, ceil_set, test_set, method=method,
-                                      pattern_descriptor=pattern_descriptor)
-    elif calc_noise_ceil:
-        noise_ceil = np.array(noise_ceil).T
-    else:
-        noise_ceil = np.array([np.nan, np.nan])
+        elif calc_noise_ceil:
+            nc = np.array([fold_nc[i_method] for fold_nc in noise_ceil]).T
+        else:
+            nc = np.array([np.nan, np.nan])
+        results.append(Result(models, evals, method=method_i,
+                              cv_method='crossvalidation',
+                              noise_ceiling=nc,
+                              fit_iterations=iterations[:, i_method].T))
+    return _method_results(method, results)
 
-    result = Result(models, evaluations, method=method,
-                    cv_method='crossvalidation', noise_ceiling=noise_ceil)
-    return result
+
+def _fit_evaluate(model, fitter, train, test, methods, pattern_descriptor,
+                  theta0=None):
+    """ fits a model on a training set starting from theta0 and evaluates
+    it on the test set
+
+    Returns:
+        numpy.ndarray: evaluation per method
+        numpy.ndarray: optimizer iterations per method
+
+    """
+    evals = np.empty(len(methods))
+    iterations = np.zeros(len(methods), dtype=int)
+    for i_method, method in enumerate(methods):
+        # methods share the fit if the fitter ignores them
+        if i_method == 0 or not _method_independent(fitter):
+            theta, iterations[i_method] = _fit_iterations(
+                fitter, model, train[0], method=method,
+                pattern_idx=train[1],
+                pattern_descriptor=pattern_descriptor, theta0=theta0)
+            pred = _cached_prediction(
+                model, theta,
+                _pattern_index(model, test[1], pattern_descriptor))
+        evals[i_method] = np.mean(compare(pred, test[0], method))
+    return evals, iterations
+
+
+def _fit_evaluate_models(models, fitters, train, test, methods,
+                         pattern_descriptor, theta0):
+    """ _fit_evaluate for a chunk of models on the same fold
+
+    Returns:
+        numpy.ndarray: evaluations (models x methods)
+        numpy.ndarray: optimizer iterations (models x methods)
+
+    """
+    with prediction_cache(models):
+        outputs = [_fit_evaluate(model, fitters[j], train, test, methods,
+                                 pattern_descriptor, theta0[j])
+                   for j, model in enumerate(models)]
+    return (np.array([evals for evals, _ in outputs]),
+            np.array([n_iter for _, n_iter in outputs]))
+
+
+def _model_chunks(n_models, n_folds, n_jobs):
+    """ splits the models into the chunks fitted by one job on a fold,
+    such that the fold data are sent to the jobs once per chunk.
+    Sequentially all models form one chunk, in parallel there are enough
+    chunks over all folds to occupy the jobs. The chunks depend only on
+    the numbers of models, folds and jobs.
+
+    Returns:
+        list: model indices of each chunk
+
+    """
+    n_chunks = 1
+    if effective_n_jobs(n_jobs) > 1 and n_folds > 0:
+        n_chunks = -(-effective_n_jobs(n_jobs) // n_folds)
+    return np.array_split(np.arange(n_models),
+                          max(min(n_chunks, n_models), 1))
+
+
+def _run_tasks(fun, task_args, n_jobs=1):
+    """ runs fun for each tuple of arguments in task_args, in a joblib
+    process pool with one BLAS thread per job for n_jobs other than 1
+
+    Returns:
+        list: outputs in the order of task_args
+
+    """
+    if effective_n_jobs(n_jobs) == 1 or len(task_args) <= 1:
+        return [fun(*args) for args in task_args]
+    with parallel_backend('loky', inner_max_num_threads=1):
+        return Parallel(n_jobs=n_jobs)(
+            delayed(fun)(*args) for args in task_args)
+
+
+def _warm_start(models, data, method, fitter, pattern_descriptor, n_jobs=1):
+    """ fits the models on the full data to start the fits of the
+    crossvalidations within the bootstrap samples from.
+    Only fits which use initial parameters are computed, in n_jobs
+    parallel chunks of models.
+    As the comparisons do not depend on the scale of the prediction, the
+    fits are scaled to a mean weight of one.
+
+    Returns:
+        list: theta0 for each model, None where not used
+
+    """
+    models, _, _, fitter = input_check_model(models, None, fitter)
+    fitted = [j for j in range(len(models))
+              if _warm_startable(fitter[j], method)]
+    chunks = _model_chunks(len(fitted), 1, n_jobs)
+    outputs = _run_tasks(
+        _fit_models,
+        [([models[fitted[k]] for k in chunk],
+          [fitter[fitted[k]] for k in chunk], data, method,
+          pattern_descriptor) for chunk in chunks if len(chunk) > 0],
+        n_jobs)
+    theta0 = [None] * len(models)
+    for j, theta in zip(fitted, [theta for out in outputs for theta in out]):
+        if np.mean(theta) > 0:
+            theta0[j] = theta / np.mean(theta)
+    return theta0
+
+
+def _fit_models(models, fitters, data, method, pattern_descriptor):
+    """ fits a chunk of models on data
+
+    Returns:
+        list: parameters of each model
+
+    """
+    return [_fit_iterations(fitters[j], model, data, method=method,
+                            pattern_descriptor=pattern_descriptor)[0]
+            for j, model in enumerate(models)]
 
 
 def bootstrap_crossval(models, data, method='cosine', fitter=None,
                        k_pattern=None, k_rdm=None, N=1000, n_cv=2,
                        pattern_descriptor='index', rdm_descriptor='index',
-                       random=True, boot_type='both', use_correction=True):
+                       random=True, boot_type='both', use_correction=True,
+                       seed=None, n_jobs=1, executor=None, cv_n_jobs=1,
+                       precision=None, batch_size=100, streaming=False,
+                       thinning=None, checkpoint=None,
+                       checkpoint_interval=100, plan=None):
     """evaluates a set of models by k-fold crossvalidation within a bootstrap
 
     Crossvalidation creates variance in the results for a single bootstrap
@@ -513,6 +738,8 @@ def bootstrap_crossval(models, data, method='cosine', fitter=None,
     variance of the variance estimate. Thus, this function by default
     applies this correction formula and sets n_cv=2, i.e. performs only two
     different assignments per fold.
+    Models fit by optimization start each fit from their fit on the full
+    data.
     This function nonetheless performs full crossvalidation schemes, i.e.
     in every bootstrap sample all crossvalidation folds are evaluated such
     that each RDM and each condition is in the test set n_cv times. For the
@@ -543,7 +770,9 @@ def bootstrap_crossval(models, data, method='cosine', fitter=None,
     Args:
         models(pyrsa.model.Model): models to be evaluated
         data(pyrsa.rdm.RDMs): RDM data to use
-        method(string): comparison method to use
+        method(string or list): comparison method or list of methods.
+            For a list, one Result per method is returned, which are
+            computed on the same samples
         fitter(function): fitting method for models
         k_pattern(int): #folds over patterns
         k_rdm(int): #folds over rdms
@@ -556,55 +785,57 @@ def bootstrap_crossval(models, data, method='cosine', fitter=None,
             alternatives: 'rdm', 'pattern'
         use_correction(bool): switch for the correction for the
             variance caused by crossvalidation (default: True)
+        seed(int or numpy.random.SeedSequence): seed for the random
+            draws. results are identical for the same seed irrespective
+            of n_jobs. defaults to a seed drawn from numpy.random
+        n_jobs(int): number of parallel jobs to split the samples into
+        executor(concurrent.futures.Executor): executor to run the jobs
+            instead of the default joblib process pool
+        cv_n_jobs(int): number of parallel jobs for fitting and evaluating
+            the models on the folds of each crossvalidation, see crossval,
+            and for fitting them on the full data to start these fits
+        precision(float): target relative Monte Carlo error of the
+            variance estimates. If given, samples are drawn in batches
+            until this precision or N samples are reached
+        batch_size(int): number of samples per batch for precision
+        streaming(bool): accumulate the moments needed for the variances
+            batch by batch instead of keeping all evaluations. The result
+            then holds only the mean evaluations and noise ceilings as a
+            single sample, or the thinned sample if thinning is set
+        thinning(int): for streaming, keep every thinning-th sample
+        checkpoint(str): path of an hdf5 file to save the completed
+            samples to. If the file exists, the run is resumed from it
+            and yields the same result as an uninterrupted run
+        checkpoint_interval(int): number of samples between checkpoints
+        plan(pyrsa.inference.ResamplingPlan): precomputed samples to
+            evaluate on, which replace N and seed
 
     Returns:
         numpy.ndarray: matrix of evaluations (N x k)
 
     """
-    if k_pattern is None:
-        n_pattern = len(np.unique(data.pattern_descriptors[
-            pattern_descriptor]))
-        k_pattern = default_k_pattern((1 - 1 / np.exp(1)) * n_pattern)
-    if k_rdm is None:
-        n_rdm = len(np.unique(data.rdm_descriptors[
-            rdm_descriptor]))
-        k_rdm = default_k_rdm((1 - 1 / np.exp(1)) * n_rdm)
+    if plan is not None:
+        plan.check(data, pattern_descriptor, rdm_descriptor, n_cv)
+        N = plan.n_samples
+    k_pattern, k_rdm = _default_boot_k(data, k_pattern, k_rdm,
+                                       pattern_descriptor, rdm_descriptor)
     if isinstance(models, Model):
         models = [models]
-    evaluations = np.empty((N, len(models), k_pattern * k_rdm, n_cv))
-    noise_ceil = np.empty((2, N, n_cv))
-    for i_sample in tqdm.trange(N):
-        if boot_type == 'both':
-            sample, rdm_idx, pattern_idx = bootstrap_sample(
-                data,
-                rdm_descriptor=rdm_descriptor,
-                pattern_descriptor=pattern_descriptor)
-        elif boot_type == 'pattern':
-            sample, pattern_idx = bootstrap_sample_pattern(
-                data,
-                pattern_descriptor=pattern_descriptor)
-            rdm_idx = np.unique(data.rdm_descriptors[rdm_descriptor])
-        elif boot_type == 'rdm':
-            sample, rdm_idx = bootstrap_sample_rdm(
-                data,
-                rdm_descriptor=rdm_descriptor)
-            pattern_idx = np.unique(
-                data.pattern_descriptors[pattern_descriptor])
-        else:
-            raise ValueError('boot_type not understood')
-        if len(np.unique(rdm_idx)) >= k_rdm \
-           and len(np.unique(pattern_idx)) >= 3 * k_pattern:
-            for i_rep in range(n_cv):
-                evals, cv_nc = _internal_cv(
-                    models, sample,
-                    pattern_descriptor, rdm_descriptor, pattern_idx,
-                    k_pattern, k_rdm,
-                    method, fitter)
-                noise_ceil[:, i_sample, i_rep] = cv_nc
-                evaluations[i_sample, :, :, i_rep] = evals[0]
-        else:  # sample does not allow desired crossvalidation
-            evaluations[i_sample, :, :] = np.nan
-            noise_ceil[:, i_sample] = np.nan
+    if boot_type not in ('both', 'pattern', 'rdm'):
+        raise ValueError('boot_type not understood')
+    methods = _methods(method)
+    theta0 = _warm_start(models, data, methods[0], fitter,
+                         pattern_descriptor, cv_n_jobs)
+    results, n_samples, achieved = _run_crossval(
+        _bootstrap_crossval_sample, N,
+        (models, data, methods, fitter, boot_type, k_pattern, k_rdm, n_cv,
+         pattern_descriptor, rdm_descriptor, cv_n_jobs, theta0),
+        n_method=len(methods),
+        use_correction=use_correction, streaming=streaming,
+        thinning=thinning, precision=precision, batch_size=batch_size,
+        seed=seed, n_jobs=n_jobs, executor=executor,
+        checkpoint=checkpoint, checkpoint_interval=checkpoint_interval,
+        plan=plan)
     if boot_type == 'both':
         cv_method = 'bootstrap_crossval'
         dof = min(data.n_rdm, data.n_cond) - 1
@@ -614,41 +845,23 @@ def bootstrap_crossval(models, data, method='cosine', fitter=None,
     elif boot_type == 'rdm':
         cv_method = 'bootstrap_crossval_rdm'
         dof = data.n_rdm - 1
-    eval_ok = ~np.isnan(evaluations[:, 0, 0, 0])
-    if use_correction and n_cv > 1:
-        # we essentially project from the two points for 1 repetition and
-        # for n_cv repetitions to infinitely many cv repetitions
-        evals_mean = np.mean(np.mean(evaluations[eval_ok], -1), -1)
-        evals_1 = np.mean(evaluations[eval_ok], -2)
-        noise_ceil_mean = np.mean(noise_ceil[:, eval_ok], -1)
-        noise_ceil_1 = noise_ceil[:, eval_ok]
-        var_mean = np.cov(
-            np.concatenate([evals_mean.T, noise_ceil_mean]))
-        var_1 = []
-        for i in range(n_cv):
-            var_1.append(np.cov(np.concatenate([
-                evals_1[:, :, i].T, noise_ceil_1[:, :, i]])))
-        var_1 = np.mean(np.array(var_1), axis=0)
-        # this is the main formula for the correction:
-        variances = (n_cv * var_mean - var_1) / (n_cv - 1)
-    else:
-        if use_correction:
-            raise Warning('correction requested, but only one cv run'
-                          + ' per sample requested. This is invalid!'
-                          + ' We do not use the correction for now.')
-        evals_nonan = np.mean(np.mean(evaluations[eval_ok], -1), -1)
-        noise_ceil_nonan = np.mean(noise_ceil[:, eval_ok], -1)
-        variances = np.cov(np.concatenate([evals_nonan.T, noise_ceil_nonan]))
-    result = Result(models, evaluations, method=method,
-                    cv_method=cv_method, noise_ceiling=noise_ceil,
-                    variances=variances, dof=dof)
-    return result
+    return _method_results(method, [
+        Result(models, evaluations, method=method_i,
+               cv_method=cv_method, noise_ceiling=noise_ceil,
+               variances=variances, dof=dof,
+               n_samples=n_samples, precision=achieved)
+        for method_i, (evaluations, noise_ceil, variances)
+        in zip(methods, results)])
 
 
 def bootstrap_cv_random(models, data, method='cosine', fitter=None,
                         n_pattern=None, n_rdm=None, N=1000, n_cv=2,
                         pattern_descriptor='index', rdm_descriptor='index',
-                        random=True, boot_type='both', use_correction=True):
+                        random=True, boot_type='both', use_correction=True,
+                        seed=None, n_jobs=1, executor=None, cv_n_jobs=1,
+                        precision=None, batch_size=100, streaming=False,
+                        thinning=None, checkpoint=None,
+                        checkpoint_interval=100, plan=None):
     """evaluates a set of models by a evaluating a few random crossvalidation
     folds per bootstrap.
 
@@ -667,7 +880,9 @@ def bootstrap_cv_random(models, data, method='cosine', fitter=None,
     Args:
         models(pyrsa.model.Model): models to be evaluated
         data(pyrsa.rdm.RDMs): RDM data to use
-        method(string): comparison method to use
+        method(string or list): comparison method or list of methods.
+            For a list, one Result per method is returned, which are
+            computed on the same samples
         fitter(function): fitting method for models
         k_pattern(int): #folds over patterns
         k_rdm(int): #folds over rdms
@@ -680,11 +895,38 @@ def bootstrap_cv_random(models, data, method='cosine', fitter=None,
             alternatives: 'rdm', 'pattern'
         use_correction(bool): switch for the correction for the
             variance caused by crossvalidation (default: True)
+        seed(int or numpy.random.SeedSequence): seed for the random
+            draws. results are identical for the same seed irrespective
+            of n_jobs. defaults to a seed drawn from numpy.random
+        n_jobs(int): number of parallel jobs to split the samples into
+        executor(concurrent.futures.Executor): executor to run the jobs
+            instead of the default joblib process pool
+        cv_n_jobs(int): number of parallel jobs for fitting and evaluating
+            the models on the folds of each crossvalidation, see crossval,
+            and for fitting them on the full data to start these fits
+        precision(float): target relative Monte Carlo error of the
+            variance estimates. If given, samples are drawn in batches
+            until this precision or N samples are reached
+        batch_size(int): number of samples per batch for precision
+        streaming(bool): accumulate the moments needed for the variances
+            batch by batch instead of keeping all evaluations. The result
+            then holds only the mean evaluations and noise ceilings as a
+            single sample, or the thinned sample if thinning is set
+        thinning(int): for streaming, keep every thinning-th sample
+        checkpoint(str): path of an hdf5 file to save the completed
+            samples to. If the file exists, the run is resumed from it
+            and yields the same result as an uninterrupted run
+        checkpoint_interval(int): number of samples between checkpoints
+        plan(pyrsa.inference.ResamplingPlan): precomputed samples to
+            evaluate on, which replace N and seed
 
     Returns:
         numpy.ndarray: matrix of evaluations (N x k)
 
     """
+    if plan is not None:
+        plan.check(data, pattern_descriptor, rdm_descriptor, n_cv)
+        N = plan.n_samples
     if n_pattern is None:
         n_pattern_all = len(np.unique(data.pattern_descriptors[
             pattern_descriptor]))
@@ -697,60 +939,21 @@ def bootstrap_cv_random(models, data, method='cosine', fitter=None,
         n_rdm = int(np.floor(n_rdm_all / k_rdm))
     if isinstance(models, Model):
         models = [models]
-    evaluations = np.zeros((N, len(models), n_cv))
-    noise_ceil = np.zeros((2, N, n_cv))
-    for i_sample in tqdm.trange(N):
-        if boot_type == 'both':
-            sample, rdm_idx, pattern_idx = bootstrap_sample(
-                data,
-                rdm_descriptor=rdm_descriptor,
-                pattern_descriptor=pattern_descriptor)
-        elif boot_type == 'pattern':
-            sample, pattern_idx = bootstrap_sample_pattern(
-                data,
-                pattern_descriptor=pattern_descriptor)
-            rdm_idx = np.unique(data.rdm_descriptors[rdm_descriptor])
-        elif boot_type == 'rdm':
-            sample, rdm_idx = bootstrap_sample_rdm(
-                data,
-                rdm_descriptor=rdm_descriptor)
-            pattern_idx = np.unique(
-                data.pattern_descriptors[pattern_descriptor])
-        else:
-            raise ValueError('boot_type not understood')
-        if len(np.unique(rdm_idx)) > n_rdm \
-           and len(np.unique(pattern_idx)) >= 3 + n_pattern:
-            train_set, test_set, ceil_set = sets_random(
-                sample,
-                pattern_descriptor=pattern_descriptor,
-                rdm_descriptor=rdm_descriptor,
-                n_pattern=n_pattern, n_rdm=n_rdm, n_cv=n_cv)
-            if n_rdm > 0 or n_pattern > 0:
-                nc = cv_noise_ceiling(
-                    sample, ceil_set, test_set,
-                    method=method,
-                    pattern_descriptor=pattern_descriptor)
-            else:
-                nc = boot_noise_ceiling(
-                    sample,
-                    method=method,
-                    rdm_descriptor=rdm_descriptor)
-            noise_ceil[:, i_sample] = nc
-            for idx in range(len(test_set)):
-                test_set[idx][1] = _concat_sampling(pattern_idx,
-                                                    test_set[idx][1])
-                train_set[idx][1] = _concat_sampling(pattern_idx,
-                                                     train_set[idx][1])
-            cv_result = crossval(
-                models, sample,
-                train_set, test_set,
-                method=method, fitter=fitter,
-                pattern_descriptor=pattern_descriptor,
-                calc_noise_ceil=False)
-            evaluations[i_sample, :, :] = cv_result.evaluations[0]
-        else:  # sample does not allow desired crossvalidation
-            evaluations[i_sample, :, :] = np.nan
-            noise_ceil[:, i_sample] = np.nan
+    if boot_type not in ('both', 'pattern', 'rdm'):
+        raise ValueError('boot_type not understood')
+    methods = _methods(method)
+    theta0 = _warm_start(models, data, methods[0], fitter,
+                         pattern_descriptor, cv_n_jobs)
+    results, n_samples, achieved = _run_crossval(
+        _bootstrap_cv_random_sample, N,
+        (models, data, methods, fitter, boot_type, n_pattern, n_rdm, n_cv,
+         pattern_descriptor, rdm_descriptor, cv_n_jobs, theta0),
+        n_method=len(methods),
+        use_correction=use_correction, streaming=streaming,
+        thinning=thinning, precision=precision, batch_size=batch_size,
+        seed=seed, n_jobs=n_jobs, executor=executor,
+        checkpoint=checkpoint, checkpoint_interval=checkpoint_interval,
+        plan=plan)
     if boot_type == 'both':
         cv_method = 'bootstrap_crossval'
         dof = min(data.n_rdm, data.n_cond) - 1
@@ -760,75 +963,608 @@ def bootstrap_cv_random(models, data, method='cosine', fitter=None,
     elif boot_type == 'rdm':
         cv_method = 'bootstrap_crossval_rdm'
         dof = data.n_rdm - 1
-    eval_ok = ~np.isnan(evaluations[:, 0, 0])
-    if use_correction and n_cv > 1:
-        # we essentially project from the two points for 1 repetition and
-        # for n_cv repetitions to infinitely many cv repetitions
-        evals_mean = np.mean(evaluations[eval_ok], -1)
-        evals_1 = evaluations[eval_ok]
-        noise_ceil_mean = np.mean(noise_ceil[:, eval_ok], -1)
-        noise_ceil_1 = noise_ceil[:, eval_ok]
-        var_mean = np.cov(
-            np.concatenate([evals_mean.T, noise_ceil_mean]))
-        var_1 = []
-        for i in range(n_cv):
-            var_1.append(np.cov(np.concatenate([
-                evals_1[:, :, i].T, noise_ceil_1[:, :, i]])))
-        var_1 = np.mean(np.array(var_1), axis=0)
-        # this is the main formula for the correction:
-        variances = (n_cv * var_mean - var_1) / (n_cv - 1)
+    return _method_results(method, [
+        Result(models, evaluations, method=method_i,
+               cv_method=cv_method, noise_ceiling=noise_ceil,
+               variances=variances, dof=dof,
+               n_samples=n_samples, precision=achieved)
+        for method_i, (evaluations, noise_ceil, variances)
+        in zip(methods, results)])
+
+
+def _run_crossval(sample_fun, N, args, n_method=1, use_correction=True,
+                  streaming=False, thinning=None, precision=None,
+                  batch_size=100, seed=None, n_jobs=1, executor=None,
+                  checkpoint=None, checkpoint_interval=100, plan=None):
+    """ runs bootstrapped crossvalidation samples and estimates the
+    covariance of the model evaluations and noise ceilings. With several cv
+    runs per sample the variance caused by the crossvalidation is corrected
+    for.
+
+    Args:
+        sample_fun(function): function computing one sample, returning the
+            evaluations and noise ceilings
+        N(int): maximal number of samples
+        args(tuple): further arguments to sample_fun, starting with the
+            models, whose predictions are cached during the run
+        n_method(int): number of comparison methods, whose evaluations
+            and noise ceilings the samples concatenate
+        use_correction(bool): whether to apply the correction
+        streaming(bool): accumulate the moments batch by batch instead of
+            keeping all evaluations
+        thinning(int): for streaming, keep every thinning-th sample
+        other arguments as for run_adaptive
+
+    Returns:
+        list: for each method a tuple of
+            evaluations,
+            noise ceilings (2 x samples x ...) and the
+            covariance matrix of models and noise ceilings,
+            stacked over the variants for dual bootstrap evaluations
+        int: number of samples run
+        float: achieved precision of the variances
+
+    """
+    if streaming:
+        if checkpoint is not None:
+            raise ValueError('checkpoints cannot be combined with streaming')
+        streams = [_CrossvalStream(thinning) for _ in range(n_method)]
+
+        def stream(outputs):
+            for method_stream, method_outputs in zip(
+                    streams, _split_methods(outputs, n_method)):
+                method_stream(method_outputs)
+        with prediction_cache(args[0]):
+            _, achieved = run_adaptive(
+                sample_fun, N, args, precision=precision,
+                batch_size=batch_size, seed=seed, n_jobs=n_jobs,
+                executor=executor, stream=stream, plan=plan)
+        outputs = [method_stream.samples() for method_stream in streams]
+        moments = [method_stream.moments for method_stream in streams]
+        n_samples = streams[0].n_samples
+    else:
+        with prediction_cache(args[0]):
+            outputs, achieved = run_adaptive(
+                sample_fun, N, args, precision=precision,
+                batch_size=batch_size, seed=seed, n_jobs=n_jobs,
+                executor=executor, checkpoint=checkpoint,
+                checkpoint_interval=checkpoint_interval, plan=plan)
+        n_samples = outputs[0].shape[0]
+        outputs = _split_methods(outputs, n_method)
+        moments = []
+        for evaluations, noise_ceil in outputs:
+            moments.append(SampleMoments())
+            moments[-1].update(_cv_features(evaluations, noise_ceil))
+    results = []
+    for (evaluations, noise_ceil), method_moments in zip(outputs, moments):
+        variances = _feature_variances(method_moments, evaluations,
+                                       use_correction)
+        results.append((evaluations, np.moveaxis(noise_ceil, 0, 1),
+                        variances))
+    return results, n_samples, achieved
+
+
+def _split_methods(outputs, n_method):
+    """ splits the evaluations and noise ceilings of samples, which
+    concatenate several methods along the model axis, into one pair per
+    method
+    """
+    evaluations, noise_ceil = outputs
+    n_model = evaluations.shape[1] // n_method
+    return [[evaluations[:, i * n_model:(i + 1) * n_model],
+             noise_ceil[:, 2 * i:2 * i + 2]]
+            for i in range(n_method)]
+
+
+def _methods(method):
+    """ the list of comparison methods for a method or list of methods """
+    if isinstance(method, str):
+        return [method]
+    return list(method)
+
+
+def _method_results(method, results):
+    """ a single Result if method is a single method, else the list of
+    Results per method
+    """
+    if isinstance(method, str):
+        return results[0]
+    return results
+
+
+def _fixed_variances(evaluations, noise_ceil, data, method, rdm_descriptor,
+                     boot_noise_ceil):
+    """ noise ceiling and covariance of the models and bootstrapped noise
+    ceilings for the evaluations of fixed models
+
+    Returns:
+        noise ceiling, covariance matrix
+
+    """
+    eval_ok = np.isfinite(evaluations[:, 0])
+    if boot_noise_ceil:
+        noise_ceil = noise_ceil.T
+        variances = np.cov(np.concatenate([evaluations[eval_ok, :].T,
+                                           noise_ceil[:, eval_ok]]))
+    else:
+        noise_ceil = np.array(boot_noise_ceiling(
+            data, method=method, rdm_descriptor=rdm_descriptor))
+        variances = np.cov(evaluations[eval_ok, :].T)
+    return noise_ceil, variances
+
+
+def _method_independent(fitter):
+    """ whether a fitter yields the same parameters for all methods """
+    return fitter is fit_mock
+
+
+def _cv_features(evaluations, noise_ceil):
+    """ per sample vectors of the fold averaged evaluations and noise
+    ceilings for the mean over the cv runs followed by each single cv run.
+    The covariance of these vectors contains all terms of the
+    crossvalidation correction, such that it can be accumulated online.
+
+    Args:
+        evaluations(numpy.ndarray): evaluations (N x n_models x k x n_cv
+            [x 3]). The fold axis may be missing
+        noise_ceil(numpy.ndarray): noise ceilings (N x 2 x n_cv [x 3])
+
+    Returns:
+        numpy.ndarray: N x (n_models + 2) * (n_cv + 1) [* 3]
+
+    """
+    if evaluations.ndim == noise_ceil.ndim:
+        evaluations = evaluations[:, :, None]
+    if evaluations.ndim == 5:
+        return np.concatenate([
+            _cv_features(evaluations[..., i], noise_ceil[..., i])
+            for i in range(evaluations.shape[-1])], axis=1)
+    values = np.concatenate([np.mean(evaluations, 2), noise_ceil], axis=1)
+    return np.concatenate(
+        [np.mean(values, -1)]
+        + [values[..., i] for i in range(values.shape[-1])], axis=1)
+
+
+def _feature_variances(moments, evaluations, use_correction=True):
+    """ covariance of models and noise ceilings from the accumulated
+    moments of _cv_features
+
+    Args:
+        moments(SampleMoments): moments of the per sample vectors
+        evaluations(numpy.ndarray): evaluations or a sample of them to
+            take the shape from
+        use_correction(bool): whether to apply the correction
+
+    Returns:
+        numpy.ndarray: covariance matrix of models and noise ceilings
+
+    """
+    n_value = evaluations.shape[1] + 2
+    if evaluations.ndim == 5:
+        n_cv = evaluations.shape[-2]
     else:
+        n_cv = evaluations.shape[-1]
+    if use_correction and n_cv == 1:
+        raise Warning('correction requested, but only one cv run'
+                      + ' per sample requested. This is invalid!'
+                      + ' We do not use the correction for now.')
+    covariance = moments.covariance()
+    block = n_value * (n_cv + 1)
+    variances = []
+    for start in range(0, covariance.shape[0], block):
+        cov = covariance[start:start + block, start:start + block]
+        var_mean = cov[:n_value, :n_value]
         if use_correction:
-            raise Warning('correction requested, but only one cv run'
-                          + ' per sample requested. This is invalid!'
-                          + ' We do not use the correction for now.')
-        evals_nonan = np.mean(np.mean(evaluations[eval_ok], -1), -1)
-        noise_ceil_nonan = np.mean(noise_ceil[:, eval_ok], -1)
-        variances = np.cov(np.concatenate([evals_nonan.T, noise_ceil_nonan]))
-    result = Result(models, evaluations, method=method,
-                    cv_method=cv_method, noise_ceiling=noise_ceil,
-                    variances=variances, dof=dof)
-    return result
+            # we essentially project from the two points for 1 repetition
+            # and for n_cv repetitions to infinitely many cv repetitions
+            var_1 = np.mean([
+                cov[i * n_value:(i + 1) * n_value,
+                    i * n_value:(i + 1) * n_value]
+                for i in range(1, n_cv + 1)], axis=0)
+            # this is the main formula for the correction:
+            var_mean = (n_cv * var_mean - var_1) / (n_cv - 1)
+        variances.append(var_mean)
+    if evaluations.ndim == 5:
+        return np.array(variances)
+    return variances[0]
+
+
+class _CrossvalStream:
+    """ collects the summaries of bootstrapped crossvalidations batch by
+    batch, such that the evaluations need not be kept for all samples.
+
+    Args:
+        thinning(int): keep every thinning-th sample. None keeps only the
+            mean over the samples
+
+    """
+
+    def __init__(self, thinning=None):
+        self.thinning = thinning
+        self.moments = SampleMoments()
+        self.n_samples = 0
+        self.n_valid = 0
+        self.sums = None
+        self.kept = []
+
+    def __call__(self, outputs):
+        evaluations, noise_ceil = outputs
+        n = evaluations.shape[0]
+        self.moments.update(_cv_features(evaluations, noise_ceil))
+        valid = ~np.isnan(evaluations.reshape(n, -1)[:, 0])
+        sums = [np.sum(evaluations[valid], 0), np.sum(noise_ceil[valid], 0)]
+        if self.sums is None:
+            self.sums = sums
+        else:
+            self.sums = [old + new for old, new in zip(self.sums, sums)]
+        self.n_valid += np.sum(valid)
+        if self.thinning:
+            keep = (self.n_samples + np.arange(n)) % self.thinning == 0
+            self.kept.append([evaluations[keep], noise_ceil[keep]])
+        self.n_samples += n
+
+    def samples(self):
+        """ the kept samples or a single sample holding the means
+
+        Returns:
+            numpy.ndarray: evaluations
+            numpy.ndarray: noise ceilings with samples first
+
+        """
+        if self.thinning:
+            return [np.concatenate(kept) for kept in zip(*self.kept)]
+        return [total[None] / self.n_valid for total in self.sums]
+
+
+def _default_boot_k(data, k_pattern, k_rdm, pattern_descriptor,
+                    rdm_descriptor):
+    """ default numbers of crossvalidation folds for a bootstrap sample,
+    which contains about 1 - 1/e of the unique groups
+    """
+    if k_pattern is None:
+        n_pattern = len(np.unique(data.pattern_descriptors[
+            pattern_descriptor]))
+        k_pattern = default_k_pattern((1 - 1 / np.exp(1)) * n_pattern)
+    if k_rdm is None:
+        n_rdm = len(np.unique(data.rdm_descriptors[
+            rdm_descriptor]))
+        k_rdm = default_k_rdm((1 - 1 / np.exp(1)) * n_rdm)
+    return k_pattern, k_rdm
+
+
+def _predict_vectors(models, theta):
+    """ computes the predicted rdm vectors of all models once, such that
+    bootstrap samples only need to index into them
+    """
+    return [model.predict_vectors(theta=theta[j])
+            for j, model in enumerate(models)]
 
 
 def _concat_sampling(sample1, sample2):
     """ computes an index vector for the sequential sampling with sample1
-    and sample2
+    and sample2, i.e. each entry of sample2 repeated as often as it occurs
+    in sample1
+    """
+    sample1 = np.asarray(sample1)
+    sample2 = np.asarray(sample2)
+    values, counts = np.unique(sample1, return_counts=True)
+    if len(values) == 0:
+        return sample2[:0]
+    pos = np.minimum(np.searchsorted(values, sample2), len(values) - 1)
+    counts = np.where(values[pos] == sample2, counts[pos], 0)
+    return np.repeat(sample2, counts)
+
+
+def _sample_sets(pattern_idx, train_set, test_set):
+    """ maps the patterns of the train and test sets of a bootstrap sample
+    to the sampled pattern indices, repeating patterns drawn repeatedly
     """
-    sample_out = [[i_samp1 for i_samp1 in sample1 if i_samp1 == i_samp2]
-                  for i_samp2 in sample2]
-    return sum(sample_out, [])
+    for train, test in zip(train_set, test_set):
+        train[1] = _concat_sampling(pattern_idx, train[1])
+        test[1] = _concat_sampling(pattern_idx, test[1])
 
 
 def _internal_cv(models, sample,
                  pattern_descriptor, rdm_descriptor, pattern_idx,
                  k_pattern, k_rdm,
-                 method, fitter):
-    """ runs a crossvalidation for use in bootstrap"""
+                 methods, fitter, rng=None, pool_cache=None, i_rep=0,
+                 n_jobs=1, theta0=None):
+    """ runs a crossvalidation for use in bootstrap
+    pool_cache may be shared between runs on the same sample.
+    For planned samples, the folds follow the order of cv run i_rep.
+    The fits start from theta0, the fits on the full data.
+
+    Returns:
+        evaluations (n_methods * n_models x n_folds),
+        noise ceilings (2 * n_methods)
+
+    """
+    rdm_order = pattern_order = None
+    if isinstance(rng, PlanSample):
+        rdm_order = rng.rdm_order[i_rep]
+        pattern_order = rng.pattern_order[i_rep]
     train_set, test_set, ceil_set = sets_k_fold(
         sample,
         pattern_descriptor=pattern_descriptor,
         rdm_descriptor=rdm_descriptor,
-        k_pattern=k_pattern, k_rdm=k_rdm, random=True)
+        k_pattern=k_pattern, k_rdm=k_rdm, random=True, rng=rng,
+        rdm_order=rdm_order, pattern_order=pattern_order)
     if k_rdm > 1 or k_pattern > 1:
-        nc = cv_noise_ceiling(
+        nc = [cv_noise_ceiling(
             sample, ceil_set, test_set,
             method=method,
-            pattern_descriptor=pattern_descriptor)
+            pattern_descriptor=pattern_descriptor,
+            pool_cache=pool_cache) for method in methods]
     else:
-        nc = boot_noise_ceiling(
+        nc = [boot_noise_ceiling(
             sample,
             method=method,
-            rdm_descriptor=rdm_descriptor)
-    for idx in range(len(test_set)):
-        test_set[idx][1] = _concat_sampling(pattern_idx,
-                                            test_set[idx][1])
-        train_set[idx][1] = _concat_sampling(pattern_idx,
-                                             train_set[idx][1])
-    cv_result = crossval(
+            rdm_descriptor=rdm_descriptor) for method in methods]
+    _sample_sets(pattern_idx, train_set, test_set)
+    cv_results = crossval(
         models, sample,
         train_set, test_set,
-        method=method, fitter=fitter,
+        method=methods, fitter=fitter,
         pattern_descriptor=pattern_descriptor,
-        calc_noise_ceil=False)
-    return cv_result.evaluations, nc
+        calc_noise_ceil=False, n_jobs=n_jobs, theta0=theta0)
+    return (np.concatenate([cv_result.evaluations[0]
+                            for cv_result in cv_results]),
+            np.concatenate(nc))
+
+
+def _draw_sample(data, boot_type, pattern_descriptor, rdm_descriptor, rng):
+    """ draws one bootstrap sample along the dimensions given by boot_type
+
+    Returns:
+        sample, rdm_idx, pattern_idx with all groups of the dimensions,
+        which are not resampled
+
+    """
+    rdm_idx, pattern_idx = _draw_indices(
+        data, boot_type, pattern_descriptor, rdm_descriptor, rng)
+    sample = data
+    if boot_type != 'pattern':
+        sample = sample.subsample(rdm_descriptor, rdm_idx)
+    if boot_type != 'rdm':
+        sample = sample.subsample_pattern(pattern_descriptor, pattern_idx)
+    return sample, rdm_idx, pattern_idx
+
+
+def _draw_indices(data, boot_type, pattern_descriptor, rdm_descriptor, rng):
+    """ draws the rdm and pattern groups of one bootstrap sample along the
+    dimensions given by boot_type, or takes them from a planned sample
+    """
+    if boot_type not in ('both', 'pattern', 'rdm'):
+        raise ValueError('boot_type not understood')
+    rdm_idx = np.unique(data.rdm_descriptors[rdm_descriptor])
+    pattern_idx = np.unique(data.pattern_descriptors[pattern_descriptor])
+    if boot_type != 'pattern':
+        if isinstance(rng, PlanSample):
+            rdm_idx = rng.rdm_idx
+        else:
+            rdm_idx = _draw_index(rdm_idx, rng)
+    if boot_type != 'rdm':
+        if isinstance(rng, PlanSample):
+            pattern_idx = rng.pattern_idx
+        else:
+            pattern_idx = _draw_index(pattern_idx, rng)
+    return rdm_idx, pattern_idx
+
+
+def _eval_bootstrap_sample(rng, predictions, data, methods, boot_type,
+                           pattern_descriptor, rdm_descriptor,
+                           boot_noise_ceil):
+    """ evaluates fixed predictions on one bootstrap sample, concatenating
+    the evaluations and noise ceilings of the methods
+    """
+    evaluations = np.full(len(methods) * len(predictions), np.nan)
+    noise_ceil = np.full(2 * len(methods), np.nan)
+    sample, _, pattern_idx = _draw_sample(
+        data, boot_type, pattern_descriptor, rdm_descriptor, rng)
+    if boot_type != 'rdm':
+        if len(np.unique(pattern_idx)) < 3:
+            return evaluations, noise_ceil
+        index, self_pair = pattern_sample_index(
+            data, pattern_descriptor, pattern_idx)
+        predictions = [_take_subsample(pred, index, self_pair)
+                       for pred in predictions]
+    for i_method, method in enumerate(methods):
+        for j, pred in enumerate(predictions):
+            evaluations[i_method * len(predictions) + j] = np.mean(
+                compare(pred, sample, method))
+        if boot_noise_ceil:
+            noise_ceil[2 * i_method:2 * i_method + 2] = boot_noise_ceiling(
+                sample, method=method, rdm_descriptor=rdm_descriptor)
+    return evaluations, noise_ceil
+
+
+def _eval_weights_sample(rng, predictions, data, methods, boot_type,
+                         pattern_descriptor, rdm_descriptor,
+                         boot_noise_ceil):
+    """ evaluates fixed predictions on one bootstrap sample like
+    _eval_bootstrap_sample, but weights the drawn rdms by their number of
+    copies instead of copying them. Requires _weights_valid.
+    """
+    evaluations = np.full(len(methods) * len(predictions), np.nan)
+    noise_ceil = np.full(2 * len(methods), np.nan)
+    rdm_select = np.unique(data.rdm_descriptors[rdm_descriptor])
+    groups = _rdm_groups(data, rdm_descriptor)
+    rdm_idx, pattern_idx = _draw_indices(
+        data, boot_type, pattern_descriptor, rdm_descriptor, rng)
+    if len(np.unique(pattern_idx)) < 3:
+        return evaluations, noise_ceil
+    index, self_pair = pattern_sample_index(
+        data, pattern_descriptor, pattern_idx)
+    index = index[~self_pair]
+    weights = np.bincount(np.searchsorted(rdm_select, rdm_idx),
+                          minlength=len(rdm_select))[groups]
+    drawn = weights > 0
+    evaluations, noise_ceil = _eval_weights(
+        [pred[:, index] for pred in predictions],
+        data.get_vectors()[drawn][:, index], weights[None, drawn],
+        groups[drawn], methods, boot_noise_ceil)
+    return evaluations[0], noise_ceil[0]
+
+
+def _eval_weights(predictions, vectors, weights, groups, methods,
+                  boot_noise_ceil):
+    """ evaluates fixed predictions on bootstrap samples, which are given
+    as weights of the rdms. For cosine and corr the mean evaluation on a
+    sample is the weighted mean of the evaluations on the single rdms.
+
+    Returns:
+        evaluations (N x n_methods * n_models),
+        noise ceilings (N x 2 * n_methods)
+
+    """
+    evaluations = []
+    noise_ceil = []
+    for method in methods:
+        evals = np.concatenate([compare(pred, vectors, method)
+                                for pred in predictions])
+        evaluations.append((weights @ evals.T)
+                           / np.sum(weights, axis=1, keepdims=True))
+        if boot_noise_ceil:
+            noise_ceil.append(_boot_noise_ceiling_weights(
+                vectors, weights, groups, method))
+        else:
+            noise_ceil.append(np.full((weights.shape[0], 2), np.nan))
+    return (np.concatenate(evaluations, axis=1),
+            np.concatenate(noise_ceil, axis=1))
+
+
+def _weights_valid(predictions, data, methods):
+    """ whether bootstrap samples may be evaluated as weights of the rdms,
+    i.e. the comparisons are linear in the normalized rdms and no entries
+    are missing, which would change between samples
+    """
+    return all(method in ('cosine', 'corr') for method in methods) \
+        and np.all(np.isfinite(data.get_vectors())) \
+        and all(np.all(np.isfinite(pred)) for pred in predictions)
+
+
+def _rdm_weights(data, rdm_descriptor, N, seed):
+    """ number of times each rdm group is drawn in each of N samples,
+    drawn from the same per-sample seeds as the samples of run_adaptive
+    """
+    n_rdm = len(np.unique(data.rdm_descriptors[rdm_descriptor]))
+    draws = np.array([sample_rng(sample_seed).randint(0, n_rdm, size=n_rdm)
+                      for sample_seed in sample_seeds(N, seed)])
+    return _draw_counts(draws.reshape(N, n_rdm), n_rdm)
+
+
+def _rdm_groups(data, rdm_descriptor):
+    """ group number of each rdm for rdm_descriptor """
+    return np.unique(data.rdm_descriptors[rdm_descriptor],
+                     return_inverse=True)[1]
+
+
+def _bootstrap_crossval_sample(rng, models, data, methods, fitter,
+                               boot_type, k_pattern, k_rdm, n_cv,
+                               pattern_descriptor, rdm_descriptor,
+                               cv_n_jobs=1, theta0=None):
+    """ runs n_cv crossvalidations on one bootstrap sample, concatenating
+    the evaluations and noise ceilings of the methods
+    """
+    evaluations = np.full((len(methods) * len(models), k_pattern * k_rdm,
+                           n_cv), np.nan)
+    noise_ceil = np.full((2 * len(methods), n_cv), np.nan)
+    sample, rdm_idx, pattern_idx = _draw_sample(
+        data, boot_type, pattern_descriptor, rdm_descriptor, rng)
+    if len(np.unique(rdm_idx)) >= k_rdm \
+       and len(np.unique(pattern_idx)) >= 3 * k_pattern:
+        pool_cache = {}
+        for i_rep in range(n_cv):
+            evals, cv_nc = _internal_cv(
+                models, sample,
+                pattern_descriptor, rdm_descriptor, pattern_idx,
+                k_pattern, k_rdm,
+                methods, fitter, rng, pool_cache, i_rep, cv_n_jobs,
+                theta0)
+            noise_ceil[:, i_rep] = cv_nc
+            evaluations[:, :, i_rep] = evals
+    return evaluations, noise_ceil
+
+
+def _bootstrap_cv_random_sample(rng, models, data, methods, fitter,
+                                boot_type, n_pattern, n_rdm, n_cv,
+                                pattern_descriptor, rdm_descriptor,
+                                cv_n_jobs=1, theta0=None):
+    """ evaluates n_cv random crossvalidation folds on one bootstrap sample,
+    concatenating the evaluations and noise ceilings of the methods
+    """
+    evaluations = np.full((len(methods) * len(models), n_cv), np.nan)
+    noise_ceil = np.full((2 * len(methods), n_cv), np.nan)
+    sample, rdm_idx, pattern_idx = _draw_sample(
+        data, boot_type, pattern_descriptor, rdm_descriptor, rng)
+    if len(np.unique(rdm_idx)) > n_rdm \
+       and len(np.unique(pattern_idx)) >= 3 + n_pattern:
+        rdm_order = pattern_order = None
+        if isinstance(rng, PlanSample):
+            rdm_order = rng.rdm_order
+            pattern_order = rng.pattern_order
+        train_set, test_set, ceil_set = sets_random(
+            sample,
+            pattern_descriptor=pattern_descriptor,
+            rdm_descriptor=rdm_descriptor,
+            n_pattern=n_pattern, n_rdm=n_rdm, n_cv=n_cv, rng=rng,
+            rdm_order=rdm_order, pattern_order=pattern_order)
+        for i_method, method in enumerate(methods):
+            if n_rdm > 0 or n_pattern > 0:
+                nc = cv_noise_ceiling(
+                    sample, ceil_set, test_set,
+                    method=method,
+                    pattern_descriptor=pattern_descriptor)
+            else:
+                nc = boot_noise_ceiling(
+                    sample,
+                    method=method,
+                    rdm_descriptor=rdm_descriptor)
+            noise_ceil[2 * i_method:2 * i_method + 2] = np.reshape(
+                nc, (2, -1))
+        _sample_sets(pattern_idx, train_set, test_set)
+        cv_results = crossval(
+            models, sample,
+            train_set, test_set,
+            method=methods, fitter=fitter,
+            pattern_descriptor=pattern_descriptor,
+            calc_noise_ceil=False, n_jobs=cv_n_jobs, theta0=theta0)
+        evaluations[:, :] = np.concatenate(
+            [cv_result.evaluations[0] for cv_result in cv_results])
+    return evaluations, noise_ceil
+
+
+def _dual_bootstrap_sample(rng, models, data, methods, fitter,
+                           k_pattern, k_rdm, n_cv,
+                           pattern_descriptor, rdm_descriptor,
+                           cv_n_jobs=1, theta0=None):
+    """ runs the crossvalidations for the bootstrap over both, over rdms
+    and over patterns for one shared bootstrap sample
+    """
+    evaluations = np.full((len(methods) * len(models), k_pattern * k_rdm,
+                           n_cv, 3), np.nan)
+    noise_ceil = np.full((2 * len(methods), n_cv, 3), np.nan)
+    sample, rdm_idx, pattern_idx = _draw_sample(
+        data, 'both', pattern_descriptor, rdm_descriptor, rng)
+    if len(np.unique(rdm_idx)) < k_rdm \
+       or len(np.unique(pattern_idx)) < 3 * k_pattern:
+        return evaluations, noise_ceil
+    sample_rdm = data.subsample(rdm_descriptor, rdm_idx)
+    sample_pattern = data.subsample_pattern(
+        pattern_descriptor, pattern_idx)
+    all_patterns = np.unique(data.pattern_descriptors[pattern_descriptor])
+    variants = [(sample, pattern_idx),
+                (sample_rdm, all_patterns),
+                (sample_pattern, pattern_idx)]
+    pool_cache = {}
+    for i_rep in range(n_cv):
+        for i_variant, (rdms, idx) in enumerate(variants):
+            evals, cv_nc = _internal_cv(
+                models, rdms,
+                pattern_descriptor, rdm_descriptor, idx,
+                k_pattern, k_rdm,
+                methods, fitter, rng, pool_cache, i_rep, cv_n_jobs,
+                theta0)
+            noise_ceil[:, i_rep, i_variant] = cv_nc
+            evaluations[:, :, i_rep, i_variant] = evals
+    return evaluations, noise_ceil
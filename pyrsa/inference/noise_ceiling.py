@@ -5,13 +5,14 @@ calculation of noise ceilings
 """
 
 import numpy as np
-from pyrsa.util.inference_util import pool_rdm
+from pyrsa.util.inference_util import pool_rdm, _cached_pool
+from pyrsa.util.inference_util import _pool_normalize, _pool_finish
+from pyrsa.util.inference_util import _nan_mean
 from pyrsa.rdm import compare
-from .crossvalsets import sets_leave_one_out_rdm
 
 
 def cv_noise_ceiling(rdms, ceil_set, test_set, method='cosine',
-                     pattern_descriptor='index'):
+                     pattern_descriptor='index', pool_cache=None):
     """ calculates the noise ceiling for crossvalidation.
     The upper bound is calculated by pooling all rdms for the appropriate
     patterns in the testsets.
@@ -26,6 +27,8 @@ def cv_noise_ceiling(rdms, ceil_set, test_set, method='cosine',
             (RDMs, pattern_idx)
         method(string): comparison method to use
         pattern_descriptor(string): descriptor to group patterns
+        pool_cache(dict): cache for the pooled rdms, which may be shared
+            between calls on the same rdms object
 
     Returns:
         list: lower nc-bound, upper nc-bound
@@ -33,6 +36,7 @@ def cv_noise_ceiling(rdms, ceil_set, test_set, method='cosine',
     """
     assert len(ceil_set) == len(test_set), \
         'train_set and test_set must have the same length'
+    pred_full = _cached_pool(rdms, method=method, pool_cache=pool_cache)
     noise_min = []
     noise_max = []
     for i in range(len(ceil_set)):
@@ -41,8 +45,7 @@ def cv_noise_ceiling(rdms, ceil_set, test_set, method='cosine',
         pred_train = pool_rdm(train[0], method=method)
         pred_train = pred_train.subsample_pattern(by=pattern_descriptor,
                                                   value=test[1])
-        pred_test = pool_rdm(rdms, method=method)
-        pred_test = pred_test.subsample_pattern(by=pattern_descriptor,
+        pred_test = pred_full.subsample_pattern(by=pattern_descriptor,
                                                 value=test[1])
         noise_min.append(np.mean(compare(pred_train, test[0], method)))
         noise_max.append(np.mean(compare(pred_test, test[0], method)))
@@ -63,16 +66,108 @@ def boot_noise_ceiling(rdms, method='cosine', rdm_descriptor='index'):
         list: [lower nc-bound, upper nc-bound]
 
     """
-    _, test_set, ceil_set = sets_leave_one_out_rdm(rdms, rdm_descriptor)
-    pred_test = pool_rdm(rdms, method=method)
+    vectors = rdms.get_vectors()
+    _, groups = np.unique(rdms.rdm_descriptors[rdm_descriptor],
+                          return_inverse=True)
+    normalized = _pool_normalize(vectors, method)
+    pred_test = _pool_finish(_nan_mean(normalized), method)
+    pred_train = _leave_one_out_pools(normalized, groups, method)
     noise_min = []
     noise_max = []
-    for i in range(len(ceil_set)):
-        train = ceil_set[i]
-        test = test_set[i]
-        pred_train = pool_rdm(train[0], method=method)
-        noise_min.append(np.mean(compare(pred_train, test[0], method)))
-        noise_max.append(np.mean(compare(pred_test, test[0], method)))
+    for i_group in range(len(pred_train)):
+        test = vectors[groups == i_group]
+        noise_min.append(np.mean(compare(pred_train[i_group], test, method)))
+        noise_max.append(np.mean(compare(pred_test, test, method)))
     noise_min = np.mean(np.array(noise_min))
     noise_max = np.mean(np.array(noise_max))
     return noise_min, noise_max
+
+
+def _leave_one_out_pools(normalized, groups, method):
+    """ pooled rdms for leaving out each group of rdms in turn.
+
+    As pooling averages normalized rdm vectors, the pool without group g
+    is (sum - sum_g) / (n - n_g), which needs only one pass over the data.
+    If the rdms have different missing entries the pools are averaged
+    separately to keep the nan handling of pool_rdm.
+
+    Args:
+        normalized(numpy.ndarray): rdm vectors normalized by _pool_normalize
+        groups(numpy.ndarray): group number of each rdm
+        method(String): comparison method
+
+    Returns:
+        numpy.ndarray: pooled rdm vectors (n_group x 1 x n_dissimilarities)
+
+    """
+    n_group = np.max(groups) + 1
+    if n_group == 1:
+        # leave one out with only one group uses all data for training
+        pools = _nan_mean(normalized)[None]
+    elif np.all(np.isnan(normalized) == np.isnan(normalized[:1])):
+        sums = np.zeros((n_group, normalized.shape[1]))
+        np.add.at(sums, groups, normalized)
+        n_rdm = np.bincount(groups)
+        pools = (np.sum(normalized, axis=0) - sums) \
+            / (len(groups) - n_rdm)[:, None]
+        pools = pools[:, None]
+    else:
+        pools = np.array([_nan_mean(normalized[groups != i_group])
+                          for i_group in range(n_group)])
+    return np.array([_pool_finish(pool, method) for pool in pools])
+
+
+def _boot_noise_ceiling_weights(vectors, weights, groups, method='cosine'):
+    """ calculates boot_noise_ceiling for many bootstrap samples at once,
+    which are given as weights of the rdms.
+
+    For cosine and corr the pooled rdm of a sample is the weighted mean of
+    the normalized rdms. All comparisons are thus inner products between
+    normalized rdms, which are computed once as their gram matrix.
+
+    Args:
+        vectors(numpy.ndarray): rdm vectors without nan entries (n_rdm x n)
+        weights(numpy.ndarray): number of copies of each rdm per sample
+            (N x n_rdm)
+        groups(numpy.ndarray): group of each rdm for the leave one
+            group out lower bound
+        method(string): comparison method, 'cosine' or 'corr'
+
+    Returns:
+        numpy.ndarray: lower nc-bound, upper nc-bound per sample (N x 2)
+
+    """
+    if method == 'corr':
+        vectors = vectors - np.mean(vectors, axis=1, keepdims=True)
+    elif method != 'cosine':
+        raise ValueError('weighted noise ceiling requires cosine or corr')
+    vectors = vectors / np.sqrt(np.sum(vectors ** 2, axis=1, keepdims=True))
+    gram = vectors @ vectors.T
+    member = (groups[:, None] == np.unique(groups)[None]).astype(float)
+    gram_group = gram * (member @ member.T)
+    counts = weights @ member
+    present = counts > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # upper bound: pooled rdm of all rdms in the sample
+        pred = weights @ gram
+        norm = np.sum(pred * weights, axis=1, keepdims=True)
+        noise_max = _group_mean((weights * pred) @ member / np.sqrt(norm),
+                                counts, present)
+        # lower bound: pooled rdm of all rdms outside the test group
+        pred_group = weights @ gram_group
+        norm_out = norm - 2 * (weights * pred) @ member \
+            + (weights * pred_group) @ member
+        noise_min = _group_mean(
+            (weights * (pred - pred_group)) @ member / np.sqrt(norm_out),
+            counts, present)
+    # with a single group the full data is used for training
+    noise_min = np.where(np.sum(present, axis=1) > 1, noise_min, noise_max)
+    return np.stack((noise_min, noise_max), axis=1)
+
+
+def _group_mean(sums, counts, present):
+    """ averages per group sums over rdms first within each present group
+    and then across the present groups of each sample
+    """
+    means = np.divide(sums, counts, out=np.zeros_like(sums), where=present)
+    return np.sum(means, axis=1) / np.sum(present, axis=1)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+precomputed resampling plans
+
+A ResamplingPlan fixes the bootstrap draws and the crossvalidation fold
+orders for all samples in advance. Passing the same plan to several
+evaluation functions evaluates them on identical samples.
+"""
+
+import numpy as np
+from pyrsa.util.file_io import write_dict_hdf5
+from pyrsa.util.file_io import write_dict_pkl
+from pyrsa.util.file_io import read_dict_hdf5
+from pyrsa.util.file_io import read_dict_pkl
+from pyrsa.util.file_io import remove_file
+from .resampling import base_seed, sample_rng
+from .bootstrap import _draw_counts
+
+
+class ResamplingPlan:
+    """ Resampling plan storing the bootstrap samples over rdms and
+    patterns and the order in which the sampled groups are assigned to
+    crossvalidation folds
+
+    The bootstrap draws are stored as indices into the unique groups of the
+    descriptors. For the folds, each sample and cv run stores a random
+    order of all groups. The groups present in a sample are assigned to
+    folds in this order, such that the plan works for any number of folds
+    and for bootstraps over rdms or patterns only.
+
+    Args:
+        data(pyrsa.rdm.RDMs): the data to plan the resampling for
+        N(int): number of bootstrap samples
+        n_cv(int): number of crossvalidation runs per sample
+        pattern_descriptor(String): descriptor to group patterns
+        rdm_descriptor(String): descriptor to group rdms
+        seed(int or numpy.random.SeedSequence): seed for the random draws
+
+    Attributes:
+        n_samples(int): number of bootstrap samples
+        n_cv(int): number of crossvalidation runs per sample
+        rdm_select(numpy.ndarray): unique rdm groups
+        pattern_select(numpy.ndarray): unique pattern groups
+        rdm_draws(numpy.ndarray): drawn rdm groups (N x n_rdm_groups)
+        pattern_draws(numpy.ndarray): drawn pattern groups
+            (N x n_pattern_groups)
+        rdm_order(numpy.ndarray): fold order of the rdm groups
+            (N x n_cv x n_rdm_groups)
+        pattern_order(numpy.ndarray): fold order of the pattern groups
+            (N x n_cv x n_pattern_groups)
+
+    """
+
+    def __init__(self, data=None, N=1000, n_cv=2, pattern_descriptor='index',
+                 rdm_descriptor='index', seed=None):
+        self.pattern_descriptor = pattern_descriptor
+        self.rdm_descriptor = rdm_descriptor
+        self.n_samples = N
+        self.n_cv = n_cv
+        if data is None:
+            return
+        self.rdm_select = np.unique(data.rdm_descriptors[rdm_descriptor])
+        self.pattern_select = np.unique(
+            data.pattern_descriptors[pattern_descriptor])
+        n_rdm = len(self.rdm_select)
+        n_pattern = len(self.pattern_select)
+        rng = sample_rng(base_seed(seed))
+        self.rdm_draws = rng.randint(0, n_rdm, size=(N, n_rdm))
+        self.pattern_draws = rng.randint(0, n_pattern, size=(N, n_pattern))
+        self.rdm_order = np.argsort(rng.rand(N, n_cv, n_rdm), axis=-1)
+        self.pattern_order = np.argsort(rng.rand(N, n_cv, n_pattern),
+                                        axis=-1)
+
+    def sample(self, i_sample):
+        """ the draws for one sample
+
+        Args:
+            i_sample(int): number of the sample
+
+        Returns:
+            PlanSample: the draws of the sample
+
+        """
+        return PlanSample(
+            self.rdm_select[self.rdm_draws[i_sample]],
+            self.pattern_select[self.pattern_draws[i_sample]],
+            self.rdm_select[self.rdm_order[i_sample]],
+            self.pattern_select[self.pattern_order[i_sample]])
+
+    def rdm_weights(self):
+        """ number of times each rdm group was drawn in each sample
+
+        Returns:
+            numpy.ndarray: counts (N x n_rdm_groups)
+
+        """
+        return _draw_counts(self.rdm_draws, len(self.rdm_select))
+
+    def check(self, data, pattern_descriptor, rdm_descriptor, n_cv=1):
+        """ raises a ValueError if the plan does not fit the data and the
+        arguments of an evaluation
+        """
+        if pattern_descriptor != self.pattern_descriptor \
+                or rdm_descriptor != self.rdm_descriptor:
+            raise ValueError('the plan was made for other descriptors')
+        if not np.array_equal(
+                self.rdm_select,
+                np.unique(data.rdm_descriptors[rdm_descriptor])) \
+                or not np.array_equal(
+                    self.pattern_select,
+                    np.unique(data.pattern_descriptors[pattern_descriptor])):
+            raise ValueError('the plan was made for different data')
+        if n_cv > self.n_cv:
+            raise ValueError('the plan contains only %d cv runs per sample'
+                             % self.n_cv)
+
+    def save(self, filename, file_type='hdf5', overwrite=False):
+        """ saves the plan into a file.
+
+        Args:
+            filename(String): path to the file
+                [or opened file]
+            file_type(String): Type of file to create:
+                hdf5: hdf5 file
+                pkl: pickle file
+            overwrite(Boolean): overwrites file if it already exists
+
+        """
+        plan_dict = self.to_dict()
+        if overwrite:
+            remove_file(filename)
+        if file_type == 'hdf5':
+            write_dict_hdf5(filename, plan_dict)
+        elif file_type == 'pkl':
+            write_dict_pkl(filename, plan_dict)
+
+    def to_dict(self):
+        """ Converts the plan into a dict, which can be used for saving
+
+        Returns:
+            plan_dict(dict): A dictionary with all the information needed
+                to regenerate the object
+
+        """
+        plan_dict = {}
+        plan_dict['pattern_descriptor'] = self.pattern_descriptor
+        plan_dict['rdm_descriptor'] = self.rdm_descriptor
+        plan_dict['n_samples'] = self.n_samples
+        plan_dict['n_cv'] = self.n_cv
+        plan_dict['rdm_select'] = self.rdm_select
+        plan_dict['pattern_select'] = self.pattern_select
+        plan_dict['rdm_draws'] = self.rdm_draws
+        plan_dict['pattern_draws'] = self.pattern_draws
+        plan_dict['rdm_order'] = self.rdm_order
+        plan_dict['pattern_order'] = self.pattern_order
+        return plan_dict
+
+
+class PlanSample:
+    """ the draws of a single sample of a ResamplingPlan, which the
+    sampling functions use in place of a random number generator
+
+    Attributes:
+        rdm_idx(numpy.ndarray): sampled rdm groups
+        pattern_idx(numpy.ndarray): sampled pattern groups
+        rdm_order(numpy.ndarray): fold order of the rdm groups per cv run
+        pattern_order(numpy.ndarray): fold order of the pattern groups
+            per cv run
+
+    """
+
+    def __init__(self, rdm_idx, pattern_idx, rdm_order, pattern_order):
+        self.rdm_idx = rdm_idx
+        self.pattern_idx = pattern_idx
+        self.rdm_order = rdm_order
+        self.pattern_order = pattern_order
+
+
+def load_plan(filename, file_type=None):
+    """ loads a ResamplingPlan from disc
+
+    Args:
+        filename(String): path to the filelocation
+
+    """
+    if file_type is None:
+        if isinstance(filename, str):
+            if filename[-4:] == '.pkl':
+                file_type = 'pkl'
+            elif filename[-3:] == '.h5' or filename[-4:] == 'hdf5':
+                file_type = 'hdf5'
+    if file_type == 'hdf5':
+        plan_dict = read_dict_hdf5(filename)
+    elif file_type == 'pkl':
+        plan_dict = read_dict_pkl(filename)
+    else:
+        raise ValueError('filetype not understood')
+    return plan_from_dict(plan_dict)
+
+
+def plan_from_dict(plan_dict):
+    """ recreate a ResamplingPlan from a dictionary
+
+    Args:
+        plan_dict(dict): dictionary to regenerate
+
+    Returns:
+        plan(ResamplingPlan): the recreated object
+
+    """
+    plan = ResamplingPlan(
+        N=int(plan_dict['n_samples']), n_cv=int(plan_dict['n_cv']),
+        pattern_descriptor=str(plan_dict['pattern_descriptor']),
+        rdm_descriptor=str(plan_dict['rdm_descriptor']))
+    plan.rdm_select = plan_dict['rdm_select']
+    plan.pattern_select = plan_dict['pattern_select']
+    plan.rdm_draws = plan_dict['rdm_draws']
+    plan.pattern_draws = plan_dict['pattern_draws']
+    plan.rdm_order = plan_dict['rdm_order']
+    plan.pattern_order = plan_dict['pattern_order']
+    return plan
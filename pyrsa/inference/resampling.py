@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+reproducible execution of resampling loops
+
+Every sample gets its own random number generator spawned from a single
+numpy.random.SeedSequence. The random draws of a sample thus depend only
+on the seed and the sample number, such that the results are the same
+no matter how the samples are distributed across processes.
+"""
+
+import os
+import json
+import h5py
+import numpy as np
+import tqdm
+from joblib import Parallel, delayed, effective_n_jobs
+
+
+def sample_seeds(N, seed=None, start=0):
+    """ generates independent seeds for a sequence of samples
+
+    Args:
+        N(int): number of samples
+        seed(int, numpy.random.SeedSequence or None): base seed.
+            If None, the base seed is drawn from the global numpy random
+            state, such that numpy.random.seed still controls the results
+        start(int): number of the first sample
+
+    Returns:
+        list: numpy.random.SeedSequence for samples start to start + N
+
+    """
+    seed = base_seed(seed)
+    return [np.random.SeedSequence(seed.entropy,
+                                   spawn_key=seed.spawn_key + (i,),
+                                   pool_size=seed.pool_size)
+            for i in range(start, start + N)]
+
+
+def base_seed(seed=None):
+    """ converts a seed into a numpy.random.SeedSequence
+
+    Args:
+        seed(int, numpy.random.SeedSequence or None): seed to convert.
+            None draws a seed from the global numpy random state
+
+    Returns:
+        numpy.random.SeedSequence: seed
+
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    if seed is None:
+        seed = np.random.randint(2 ** 31)
+    return np.random.SeedSequence(seed)
+
+
+def sample_rng(seed):
+    """ random number generator for a single sample
+
+    Args:
+        seed(numpy.random.SeedSequence): seed of the sample
+
+    Returns:
+        numpy.random.RandomState: generator with the interface of the
+        global numpy random functions
+
+    """
+    return np.random.RandomState(np.random.MT19937(seed))
+
+
+def run_samples(sample_fun, N, args=(), seed=None, n_jobs=1, executor=None,
+                start=0, plan=None):
+    """ runs sample_fun(rng, *args) for N samples and collects the results
+
+    The samples are split into n_jobs contiguous chunks, which are run by
+    a joblib process pool or the passed executor. The outputs are merged
+    in sample order.
+
+    If a pyrsa.inference.plan.ResamplingPlan is given, sample_fun gets the
+    draws of the planned sample in place of the random number generator.
+
+    Args:
+        sample_fun(function): function computing one sample, which takes
+            the random number generator as first argument and returns a
+            tuple of numpy.ndarrays
+        N(int): number of samples
+        args(tuple): further arguments to sample_fun
+        seed(int, numpy.random.SeedSequence or None): base seed
+        n_jobs(int): number of parallel jobs. -1 uses all processors
+        executor(concurrent.futures.Executor): executor to submit the
+            chunks to instead of the joblib pool
+        start(int): number of the first sample
+        plan(pyrsa.inference.plan.ResamplingPlan): plan to take the
+            samples from
+
+    Returns:
+        list: one numpy.ndarray per output of sample_fun, with the
+        samples stacked along the first axis
+
+    """
+    if plan is None:
+        samples = sample_seeds(N, seed, start)
+    else:
+        samples = [plan.sample(i) for i in range(start, start + N)]
+    n_chunks = min(effective_n_jobs(n_jobs), N)
+    if n_chunks <= 1 and executor is None:
+        results = [_run_chunk(sample_fun, samples, args, progress=True)]
+    else:
+        chunks = [[samples[i] for i in idx]
+                  for idx in np.array_split(np.arange(N), max(n_chunks, 1))]
+        if executor is None:
+            results = Parallel(n_jobs=n_chunks)(
+                delayed(_run_chunk)(sample_fun, chunk, args)
+                for chunk in chunks)
+        else:
+            futures = [executor.submit(_run_chunk, sample_fun, chunk, args)
+                       for chunk in chunks]
+            results = [future.result() for future in futures]
+    return [np.concatenate(output) for output in zip(*results)]
+
+
+def run_adaptive(sample_fun, N, args=(), precision=None, batch_size=100,
+                 seed=None, n_jobs=1, executor=None, stream=None,
+                 checkpoint=None, checkpoint_interval=100, plan=None):
+    """ runs samples like run_samples, optionally stopping early
+
+    If a target precision is given, the samples are drawn in batches of
+    batch_size until the relative Monte Carlo error of the variance
+    estimates falls below precision or N samples were drawn. As the
+    samples are seeded by their number, the first n samples are the same
+    as in a run with N=n.
+
+    If a stream function is given, the outputs of each batch are passed to
+    it instead of being collected, such that only one batch is held in
+    memory at a time.
+
+    If a checkpoint file is given, the completed samples are written to it
+    together with the seed after every checkpoint_interval samples. If the
+    file exists already, the run resumes after its last completed sample
+    and yields the same outputs as an uninterrupted run.
+
+    Args:
+        sample_fun(function): function computing one sample as for
+            run_samples
+        N(int): maximal number of samples
+        args(tuple): further arguments to sample_fun
+        precision(float): target relative Monte Carlo error of the
+            variances. None runs all N samples
+        batch_size(int): number of samples per batch
+        seed(int, numpy.random.SeedSequence or None): base seed
+        n_jobs(int): number of parallel jobs
+        executor(concurrent.futures.Executor): executor for the jobs
+        stream(function): function to pass the outputs of each batch to
+        checkpoint(str): path of the hdf5 checkpoint file
+        checkpoint_interval(int): number of samples between checkpoints
+        plan(pyrsa.inference.plan.ResamplingPlan): plan to take the
+            samples from
+
+    Returns:
+        list: outputs as for run_samples, None if streamed
+        float: achieved precision of the variance estimates
+
+    """
+    if precision is None and stream is None:
+        batch_size = N
+    outputs = None
+    summary = []
+    n_samples = 0
+    if checkpoint is not None:
+        if stream is not None:
+            raise ValueError('checkpoints require the outputs of all'
+                             + ' samples and cannot be combined with'
+                             + ' streaming')
+        batch_size = min(batch_size, checkpoint_interval)
+        if os.path.exists(checkpoint):
+            seed, outputs = _read_checkpoint(checkpoint, seed)
+            outputs = [output[:N] for output in outputs]
+            n_samples = outputs[0].shape[0]
+            summary.append(sample_summary(outputs))
+            achieved = variance_precision(summary[0])
+            if precision is not None and achieved <= precision:
+                return outputs, achieved
+    seed = base_seed(seed)
+    while n_samples < N:
+        n_batch = min(batch_size, N - n_samples)
+        batch = run_samples(sample_fun, n_batch, args, seed=seed,
+                            n_jobs=n_jobs, executor=executor,
+                            start=n_samples, plan=plan)
+        summary.append(sample_summary(batch))
+        if stream is not None:
+            stream(batch)
+        elif outputs is None:
+            outputs = batch
+        else:
+            outputs = [np.concatenate((output, new))
+                       for output, new in zip(outputs, batch)]
+        n_samples += n_batch
+        if checkpoint is not None:
+            _write_checkpoint(checkpoint, seed, outputs)
+        achieved = variance_precision(np.concatenate(summary))
+        if precision is not None and achieved <= precision:
+            break
+    return outputs, achieved
+
+
+def sample_summary(outputs):
+    """ reduces the outputs of the samples to one value per sample for each
+    model and noise ceiling bound, by averaging over all further axes
+    like folds and crossvalidation runs
+
+    Args:
+        outputs(list): numpy.ndarrays with samples x (models or bounds) x ...
+
+    Returns:
+        numpy.ndarray: samples x values
+
+    """
+    return np.concatenate([
+        np.mean(output.reshape(output.shape[0], output.shape[1], -1), -1)
+        for output in outputs], axis=1)
+
+
+def variance_precision(values):
+    """ relative Monte Carlo standard error of the variance estimates of
+    bootstrapped values, based on the fourth central moment:
+    Var(s^2) ~ (m_4 - s^4 (n - 3) / (n - 1)) / n
+
+    Columns which are nan for all samples are ignored, samples with any
+    other nan value are excluded.
+
+    Args:
+        values(numpy.ndarray): samples x values
+
+    Returns:
+        float: the largest relative standard error over the values
+
+    """
+    values = values[:, ~np.all(np.isnan(values), axis=0)]
+    values = values[np.all(np.isfinite(values), axis=1)]
+    n = values.shape[0]
+    if n < 4:
+        return np.inf
+    deviations = values - np.mean(values, axis=0)
+    variance = np.sum(deviations ** 2, axis=0) / (n - 1)
+    moment_4 = np.mean(deviations ** 4, axis=0)
+    var_variance = (moment_4 - variance ** 2 * (n - 3) / (n - 1)) / n
+    valid = variance > 0
+    if not np.any(valid):
+        return 0.0
+    return float(np.max(np.sqrt(np.maximum(var_variance[valid], 0))
+                        / variance[valid]))
+
+
+class SampleMoments:
+    """ streaming accumulator for the mean and covariance of per-sample
+    vectors. Batches are merged with the pairwise update of Chan et al.,
+    such that the samples need not be kept in memory.
+    Samples with non-finite entries are skipped.
+
+    Attributes:
+        n(int): number of accumulated samples
+        n_values(int): number of values per sample
+        mean(numpy.ndarray): mean vector
+        comoment(numpy.ndarray): sum of outer products of the deviations
+            from the mean
+
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.n_values = 0
+        self.mean = None
+        self.comoment = None
+
+    def update(self, values):
+        """ adds a batch of samples
+
+        Args:
+            values(numpy.ndarray): samples x values
+
+        """
+        self.n_values = values.shape[1]
+        values = values[np.all(np.isfinite(values), axis=1)]
+        n_new = values.shape[0]
+        if n_new == 0:
+            return
+        mean_new = np.mean(values, axis=0)
+        deviations = values - mean_new
+        comoment_new = deviations.T @ deviations
+        if self.n == 0:
+            self.mean = mean_new
+            self.comoment = comoment_new
+        else:
+            n = self.n + n_new
+            delta = mean_new - self.mean
+            self.comoment = self.comoment + comoment_new \
+                + np.outer(delta, delta) * self.n * n_new / n
+            self.mean = self.mean + delta * n_new / n
+        self.n += n_new
+
+    def covariance(self):
+        """ unbiased covariance estimate of the accumulated samples,
+        nan if fewer than two samples were valid
+        """
+        if self.comoment is None or self.n < 2:
+            return np.full((self.n_values, self.n_values), np.nan)
+        return self.comoment / (self.n - 1)
+
+
+def _write_checkpoint(path, seed, outputs):
+    """ writes the outputs of the completed samples and their seed to an
+    hdf5 file. The file is replaced only once the new one is complete, such
+    that an interruption while writing keeps the last checkpoint.
+    """
+    path_tmp = path + '.tmp'
+    with h5py.File(path_tmp, 'w') as file:
+        file.attrs['entropy'] = json.dumps(seed.entropy)
+        file.attrs['spawn_key'] = json.dumps(seed.spawn_key)
+        file.attrs['pool_size'] = seed.pool_size
+        for i, output in enumerate(outputs):
+            file['output_%d' % i] = output
+    os.replace(path_tmp, path)
+
+
+def _read_checkpoint(path, seed=None):
+    """ reads the seed and the outputs of the completed samples from a
+    checkpoint file written by _write_checkpoint
+    """
+    with h5py.File(path, 'r') as file:
+        seed_file = np.random.SeedSequence(
+            json.loads(file.attrs['entropy']),
+            spawn_key=tuple(json.loads(file.attrs['spawn_key'])),
+            pool_size=int(file.attrs['pool_size']))
+        outputs = [np.array(file['output_%d' % i])
+                   for i in range(len(file.keys()))]
+    if seed is not None:
+        seed = base_seed(seed)
+        if (seed.entropy != seed_file.entropy
+                or tuple(seed.spawn_key) != seed_file.spawn_key):
+            raise ValueError('the checkpoint ' + path + ' was written'
+                             + ' with a different seed')
+    return seed_file, outputs
+
+
+def _run_chunk(sample_fun, samples, args, progress=False):
+    """ runs the samples for a list of seeds or planned samples and stacks
+    their outputs
+    """
+    if progress:
+        samples = tqdm.tqdm(samples)
+    outputs = [sample_fun(_sample_input(sample), *args) for sample in samples]
+    return [np.array(output) for output in zip(*outputs)]
+
+
+def _sample_input(sample):
+    """ the random number generator for a seed, planned samples are passed
+    on as they are
+    """
+    if isinstance(sample, np.random.SeedSequence):
+        return sample_rng(sample)
+    return sample
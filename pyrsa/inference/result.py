@@ -33,6 +33,12 @@ class Result:
         noise_ceiling(numpy.ndarray):
             noise ceiling such that np.mean(noise_ceiling[0]) is the lower
             bound and np.mean(noise_ceiling[1]) is the higher one.
+        n_samples(int):
+            number of bootstrap samples used
+        precision(float):
+            achieved relative Monte Carlo error of the variances
+        fit_iterations(numpy.ndarray):
+            optimizer iterations of the fits per model and fold
 
     Attributes:
         as inputs
@@ -40,7 +46,8 @@ class Result:
     """
 
     def __init__(self, models, evaluations, method, cv_method, noise_ceiling,
-                 variances=None, dof=1):
+                 variances=None, dof=1, n_samples=None, precision=None,
+                 fit_iterations=None):
         if isinstance(models, pyrsa.model.Model):
             models = [models]
         assert len(models) == evaluations.shape[1], 'evaluations shape does' \
@@ -53,6 +60,9 @@ class Result:
         self.noise_ceiling = np.array(noise_ceiling)
         self.variances = variances
         self.dof = dof
+        self.n_samples = n_samples
+        self.precision = precision
+        self.fit_iterations = fit_iterations
         if variances is not None:
             # if the variances only refer to the models this should have the
             # same number of entries as the models list.
@@ -102,6 +112,9 @@ class Result:
         result_dict['noise_ceiling'] = self.noise_ceiling
         result_dict['method'] = self.method
         result_dict['cv_method'] = self.cv_method
+        result_dict['n_samples'] = self.n_samples
+        result_dict['precision'] = self.precision
+        result_dict['fit_iterations'] = self.fit_iterations
         result_dict['models'] = {}
         for i_model in range(len(self.models)):
             key = 'model_%d' % i_model
@@ -149,6 +162,9 @@ def result_from_dict(result_dict):
         dof = result_dict['dof']
     else:
         dof = None
+    n_samples = result_dict.get('n_samples', None)
+    precision = result_dict.get('precision', None)
+    fit_iterations = result_dict.get('fit_iterations', None)
     evaluations = result_dict['evaluations']
     method = result_dict['method']
     cv_method = result_dict['cv_method']
@@ -159,4 +175,5 @@ def result_from_dict(result_dict):
         models[i_model] = pyrsa.model.model_from_dict(
             result_dict['models'][key])
     return Result(models, evaluations, method, cv_method, noise_ceiling,
-                  variances=variances, dof=dof)
+                  variances=variances, dof=dof, n_samples=n_samples,
+                  precision=precision, fit_iterations=fit_iterations)
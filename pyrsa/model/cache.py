@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+caching of model predictions within evaluations
+
+Crossvalidations and bootstraps request the same predictions many times,
+as fixed models and equal parameters always predict the same rdms and the
+sampled pattern subsets repeat. Within a prediction_cache block each model
+keeps its recent predictions, keyed by hashes of theta and of the pattern
+positions.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+import hashlib
+import threading
+import numpy as np
+from pyrsa.util.rdm_utils import _subsample_vectors
+
+
+class PredictionCache:
+    """ least recently used cache of predicted rdm vectors, whose size is
+    bounded by the memory of the stored arrays. Pickled caches are empty,
+    such that models sent to parallel jobs do not carry their predictions.
+    The cache can be shared by threads, e.g. of a ThreadPoolExecutor.
+
+    Args:
+        max_bytes(int): maximal memory of the stored arrays in bytes.
+            0 disables caching
+
+    Attributes:
+        n_bytes(int): memory of the stored arrays in bytes
+        hits(int): number of requests answered from the cache
+        misses(int): number of requests which computed the value
+
+    """
+
+    def __init__(self, max_bytes=2 ** 26):
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        return {'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state['max_bytes'])
+
+    def get(self, key, compute):
+        """ returns the array stored for key, computing and storing it
+        if it is missing. The returned arrays are read-only.
+
+        Args:
+            key(tuple): hashable key of the value
+            compute(function): computes the value without arguments
+
+        Returns:
+            numpy.ndarray: the value
+
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        # computed outside the lock, such that threads compute in parallel
+        value = np.asarray(compute()).view()
+        value.flags.writeable = False
+        with self._lock:
+            if key not in self._entries and value.nbytes <= self.max_bytes:
+                self._entries[key] = value
+                self.n_bytes += value.nbytes
+                while self.n_bytes > self.max_bytes:
+                    _, oldest = self._entries.popitem(last=False)
+                    self.n_bytes -= oldest.nbytes
+        return value
+
+    def clear(self):
+        """ removes all stored arrays """
+        with self._lock:
+            self._entries.clear()
+            self.n_bytes = 0
+
+
+@contextmanager
+def prediction_cache(models, max_bytes=2 ** 26):
+    """ caches the predictions of the models within a with block.
+    Models, which have a prediction_cache already, keep it, such that
+    nested blocks share the caches of the outermost one. To evaluate
+    without caching set model.prediction_cache = PredictionCache(0).
+
+    The keys do not cover the rdms of the models, which must therefore
+    not be changed within the block.
+
+    Args:
+        models(pyrsa.model.Model or list): the models
+        max_bytes(int): memory bound per model in bytes
+
+    """
+    if not isinstance(models, (list, tuple)):
+        models = [models]
+    enabled = []
+    for model in models:
+        if getattr(model, 'prediction_cache', None) is None:
+            model.prediction_cache = PredictionCache(max_bytes)
+            enabled.append(model)
+    try:
+        yield
+    finally:
+        for model in enabled:
+            model.prediction_cache = None
+
+
+def _cached_prediction(model, theta=None, pattern_index=None):
+    """ model.predict_vectors(theta, pattern_index) taken from the
+    prediction cache of the model if it has one
+    """
+    return _cached(model, ('prediction', _array_key(theta),
+                           _array_key(pattern_index)),
+                   lambda: model.predict_vectors(theta, pattern_index))
+
+
+def _cached_rdm_vectors(model, pattern_index=None):
+    """ the rdm vectors a model combines (model.components if it has them,
+    model.rdm otherwise) subsampled to the patterns at the positions
+    pattern_index, taken from the prediction cache of the model if it has
+    one
+    """
+    vectors = getattr(model, 'components', None)
+    if vectors is None:
+        vectors = model.rdm
+    return _cached(model, ('rdm', _array_key(pattern_index)),
+                   lambda: _subsample_vectors(vectors, pattern_index,
+                                              model.rdm_obj.n_cond))
+
+
+def _cached(model, key, compute):
+    """ the value for key from the prediction cache of the model, computed
+    by compute if the model has no cache or the key is missing
+    """
+    cache = getattr(model, 'prediction_cache', None)
+    if cache is None:
+        return compute()
+    return cache.get(key, compute)
+
+
+def _array_key(array):
+    """ hashable key of the content of an array, None for None """
+    if array is None:
+        return None
+    array = np.ascontiguousarray(array)
+    return (array.dtype.str, array.shape,
+            hashlib.sha1(array.tobytes()).hexdigest())
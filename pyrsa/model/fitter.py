@@ -7,10 +7,13 @@ Parameter fitting methods for models
 import numpy as np
 import scipy.optimize as opt
 from pyrsa.rdm import compare
+from pyrsa.rdm.compare import _prepare_vectors
+from pyrsa.util.rdm_utils import _subsample_selection
+from .cache import _cached_rdm_vectors, _cached, _array_key
 
 
 def fit_mock(model, data, method='cosine', pattern_idx=None,
-             pattern_descriptor=None):
+             pattern_descriptor=None, theta0=None):
     """ formally acceptable fitting method which always returns a vector of
     zeros
 
@@ -20,6 +23,7 @@ def fit_mock(model, data, method='cosine', pattern_idx=None,
         method(String): Evaluation method
         pattern_idx(numpy.ndarray): Which patterns are sampled
         pattern_descriptor(String): Which descriptor is used
+        theta0(numpy.ndarray): initial parameters, ignored
 
     Returns:
         theta(numpy.ndarray): parameter vector
@@ -29,37 +33,50 @@ def fit_mock(model, data, method='cosine', pattern_idx=None,
 
 
 def fit_select(model, data, method='cosine', pattern_idx=None,
-               pattern_descriptor=None):
+               pattern_descriptor=None, theta0=None):
     """ fits selection models by evaluating each rdm and selcting the one
     with best performance. Works only for ModelSelect
 
+    The candidate rdms are subsampled together and compared to the data in
+    a single call, unless they miss different entries.
+
     Args:
         model(pyrsa.model.Model): model to be fit
         data(pyrsa.rdm.RDMs): Data to fit to
         method(String): Evaluation method
         pattern_idx(numpy.ndarray): Which patterns are sampled
         pattern_descriptor(String): Which descriptor is used
+        theta0(int): initial parameter, ignored
 
     Returns:
         theta(int): parameter vector
 
     """
-    evaluations = np.zeros(model.n_rdm)
-    for i_rdm in range(model.n_rdm):
-        pred = model.predict_rdm(i_rdm)
-        if not (pattern_idx is None or pattern_descriptor is None):
-            pred = pred.subsample_pattern(pattern_descriptor, pattern_idx)
-        evaluations[i_rdm] = np.mean(compare(pred, data, method=method))
+    preds = _cached_rdm_vectors(
+        model, _pattern_index(model, pattern_idx, pattern_descriptor))
+    nan_idx = np.isnan(preds)
+    if np.all(nan_idx == nan_idx[0]):
+        evaluations = np.mean(compare(preds, data, method=method), axis=1)
+    else:
+        evaluations = np.zeros(model.n_rdm)
+        for i_rdm in range(model.n_rdm):
+            evaluations[i_rdm] = np.mean(
+                compare(preds[i_rdm], data, method=method))
     theta = np.argmax(evaluations)
     return theta
 
 
 def fit_optimize(model, data, method='cosine', pattern_idx=None,
-                 pattern_descriptor=None):
+                 pattern_descriptor=None, theta0=None):
     """
     fitting theta using optimization
     currently allowed for ModelWeighted only
 
+    For the methods cosine, corr, cosine_cov and corr_cov the loss of a
+    weighted model and its gradient are computed analytically from the
+    inner products of the model rdms and the data, which are computed once,
+    and minimized by L-BFGS-B with non-negative weights.
+
     Args:
         model(Model): the model to be fit
         data(pyrsa.rdm.RDMs): data to be fit
@@ -68,26 +85,68 @@ def fit_optimize(model, data, method='cosine', pattern_idx=None,
             sampled patterns The default is None.
         pattern_descriptor (String, optional)
             descriptor used for fitting. The default is None.
+        theta0(numpy.ndarray, optional)
+            initial parameters for the optimization. The default is a
+            vector of ones.
 
     Returns:
         numpy.ndarray: theta, parameter vector for the model
 
     """
-    def _loss_opt(theta):
-        return _loss(theta, model, data, method=method,
-                     pattern_idx=pattern_idx,
-                     pattern_descriptor=pattern_descriptor)
-    theta0 = np.random.rand(model.n_param)
-    theta = opt.minimize(_loss_opt, theta0)
-    return theta.x
+    return _optimize(model, data, method=method, pattern_idx=pattern_idx,
+                     pattern_descriptor=pattern_descriptor,
+                     theta0=theta0).x
+
+
+def fit_nnls(model, data, method='cosine', pattern_idx=None,
+             pattern_descriptor=None, theta0=None):
+    """
+    fitting theta of a weighted model by non-negative least squares
+    For the methods cosine, corr, cosine_cov and corr_cov the non-negative
+    weights which maximize the mean similarity to the data are the
+    non-negative least squares fit to the mean normalized data rdm, which is
+    solved exactly from the inner products of the model rdms.
+    Other methods are fit with fit_optimize.
+
+    Args:
+        model(Model): the model to be fit
+        data(pyrsa.rdm.RDMs): data to be fit
+        method(String, optional): evaluation metric The default is 'cosine'.
+        pattern_idx(numpy.ndarray, optional)
+            sampled patterns The default is None.
+        pattern_descriptor (String, optional)
+            descriptor used for fitting. The default is None.
+        theta0(numpy.ndarray, optional)
+            initial parameters for fit_optimize with other methods
+
+    Returns:
+        numpy.ndarray: theta, parameter vector for the model
+
+    """
+    if method not in ('cosine', 'corr', 'cosine_cov', 'corr_cov'):
+        return fit_optimize(model, data, method=method,
+                            pattern_idx=pattern_idx,
+                            pattern_descriptor=pattern_descriptor,
+                            theta0=theta0)
+    gram, inner = _weighted_inner_products(
+        model, data, method=method, pattern_idx=pattern_idx,
+        pattern_descriptor=pattern_descriptor)
+    return _nnls_gram(gram, inner, getattr(model, 'loadings', None))
 
 
 def fit_interpolate(model, data, method='cosine', pattern_idx=None,
-                    pattern_descriptor=None):
+                    pattern_descriptor=None, theta0=None):
     """
     fitting theta using bisection optimization
     allowed for ModelInterpolate only
 
+    All pairs of neighboring rdms are fit together. For the methods cosine,
+    corr, cosine_cov and corr_cov the optimal interpolation of each pair is
+    computed in closed form from the inner products of the model rdms.
+    Otherwise the loss is evaluated on a grid of weights for all pairs
+    at once and refined by a golden section search around the best grid
+    point.
+
     Args:
         model(Model): the model to be fit
         data(pyrsa.rdm.RDMs): data to be fit
@@ -96,32 +155,89 @@ def fit_interpolate(model, data, method='cosine', pattern_idx=None,
             sampled patterns The default is None.
         pattern_descriptor (String, optional)
             descriptor used for fitting. The default is None.
+        theta0(numpy.ndarray, optional)
+            initial parameters, ignored
 
     Returns:
         numpy.ndarray: theta, parameter vector for the model
 
     """
-    results = []
-    for i_pair in range(model.n_rdm-1):
-        def loss_opt(w):
-            theta = np.zeros(model.n_param)
-            theta[i_pair] = w
-            theta[i_pair+1] = 1-w
-            return _loss(theta, model, data, method=method,
-                         pattern_idx=pattern_idx,
-                         pattern_descriptor=pattern_descriptor)
-        results.append(
-            opt.minimize_scalar(loss_opt, np.array([.5]),
-                                method='bounded', bounds=(0, 1)))
-    losses = [r.fun for r in results]
+    if method in ('cosine', 'corr', 'cosine_cov', 'corr_cov'):
+        gram, inner = _weighted_inner_products(
+            model, data, method=method, pattern_idx=pattern_idx,
+            pattern_descriptor=pattern_descriptor)
+        weights, losses = _interpolate_cosine(gram, inner)
+    else:
+        weights, losses = _interpolate_search(
+            model, data, method=method, pattern_idx=pattern_idx,
+            pattern_descriptor=pattern_descriptor)
     i_pair = np.argmin(losses)
-    result = results[i_pair]
     theta = np.zeros(model.n_rdm)
-    theta[i_pair] = result.x
-    theta[i_pair+1] = 1-result.x
+    theta[i_pair] = weights[i_pair]
+    theta[i_pair+1] = 1-weights[i_pair]
     return theta
 
 
+def _optimize(model, data, method='cosine', pattern_idx=None,
+              pattern_descriptor=None, theta0=None):
+    """ minimizes the loss for fit_optimize starting from theta0, which
+    defaults to equal weights of one
+
+    Returns:
+        scipy.optimize.OptimizeResult: the optimization result
+
+    """
+    if theta0 is None:
+        theta0 = np.ones(model.n_param)
+    if method in ('cosine', 'corr', 'cosine_cov', 'corr_cov') \
+            and _is_weighted(model):
+        gram, inner = _weighted_inner_products(
+            model, data, method=method, pattern_idx=pattern_idx,
+            pattern_descriptor=pattern_descriptor)
+        return opt.minimize(
+            _loss_weighted, theta0,
+            args=(gram, inner, getattr(model, 'loadings', None)),
+            method='L-BFGS-B', bounds=[(0, None)] * model.n_param,
+            jac=True)
+
+    def _loss_opt(theta):
+        return _loss(theta, model, data, method=method,
+                     pattern_idx=pattern_idx,
+                     pattern_descriptor=pattern_descriptor)
+    return opt.minimize(_loss_opt, theta0)
+
+
+def _fit_iterations(fitter, model, data, method='cosine', pattern_idx=None,
+                    pattern_descriptor=None, theta0=None):
+    """ fits a model and counts the optimizer iterations, which are
+    recorded for fit_optimize and fit_nnls and zero for other fitters.
+    theta0 is passed only to these two, such that other fitters need not
+    accept it.
+
+    Returns:
+        numpy.ndarray: theta, parameter vector for the model
+        int: number of iterations
+
+    """
+    if _warm_startable(fitter, method):
+        result = _optimize(model, data, method=method,
+                           pattern_idx=pattern_idx,
+                           pattern_descriptor=pattern_descriptor,
+                           theta0=theta0)
+        return result.x, result.nit
+    return fitter(model, data, method=method, pattern_idx=pattern_idx,
+                  pattern_descriptor=pattern_descriptor), 0
+
+
+def _warm_startable(fitter, method):
+    """ whether the fitter optimizes iteratively from initial parameters
+    for this method
+    """
+    return fitter is fit_optimize or (
+        fitter is fit_nnls
+        and method not in ('cosine', 'corr', 'cosine_cov', 'corr_cov'))
+
+
 def _loss(theta, model, data, method='cosine', cov=None,
           pattern_descriptor=None, pattern_idx=None):
     """Method for calculating a loss for a model and parameter combination
@@ -144,7 +260,246 @@ def _loss(theta, model, data, method='cosine', cov=None,
         numpy.ndarray: loss
 
     """
-    pred = model.predict_rdm(theta)
-    if not (pattern_idx is None or pattern_descriptor is None):
-        pred = pred.subsample_pattern(pattern_descriptor, pattern_idx)
+    pred = model.predict_vectors(
+        theta, _pattern_index(model, pattern_idx, pattern_descriptor))
     return -np.mean(compare(pred, data, method=method))
+
+
+def _pattern_index(model, pattern_idx=None, pattern_descriptor=None):
+    """ positions of the patterns of the model predictions, which have the
+    values pattern_idx of pattern_descriptor, for predict_vectors
+
+    Returns:
+        numpy.ndarray: pattern positions, None for all patterns
+
+    """
+    if pattern_idx is None or pattern_descriptor is None:
+        return None
+    if model.rdm_obj is None:
+        pattern_descriptors = model.predict_rdm().pattern_descriptors
+    else:
+        pattern_descriptors = model.rdm_obj.pattern_descriptors
+    return _subsample_selection(pattern_descriptors[pattern_descriptor],
+                                pattern_idx)
+
+
+def _is_weighted(model):
+    """ whether the model predicts the sum of its rdms weighted by the
+    positive part of theta like ModelWeighted
+    """
+    from pyrsa.model.model import ModelWeighted
+    return isinstance(model, ModelWeighted)
+
+
+def _weighted_inner_products(model, data, method='cosine',
+                             pattern_idx=None, pattern_descriptor=None):
+    """ inner products of the model rdms and the normalized data rdms after
+    the transformation for method, which determine the loss of a weighted
+    model for any theta. For weighted models the products are those of
+    the components, which are mapped to the rdms by model.loadings.
+    The transformed components and their gram matrix are taken from the
+    prediction cache of the model, for all patterns and cosine from
+    model.gram.
+
+    Returns:
+        numpy.ndarray: gram matrix of the model rdms (n_param x n_param),
+        of the components (rank x rank) for compressed models
+        numpy.ndarray: mean inner products of the model rdms with the
+        normalized data rdms (n_param or rank)
+
+    """
+    pattern_index = _pattern_index(model, pattern_idx, pattern_descriptor)
+    model_vectors = _cached_rdm_vectors(model, pattern_index)
+    data_vectors = data.get_vectors()
+    nan_idx = np.all(~np.isnan(model_vectors), 0) \
+        & np.all(~np.isnan(data_vectors), 0)
+    key = (method, _array_key(pattern_index), _array_key(nan_idx))
+    model_vectors = _cached(
+        model, ('prepared',) + key,
+        lambda: _prepare_vectors(model_vectors[:, nan_idx], method,
+                                 nan_idx))
+    if _is_weighted(model) and method == 'cosine' \
+            and pattern_index is None and np.all(nan_idx):
+        gram = model.gram
+    else:
+        gram = _cached(model, ('gram',) + key,
+                       lambda: _gram(model_vectors))
+    data_vectors = _prepare_vectors(data_vectors[:, nan_idx], method,
+                                    nan_idx)
+    data_vectors = data_vectors / np.sqrt(np.einsum(
+        'ij,ij->i', data_vectors, data_vectors)).reshape(-1, 1)
+    inner = model_vectors @ np.mean(data_vectors, 0)
+    return gram, inner
+
+
+def _gram(vectors):
+    """ gram matrix of vectors computed in double precision """
+    vectors = vectors.astype(np.float64, copy=False)
+    return vectors @ vectors.T
+
+
+def _loss_weighted(theta, gram, inner, loadings=None):
+    """ loss of a weighted model and its gradient with respect to theta,
+    given the inner products from _weighted_inner_products
+
+    The loss is the negative mean cosine similarity between the prediction
+    and the data rdms. The gradient is that of the weighted sum, which
+    equals the prediction for the non-negative theta fit_optimize keeps
+    to by its bounds.
+
+    Returns:
+        float: loss
+        numpy.ndarray: gradient
+
+    """
+    theta = np.maximum(theta, 0)
+    weights = theta if loadings is None else loadings.T @ theta
+    norm = np.sqrt(weights @ gram @ weights)
+    if norm == 0:
+        rdm_inner, rdm_norm2 = _rdm_products(gram, inner, loadings)
+        return 0.0, -rdm_inner / np.sqrt(rdm_norm2)
+    similarity = weights @ inner
+    gradient = (similarity * (gram @ weights) / norm ** 2 - inner) / norm
+    if loadings is not None:
+        gradient = loadings @ gradient
+    return -similarity / norm, gradient
+
+
+def _nnls_gram(gram, inner, loadings=None):
+    """ solves the non-negative least squares problem
+    min theta^T gram theta - 2 theta^T inner for theta >= 0
+    via scipy.optimize.nnls on the square root of the gram matrix.
+    For compressed weighted models, gram and inner are those of the
+    components and the rdms are mapped to them by the loadings, such that
+    the problem has only rank rows.
+    If the solution is zero, the single rdm with the largest similarity
+    is selected instead.
+
+    Returns:
+        numpy.ndarray: theta
+
+    """
+    eigval, eigvec = np.linalg.eigh(gram)
+    eigval = np.maximum(eigval, 0)
+    valid = eigval > eigval[-1] * gram.shape[0] * np.finfo(float).eps
+    root = np.sqrt(eigval[valid]).reshape(-1, 1) * eigvec[:, valid].T
+    target = (eigvec[:, valid].T @ inner) / np.sqrt(eigval[valid])
+    if loadings is not None:
+        root = root @ loadings.T
+    theta, _ = opt.nnls(root, target)
+    if not np.any(theta > 0):
+        rdm_inner, rdm_norm2 = _rdm_products(gram, inner, loadings)
+        theta = np.zeros_like(rdm_inner)
+        theta[np.argmax(rdm_inner / np.sqrt(rdm_norm2))] = 1
+    return theta
+
+
+def _rdm_products(gram, inner, loadings=None):
+    """ inner products of the single rdms with the data and their squared
+    norms, from the products of the components for compressed models
+
+    Returns:
+        numpy.ndarray: inner products with the normalized data rdms
+        numpy.ndarray: squared norms of the rdms
+
+    """
+    if loadings is None:
+        return inner, np.diag(gram)
+    return (loadings @ inner,
+            np.einsum('ik,kl,il->i', loadings, gram, loadings))
+
+
+def _interpolate_cosine(gram, inner):
+    """ optimal interpolation weights w of all pairs of neighboring rdms
+    for cosine type losses, given the inner products from
+    _weighted_inner_products. The optimum is either the unconstrained
+    maximum of the cosine within the span of the pair or one of its ends.
+
+    Returns:
+        numpy.ndarray: weight of the first rdm of each pair
+        numpy.ndarray: loss of each pair
+
+    """
+    diag = np.diag(gram)
+    pair_gram = (diag[:-1], np.diag(gram, 1), diag[1:])
+    pair_inner = (inner[:-1], inner[1:])
+    det = pair_gram[0] * pair_gram[2] - pair_gram[1] ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        theta_0 = (pair_gram[2] * pair_inner[0]
+                   - pair_gram[1] * pair_inner[1]) / det
+        theta_1 = (pair_gram[0] * pair_inner[1]
+                   - pair_gram[1] * pair_inner[0]) / det
+        w_opt = theta_0 / (theta_0 + theta_1)
+    inside = (theta_0 > 0) & (theta_1 > 0) \
+        & (det > np.finfo(float).eps * pair_gram[0] * pair_gram[2])
+    candidates = np.stack((np.ones_like(det), np.zeros_like(det),
+                           np.where(inside, w_opt, 1)), axis=1)
+    losses = _interpolate_loss(candidates, pair_gram, pair_inner)
+    best = np.argmin(losses, axis=1)
+    return (np.take_along_axis(candidates, best[:, None], 1)[:, 0],
+            np.take_along_axis(losses, best[:, None], 1)[:, 0])
+
+
+def _interpolate_loss(weights, pair_gram, pair_inner):
+    """ cosine type losses for weights of the first rdm of each pair
+    (n_pair x n_weights). Undefined losses are set to infinity.
+    """
+    weights = weights.T
+    norm = np.sqrt(weights ** 2 * pair_gram[0]
+                   + 2 * weights * (1 - weights) * pair_gram[1]
+                   + (1 - weights) ** 2 * pair_gram[2])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        losses = -(weights * pair_inner[0]
+                   + (1 - weights) * pair_inner[1]) / norm
+    return np.nan_to_num(losses, nan=np.inf).T
+
+
+def _interpolate_search(model, data, method='cosine', pattern_idx=None,
+                        pattern_descriptor=None, n_grid=11, xtol=1e-5):
+    """ interpolation weights of all pairs of neighboring rdms by a grid
+    search followed by a golden section search between the neighbors of
+    the best grid point, evaluating all pairs in one compare call per step
+
+    Returns:
+        numpy.ndarray: weight of the first rdm of each pair
+        numpy.ndarray: loss of each pair
+
+    """
+    vectors = _cached_rdm_vectors(
+        model, _pattern_index(model, pattern_idx, pattern_descriptor))
+
+    def losses_opt(weights):
+        preds = weights[:, :, None] * vectors[:-1, None] \
+            + (1 - weights[:, :, None]) * vectors[1:, None]
+        losses = -np.mean(compare(preds.reshape(-1, vectors.shape[1]),
+                                  data, method=method), axis=1)
+        return np.nan_to_num(losses, nan=np.inf).reshape(weights.shape)
+    grid = np.linspace(0, 1, n_grid)
+    n_pair = vectors.shape[0] - 1
+    losses_grid = losses_opt(np.tile(grid, (n_pair, 1)))
+    best = np.argmin(losses_grid, axis=1)
+    lower = grid[np.maximum(best - 1, 0)]
+    upper = grid[np.minimum(best + 1, n_grid - 1)]
+    ratio = (np.sqrt(5) - 1) / 2
+    x_1 = upper - ratio * (upper - lower)
+    x_2 = lower + ratio * (upper - lower)
+    loss_1 = losses_opt(x_1[:, None])[:, 0]
+    loss_2 = losses_opt(x_2[:, None])[:, 0]
+    while np.max(upper - lower) > xtol:
+        left = loss_1 < loss_2
+        upper = np.where(left, x_2, upper)
+        lower = np.where(left, lower, x_1)
+        x_new = np.where(left, upper - ratio * (upper - lower),
+                         lower + ratio * (upper - lower))
+        loss_new = losses_opt(x_new[:, None])[:, 0]
+        x_1, x_2 = (np.where(left, x_new, x_2),
+                    np.where(left, x_1, x_new))
+        loss_1, loss_2 = (np.where(left, loss_new, loss_2),
+                          np.where(left, loss_1, loss_new))
+    weights = np.where(loss_1 < loss_2, x_1, x_2)
+    losses = np.minimum(loss_1, loss_2)
+    loss_grid = losses_grid[np.arange(n_pair), best]
+    on_grid = loss_grid < losses
+    weights[on_grid] = grid[best[on_grid]]
+    losses[on_grid] = loss_grid[on_grid]
+    return weights, losses
@@ -8,7 +8,10 @@ import numpy as np
 from pyrsa.rdm import RDMs
 from pyrsa.rdm import rdms_from_dict
 from pyrsa.util.rdm_utils import batch_to_vectors
-from .fitter import fit_mock, fit_optimize, fit_select, fit_interpolate
+from pyrsa.util.rdm_utils import _subsample_vectors
+from .fitter import fit_mock, fit_select, fit_interpolate
+from .fitter import fit_nnls
+from .fitter import _gram
 
 
 class Model:
@@ -24,6 +27,7 @@ class Model:
         self.n_param = 0
         self.default_fitter = fit_mock
         self.rdm_obj = None
+        self.prediction_cache = None
 
     def predict(self, theta=None):
         """ Returns the predicted rdm vector
@@ -49,6 +53,26 @@ class Model:
         raise NotImplementedError(
             "Predict rdm function not implemented in used model class!")
 
+    def predict_vectors(self, theta=None, pattern_index=None):
+        """ Returns the predicted rdms as vectors without creating an
+        RDMs object, optionally subsampled to the patterns at the positions
+        pattern_index. Repeated patterns yield nan entries for their pairs
+        as in subsample_pattern.
+
+        This default converts the result of predict_rdm. Subclasses compute
+        the vectors directly.
+
+        Args:
+            theta(numpy.ndarray): the model parameter vector (one dimensional)
+            pattern_index(numpy.ndarray): positions of the sampled patterns
+
+        Returns:
+            numpy.ndarray: rdm vectors (2D)
+        """
+        pred = self.predict_rdm(theta)
+        return _subsample_vectors(pred.get_vectors(), pattern_index,
+                                  pred.n_cond)
+
     def fit(self, data):
         """ fit the model to a RDM object data
 
@@ -139,6 +163,22 @@ class ModelFixed(Model):
         """
         return self.rdm_obj
 
+    def predict_vectors(self, theta=None, pattern_index=None):
+        """ Returns the predicted rdm vectors
+
+        For the fixed model there are no parameters.
+
+        Args:
+            theta(numpy.ndarray): the model parameter vector (one dimensional)
+            pattern_index(numpy.ndarray): positions of the sampled patterns
+
+        Returns:
+            numpy.ndarray: rdm vectors (2D)
+
+        """
+        return _subsample_vectors(self.rdm_obj.get_vectors(), pattern_index,
+                                  self.rdm_obj.n_cond)
+
 
 class ModelSelect(Model):
     """
@@ -195,15 +235,51 @@ class ModelSelect(Model):
         """
         return self.rdm_obj[theta]
 
+    def predict_vectors(self, theta=0, pattern_index=None):
+        """ Returns the selected rdm as a vector
+
+        Args:
+            theta(int): index of the selected rdm
+            pattern_index(numpy.ndarray): positions of the sampled patterns
+
+        Returns:
+            numpy.ndarray: rdm vectors (2D)
+
+        """
+        return _subsample_vectors(self.rdm_obj.get_vectors()[[theta]],
+                                  pattern_index, self.rdm_obj.n_cond)
+
 
 class ModelWeighted(Model):
     """
     weighted Model
     models the RDM as a weighted sum of a set of RDMs
+
+    For many rdms, the rdms can be stored as float32 and compressed to
+    their first rank principal components. Predictions then weight the
+    components by loadings @ theta and fitting works with the gram matrix
+    of the components, such that both scale with the rank instead of the
+    number of rdms.
+
+    Args:
+        name(String): Model name
+        rdm(pyrsa.rdm.RDMs): rdms to be weighted, which must not contain
+            nans for rank
+        rank(int): number of principal components to keep. None keeps
+            the rdms themselves
+        dtype(numpy.dtype): type to store the rdm vectors in, e.g.
+            numpy.float32. None keeps the type of the input
+
+    Attributes:
+        components(numpy.ndarray): vectors weighted by the prediction,
+            the rdms or their principal components (rank x n_pairs)
+        loadings(numpy.ndarray): loadings of the rdms on the components
+            (n_rdm x rank), None without compression
+        rdm(numpy.ndarray): the rdm vectors, None with compression
     """
 
     # Model Constructor
-    def __init__(self, name, rdm):
+    def __init__(self, name, rdm, rank=None, dtype=None):
         Model.__init__(self, name)
         if isinstance(rdm, RDMs):
             self.rdm_obj = rdm
@@ -220,7 +296,44 @@ class ModelWeighted(Model):
             self.rdm = batch_to_vectors(rdm)
         self.n_param = self.rdm_obj.n_rdm
         self.n_rdm = self.rdm_obj.n_rdm
-        self.default_fitter = fit_optimize
+        self.default_fitter = fit_nnls
+        self.rank = rank
+        self.dtype = dtype
+        self.loadings = None
+        components = self.rdm_obj.get_vectors()
+        if rank is not None and rank < self.n_rdm:
+            self.loadings, components = _principal_components(components,
+                                                              rank)
+            self.rdm = None
+        self.components = components.astype(dtype or components.dtype,
+                                            copy=False)
+        if self.rdm is not None:
+            self.rdm = self.components
+        self._gram = None
+
+    @property
+    def gram(self):
+        """ gram matrix of the components (rank x rank), computed on first
+        use
+        """
+        if self._gram is None:
+            self._gram = _gram(self.components)
+        return self._gram
+
+    def component_weights(self, theta):
+        """ weights of the components for parameters theta
+
+        Args:
+            theta(numpy.ndarray): the model parameter vector (one dimensional)
+
+        Returns:
+            numpy.ndarray: weights of the components
+
+        """
+        theta = np.array(theta).reshape(-1)
+        if self.loadings is not None:
+            theta = self.loadings.T @ theta
+        return theta.astype(self.components.dtype, copy=False)
 
     def predict(self, theta=None):
         """ Returns the predicted rdm vector
@@ -236,8 +349,7 @@ class ModelWeighted(Model):
         """
         if theta is None:
             theta = np.ones(self.n_rdm)
-        theta = np.array(theta)
-        return np.matmul(self.rdm.T, theta.reshape(-1))
+        return np.matmul(self.components.T, self.component_weights(theta))
 
     def predict_rdm(self, theta=None):
         """ Returns the predicted rdm vector
@@ -254,8 +366,7 @@ class ModelWeighted(Model):
         if theta is None:
             theta = np.ones(self.n_rdm)
         theta = np.maximum(theta, 0)
-        theta = np.array(theta)
-        dissimilarities = np.matmul(self.rdm.T, theta.reshape(-1))
+        dissimilarities = self.predict(theta)
         rdms = RDMs(
             dissimilarities.reshape(1, -1),
             dissimilarity_measure=self.rdm_obj.dissimilarity_measure,
@@ -263,6 +374,43 @@ class ModelWeighted(Model):
             pattern_descriptors=self.rdm_obj.pattern_descriptors)
         return rdms
 
+    def predict_vectors(self, theta=None, pattern_index=None):
+        """ Returns the predicted rdm as a vector
+
+        The components are subsampled before they are weighted.
+
+        Args:
+            theta(numpy.ndarray): the model parameter vector (one dimensional)
+            pattern_index(numpy.ndarray): positions of the sampled patterns
+
+        Returns:
+            numpy.ndarray: rdm vectors (2D)
+
+        """
+        if theta is None:
+            theta = np.ones(self.n_rdm)
+        theta = np.maximum(theta, 0)
+        vectors = _subsample_vectors(self.components, pattern_index,
+                                     self.rdm_obj.n_cond)
+        return np.matmul(self.component_weights(theta).reshape(1, -1),
+                         vectors)
+
+    def to_dict(self):
+        """ Converts the model into a dictionary, which can be used for saving
+
+        Returns:
+            model_dict(dict): A dictionary containting all data needed to
+                recreate the object
+
+        """
+        model_dict = Model.to_dict(self)
+        model_dict['rank'] = self.rank
+        if self.dtype is None:
+            model_dict['dtype'] = None
+        else:
+            model_dict['dtype'] = np.dtype(self.dtype).name
+        return model_dict
+
 
 class ModelInterpolate(Model):
     """
@@ -333,6 +481,26 @@ class ModelInterpolate(Model):
             pattern_descriptors=self.rdm_obj.pattern_descriptors)
         return rdms
 
+    def predict_vectors(self, theta=None, pattern_index=None):
+        """ Returns the predicted rdm as a vector
+
+        The rdms are subsampled before they are weighted.
+
+        Args:
+            theta(numpy.ndarray): the model parameter vector (one dimensional)
+            pattern_index(numpy.ndarray): positions of the sampled patterns
+
+        Returns:
+            numpy.ndarray: rdm vectors (2D)
+
+        """
+        if theta is None:
+            theta = np.ones(self.n_rdm)
+        theta = np.maximum(theta, 0)
+        vectors = _subsample_vectors(self.rdm, pattern_index,
+                                     self.rdm_obj.n_cond)
+        return np.matmul(theta.reshape(1, -1), vectors)
+
 
 def model_from_dict(model_dict):
     """ recreates a model object from a dictionary
@@ -353,7 +521,31 @@ def model_from_dict(model_dict):
     elif model_dict['type'] == 'ModelSelect':
         model = ModelSelect(model_dict['name'], rdm_obj)
     elif model_dict['type'] == 'ModelWeighted':
-        model = ModelWeighted(model_dict['name'], rdm_obj)
+        model = ModelWeighted(model_dict['name'], rdm_obj,
+                              rank=model_dict.get('rank'),
+                              dtype=model_dict.get('dtype'))
     elif model_dict['type'] == 'ModelInterpolate':
         model = ModelInterpolate(model_dict['name'], rdm_obj)
     return model
+
+
+def _principal_components(vectors, rank):
+    """ compresses rdm vectors to their first rank principal components,
+    without centering, such that vectors ~ loadings @ components.
+    The components are computed from the eigenvectors of the smaller of
+    the two gram matrices of the vectors.
+
+    Returns:
+        numpy.ndarray: loadings (n_rdm x rank)
+        numpy.ndarray: components (rank x n_pairs)
+
+    """
+    if np.any(np.isnan(vectors)):
+        raise ValueError('rdms with nan entries cannot be compressed')
+    if vectors.shape[0] <= vectors.shape[1]:
+        _, eigvec = np.linalg.eigh(vectors @ vectors.T)
+        loadings = eigvec[:, ::-1][:, :rank]
+        return loadings, loadings.T @ vectors
+    _, eigvec = np.linalg.eigh(vectors.T @ vectors)
+    components = eigvec[:, ::-1][:, :rank].T
+    return vectors @ components.T, components
@@ -9,6 +9,7 @@ from scipy.stats._stats import _kendall_dis
 from pyrsa.util.matrix import pairwise_contrast_sparse
 from pyrsa.util.rdm_utils import _get_n_from_reduced_vectors
 from pyrsa.util.rdm_utils import _get_n_from_length
+from pyrsa.util.rdm_utils import _rank_vectors
 from pyrsa.util.matrix import row_col_indicator_g
 
 
@@ -156,8 +157,8 @@ def compare_spearman(rdm1, rdm2):
 
     """
     vector1, vector2, _ = _parse_input_rdms(rdm1, rdm2)
-    vector1 = np.apply_along_axis(scipy.stats.rankdata, 1, vector1)
-    vector2 = np.apply_along_axis(scipy.stats.rankdata, 1, vector2)
+    vector1 = _rank_vectors(vector1)
+    vector2 = _rank_vectors(vector2)
     vector1 = vector1 - np.mean(vector1, 1, keepdims=True)
     vector2 = vector2 - np.mean(vector2, 1, keepdims=True)
     sim = _cosine(vector1, vector2)
@@ -179,8 +180,8 @@ def compare_rho_a(rdm1, rdm2):
 
     """
     vector1, vector2, _ = _parse_input_rdms(rdm1, rdm2)
-    vector1 = np.apply_along_axis(scipy.stats.rankdata, 1, vector1)
-    vector2 = np.apply_along_axis(scipy.stats.rankdata, 1, vector2)
+    vector1 = _rank_vectors(vector1)
+    vector2 = _rank_vectors(vector2)
     vector1 = vector1 - np.mean(vector1, 1, keepdims=True)
     vector2 = vector2 - np.mean(vector2, 1, keepdims=True)
     n = vector1.shape[1]
@@ -400,6 +401,36 @@ def _cov_weighting(vector, nan_idx, sigma_k=None):
     return vector_w
 
 
+def _prepare_vectors(vectors, method, nan_idx=None):
+    """transforms rdm vectors linearly such that the cosine similarity of
+    the transformed vectors equals the similarity under method.
+    Possible only for cosine, corr, cosine_cov and corr_cov, the latter two
+    without sigma_k.
+
+    Args:
+        vectors (numpy.ndarray):
+            rdm vectors (2D) without the nan entries
+        method (string):
+            comparison method
+        nan_idx (numpy.ndarray):
+            vector of non-nan entries from input parsing
+
+    Returns:
+        numpy.ndarray: transformed vectors
+
+    """
+    if method not in ('cosine', 'corr', 'cosine_cov', 'corr_cov'):
+        raise ValueError('method ' + method + ' is no cosine similarity'
+                         + ' of linearly transformed vectors')
+    if method in ('corr', 'corr_cov'):
+        vectors = vectors - np.mean(vectors, 1, keepdims=True)
+    if method in ('cosine_cov', 'corr_cov'):
+        if nan_idx is None:
+            nan_idx = np.ones(vectors.shape[1], bool)
+        vectors = _cov_weighting(vectors, nan_idx)
+    return vectors
+
+
 def _cosine(vector1, vector2):
     """computes the cosine angles between two sets of vectors
 
@@ -7,9 +7,12 @@ Definition of RSA RDMs class and subclasses
 """
 
 import numpy as np
-from scipy.stats import rankdata
 from pyrsa.util.rdm_utils import batch_to_vectors
 from pyrsa.util.rdm_utils import batch_to_matrices
+from pyrsa.util.rdm_utils import _rank_vectors
+from pyrsa.util.rdm_utils import _subsample_selection
+from pyrsa.util.rdm_utils import _subsample_index
+from pyrsa.util.rdm_utils import _take_subsample
 from pyrsa.util.descriptor_utils import format_descriptor
 from pyrsa.util.descriptor_utils import bool_index
 from pyrsa.util.descriptor_utils import subset_descriptor
@@ -164,7 +167,9 @@ class RDMs:
         if by is None:
             by = 'index'
         selection = bool_index(self.pattern_descriptors[by], value)
-        dissimilarities = self.get_matrices()[:, selection][:, :, selection]
+        selection = np.nonzero(selection)[0]
+        index, _ = _subsample_index(selection, self.n_cond)
+        dissimilarities = self._take_vectors(index, len(selection))
         descriptors = self.descriptors
         pattern_descriptors = extract_dict(
             self.pattern_descriptors, selection)
@@ -200,18 +205,14 @@ class RDMs:
                 type(value) is list or
                 type(value) is tuple or
                 type(value) is np.ndarray):
-            desc = self.pattern_descriptors[by]
-            selection = [np.asarray(desc == i).nonzero()[0]
-                         for i in value]
-            selection = np.concatenate(selection)
+            selection = _subsample_selection(self.pattern_descriptors[by],
+                                             value)
         else:
-            selection = np.where(self.rdm_descriptors[by] == value)
-        selection = np.sort(selection)
-        dissimilarities = self.get_matrices()
-        for i_rdm in range(self.n_rdm):
-            np.fill_diagonal(dissimilarities[i_rdm], np.nan)
-        selection = np.sort(selection)
-        dissimilarities = dissimilarities[:, selection][:, :, selection]
+            selection = np.asarray(
+                self.pattern_descriptors[by] == value).nonzero()[0]
+        index, self_pair = _subsample_index(selection, self.n_cond)
+        dissimilarities = self._take_vectors(index, len(selection),
+                                             self_pair)
         descriptors = self.descriptors
         pattern_descriptors = extract_dict(
             self.pattern_descriptors, selection)
@@ -224,6 +225,38 @@ class RDMs:
                     dissimilarity_measure=dissimilarity_measure)
         return rdms
 
+    def _take_vectors(self, index, n_cond, self_pair=None):
+        """ applies a pattern subsampling index to the rdm vectors
+        returns matrices if there are too few patterns to infer the
+        number of patterns from the vectors
+        """
+        if n_cond < 2:
+            return np.zeros((self.n_rdm, n_cond, n_cond))
+        return _take_subsample(self.dissimilarities, index, self_pair)
+
+    def _take_positions(self, rdm_pos, pattern_pos):
+        """ Returns the RDMs at rdm positions subsampled to the patterns at
+        pattern positions in a single step. Repeated patterns are handled
+        as in subsample_pattern.
+        """
+        rdm_pos = np.asarray(rdm_pos, dtype=np.int64)
+        pattern_pos = np.asarray(pattern_pos, dtype=np.int64)
+        n_cond = len(pattern_pos)
+        if n_cond < 2:
+            dissimilarities = np.zeros((len(rdm_pos), n_cond, n_cond))
+        else:
+            index, self_pair = _subsample_index(pattern_pos, self.n_cond)
+            dissimilarities = _take_subsample(
+                self.dissimilarities[rdm_pos], index, self_pair)
+        rdms = RDMs(dissimilarities=dissimilarities,
+                    descriptors=self.descriptors,
+                    rdm_descriptors=extract_dict(self.rdm_descriptors,
+                                                 rdm_pos),
+                    pattern_descriptors=extract_dict(
+                        self.pattern_descriptors, pattern_pos),
+                    dissimilarity_measure=self.dissimilarity_measure)
+        return rdms
+
     def subset(self, by, value):
         """ Returns a set of fewer RDMs matching descriptor values
 
@@ -437,7 +470,7 @@ def rank_transform(rdms, method='average'):
     deals with rank ties and saves ranks as new dissimilarity estimates.
     As an effect, all non-diagonal entries of the RDM will
     range from 1 to (n_dim²-n_dim)/2, if the RDM has the dimensions
-    n_dim x n_dim.
+    n_dim x n_dim. nan entries are ignored for ranking and stay nan.
 
     Args:
         rdms(RDMs): RDMs object
@@ -449,9 +482,7 @@ def rank_transform(rdms, method='average'):
         rdms_new(RDMs): RDMs object with rank transformed dissimilarities
 
     """
-    dissimilarities = rdms.get_vectors()
-    dissimilarities = np.array([rankdata(dissimilarities[i], method=method)
-                                for i in range(rdms.n_rdm)])
+    dissimilarities = _rank_vectors(rdms.get_vectors(), method=method)
     rdms_new = RDMs(dissimilarities,
                     dissimilarity_measure=rdms.dissimilarity_measure,
                     descriptors=rdms.descriptors,
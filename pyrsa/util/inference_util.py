@@ -6,11 +6,12 @@ Inference module utilities
 
 import numpy as np
 import scipy.stats as stats
-from scipy.stats import rankdata, wilcoxon
+from scipy.stats import wilcoxon
 from pyrsa.model import Model
 from pyrsa.rdm import RDMs
 from .matrix import pairwise_contrast
 from .rdm_utils import batch_to_matrices
+from .rdm_utils import _rank_vectors
 from collections.abc import Iterable
 
 
@@ -83,48 +84,85 @@ def pool_rdm(rdms, method='cosine'):
             under the chosen method
 
     """
-    rdm_vec = rdms.get_vectors()
+    rdm_vec = _pool_normalize(rdms.get_vectors(), method)
+    rdm_vec = _pool_finish(_nan_mean(rdm_vec), method)
+    return RDMs(rdm_vec,
+                dissimilarity_measure=rdms.dissimilarity_measure,
+                descriptors=rdms.descriptors,
+                rdm_descriptors=None,
+                pattern_descriptors=rdms.pattern_descriptors)
+
+
+def _cached_pool(rdms, method='cosine', pool_cache=None):
+    """ pool_rdm memoized per rdms object and method in pool_cache, a dict
+    owned by the caller, which lives for one evaluation run.
+    The cache keeps a reference to rdms, such that its id stays unique.
+
+    Args:
+        rdms (pyrsa.rdm.RDMs): RDMs to be pooled
+        method (String): comparison method
+        pool_cache (dict): cache to use. None computes the pool directly
+
+    Returns:
+        pyrsa.rdm.RDMs: the pooled RDM
+
+    """
+    if pool_cache is None:
+        return pool_rdm(rdms, method=method)
+    key = (id(rdms), method)
+    if key not in pool_cache:
+        pool_cache[key] = (rdms, pool_rdm(rdms, method=method))
+    return pool_cache[key][1]
+
+
+def _pool_normalize(rdm_vec, method='cosine'):
+    """ normalizes each rdm vector as required for pooling them by
+    averaging under the given comparison method.
+    The mean of the normalized vectors is turned into the pooled rdm
+    by _pool_finish.
+
+    Args:
+        rdm_vec(numpy.ndarray): rdm vectors (n_rdm x n_dissimilarities)
+        method(String): comparison method
+
+    Returns:
+        numpy.ndarray: normalized rdm vectors
+
+    """
     if method == 'euclid':
-        rdm_vec = _nan_mean(rdm_vec)
+        pass
     elif method == 'cosine':
         rdm_vec = rdm_vec / np.sqrt(np.nanmean(rdm_vec ** 2, axis=1,
                                                keepdims=True))
-        rdm_vec = _nan_mean(rdm_vec)
     elif method == 'corr':
         rdm_vec = rdm_vec - np.nanmean(rdm_vec, axis=1, keepdims=True)
         rdm_vec = rdm_vec / np.nanstd(rdm_vec, axis=1, keepdims=True)
-        rdm_vec = _nan_mean(rdm_vec)
-        rdm_vec = rdm_vec - np.nanmin(rdm_vec)
     elif method == 'cosine_cov':
         rdm_vec = rdm_vec / np.sqrt(np.nanmean(rdm_vec ** 2, axis=1,
                                                keepdims=True))
-        rdm_vec = _nan_mean(rdm_vec)
     elif method == 'corr_cov':
         rdm_vec = rdm_vec - np.nanmean(rdm_vec, axis=1, keepdims=True)
         rdm_vec = rdm_vec / np.nanstd(rdm_vec, axis=1, keepdims=True)
-        rdm_vec = _nan_mean(rdm_vec)
-        rdm_vec = rdm_vec - np.nanmin(rdm_vec)
     elif method == 'spearman' or method == 'rho-a':
-        rdm_vec = np.array([_nan_rank_data(v) for v in rdm_vec])
-        rdm_vec = _nan_mean(rdm_vec)
+        rdm_vec = _rank_vectors(rdm_vec)
     elif method == 'rho-a':
-        rdm_vec = np.array([_nan_rank_data(v) for v in rdm_vec])
-        rdm_vec = _nan_mean(rdm_vec)
+        rdm_vec = _rank_vectors(rdm_vec)
     elif method == 'kendall' or method == 'tau-b':
         Warning('Noise ceiling for tau based on averaged ranks!')
-        rdm_vec = np.array([_nan_rank_data(v) for v in rdm_vec])
-        rdm_vec = _nan_mean(rdm_vec)
+        rdm_vec = _rank_vectors(rdm_vec)
     elif method == 'tau-a':
         Warning('Noise ceiling for tau based on averaged ranks!')
-        rdm_vec = np.array([_nan_rank_data(v) for v in rdm_vec])
-        rdm_vec = _nan_mean(rdm_vec)
+        rdm_vec = _rank_vectors(rdm_vec)
     else:
         raise ValueError('Unknown RDM comparison method requested!')
-    return RDMs(rdm_vec,
-                dissimilarity_measure=rdms.dissimilarity_measure,
-                descriptors=rdms.descriptors,
-                rdm_descriptors=None,
-                pattern_descriptors=rdms.pattern_descriptors)
+    return rdm_vec
+
+
+def _pool_finish(rdm_mean, method='cosine'):
+    """ turns the mean of normalized rdm vectors into the pooled rdm """
+    if method in ('corr', 'corr_cov'):
+        rdm_mean = rdm_mean - np.nanmin(rdm_mean)
+    return rdm_mean
 
 
 def _nan_mean(rdm_vector):
@@ -145,23 +183,6 @@ def _nan_mean(rdm_vector):
     return rdm_mean
 
 
-def _nan_rank_data(rdm_vector):
-    """ rank_data for vectors with nan entries
-
-    Args:
-        rdm_vector(numpy.ndarray): the vector to be rank_transformed
-
-    Returns:
-        ranks(numpy.ndarray): the ranks with nans where the original vector
-            had nans
-
-    """
-    ranks_no_nan = rankdata(rdm_vector[~np.isnan(rdm_vector)])
-    ranks = np.ones_like(rdm_vector) * np.nan
-    ranks[~np.isnan(rdm_vector)] = ranks_no_nan
-    return ranks
-
-
 def all_tests(evaluations, noise_ceil, test_type='t-test',
               model_var=None, diff_var=None, noise_ceil_var=None,
               dof=1):
@@ -110,3 +110,157 @@ def add_pattern_index(rdms, pattern_descriptor):
     pattern_select = rdms.pattern_descriptors[pattern_descriptor]
     pattern_select = np.unique(pattern_select)
     return pattern_descriptor, pattern_select
+
+
+def _rank_vectors(x, method='average', axis=-1):
+    """
+    rank transforms a whole stack of vectors at once.
+    Equivalent to applying scipy.stats.rankdata to each vector along axis,
+    but uses a single argsort over the stack. nan entries are excluded
+    from the ranking and stay nan in the output.
+
+    Args:
+        **x**(np.ndarray): stack of vectors to be ranked
+        **method**(String): how ties are handled, options are:
+            'average', 'min', 'max', 'dense', 'ordinal'
+        **axis**(int): axis along which to rank
+
+    Returns:
+        np.ndarray: ranks, same shape as x
+
+    """
+    x = np.moveaxis(np.asarray(x, dtype=np.float64), axis, -1)
+    shape = x.shape
+    x = x.reshape(-1, shape[-1])
+    n = x.shape[1]
+    # stable sort puts nans last and keeps ordinal ranks equal to scipy's
+    order = np.argsort(x, axis=1, kind='mergesort')
+    x_sorted = np.take_along_axis(x, order, axis=1)
+    position = np.broadcast_to(np.arange(n), x.shape)
+    if method == 'ordinal':
+        ranks_sorted = position + 1.0
+    else:
+        new_value = np.ones(x.shape, bool)
+        new_value[:, 1:] = x_sorted[:, 1:] != x_sorted[:, :-1]
+        if method == 'dense':
+            ranks_sorted = np.cumsum(new_value, axis=1).astype(np.float64)
+        else:
+            # first and last position of the tie group of each entry
+            first = np.maximum.accumulate(
+                np.where(new_value, position, 0), axis=1)
+            last_value = np.ones(x.shape, bool)
+            last_value[:, :-1] = new_value[:, 1:]
+            last = np.minimum.accumulate(
+                np.where(last_value, position, n)[:, ::-1], axis=1)[:, ::-1]
+            if method == 'average':
+                ranks_sorted = (first + last) / 2 + 1
+            elif method == 'min':
+                ranks_sorted = first + 1.0
+            elif method == 'max':
+                ranks_sorted = last + 1.0
+            else:
+                raise ValueError('unknown method for rank transform: '
+                                 + str(method))
+    ranks = np.empty(x.shape)
+    np.put_along_axis(ranks, order, ranks_sorted, axis=1)
+    ranks[np.isnan(x)] = np.nan
+    return np.moveaxis(ranks.reshape(shape), -1, axis)
+
+
+def _subsample_selection(descriptor, values, sort=True):
+    """
+    finds the positions of all entries of descriptor matching values,
+    repeating positions for repeated values, as used by subsample_pattern.
+    The positions are returned in sorted order or, as used by subsample,
+    in the order of values.
+
+    Args:
+        **descriptor**(np.ndarray): descriptor vector
+        **values**(np.ndarray): sampled descriptor values
+        **sort**(bool): whether to sort the positions
+
+    Returns:
+        np.ndarray: selection: positions
+
+    """
+    descriptor = np.asarray(descriptor)
+    values = np.asarray(values)
+    order = np.argsort(descriptor, kind='stable')
+    descriptor_sorted = descriptor[order]
+    start = np.searchsorted(descriptor_sorted, values, side='left')
+    end = np.searchsorted(descriptor_sorted, values, side='right')
+    counts = end - start
+    offsets = np.repeat(start - np.cumsum(counts) + counts, counts)
+    selection = order[offsets + np.arange(np.sum(counts))]
+    if sort:
+        return np.sort(selection)
+    return selection
+
+
+def _subsample_index(selection, n_cond):
+    """
+    computes the indices into the vector form of an RDM, which yield the
+    vector form of the RDM subsampled to the patterns in selection.
+    Pairs of a pattern with a copy of itself have no entry in the original
+    vector and are marked in self_pair instead.
+
+    Args:
+        **selection**(np.ndarray): sampled pattern positions
+        **n_cond**(int): number of patterns in the original RDM
+
+    Returns:
+        tuple: **index** (np.ndarray): indices into the original vectors
+
+        **self_pair** (np.ndarray): boolean mask of self-pairs
+
+    """
+    selection = np.asarray(selection, dtype=np.int64)
+    row, col = np.triu_indices(len(selection), 1)
+    i = np.minimum(selection[row], selection[col])
+    j = np.maximum(selection[row], selection[col])
+    self_pair = i == j
+    index = n_cond * i - (i * (i + 1)) // 2 + j - i - 1
+    index[self_pair] = 0
+    return index, self_pair
+
+
+def _take_subsample(vectors, index, self_pair=None):
+    """
+    applies a subsampling index to a stack of RDM vectors,
+    setting self-pairs to nan
+
+    Args:
+        **vectors**(np.ndarray): stack of RDM vectors (2D)
+        **index**(np.ndarray): indices from _subsample_index
+        **self_pair**(np.ndarray): self-pair mask from _subsample_index
+
+    Returns:
+        np.ndarray: subsampled vectors
+
+    """
+    vectors = np.take(vectors, index, axis=-1)
+    if self_pair is not None and np.any(self_pair):
+        vectors = vectors.astype(np.float64, copy=False)
+        vectors[..., self_pair] = np.nan
+    return vectors
+
+
+def _subsample_vectors(vectors, selection, n_cond):
+    """
+    subsamples RDM vectors to the patterns at the positions in selection
+    as subsample_pattern does, without creating an RDMs object
+
+    Args:
+        **vectors**(np.ndarray): RDM vectors
+        **selection**(np.ndarray): sampled pattern positions or None to
+        keep all patterns
+        **n_cond**(int): number of patterns in the original RDM
+
+    Returns:
+        np.ndarray: subsampled vectors
+
+    """
+    if selection is None:
+        return vectors
+    index, self_pair = _subsample_index(selection, n_cond)
+    return _take_subsample(vectors, index, self_pair)
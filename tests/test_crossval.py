@@ -48,11 +48,56 @@ class TestCrossval(unittest.TestCase):
         crossval(m, rdms, train_set, test_set, ceil_set,
                  pattern_descriptor='type')
 
+    def test_crossval_n_jobs(self):
+        from pyrsa.inference import crossval, sets_k_fold
+        from pyrsa.model import ModelSelect
+        m_select = ModelSelect('select', self.rdms[[0, 1, 2]])
+        train_set, test_set, ceil_set = sets_k_fold(
+            self.rdms, k_rdm=2, k_pattern=2, rdm_descriptor='session')
+        res = crossval([self.m, m_select], self.rdms, train_set, test_set,
+                       ceil_set, method='corr')
+        res_par = crossval([self.m, m_select], self.rdms, train_set,
+                           test_set, ceil_set, method='corr', n_jobs=2)
+        np.testing.assert_allclose(res.evaluations, res_par.evaluations)
+        np.testing.assert_allclose(res.noise_ceiling, res_par.noise_ceiling)
+
+    def test_model_chunks(self):
+        from pyrsa.inference.evaluate import _model_chunks
+        assert len(_model_chunks(50, 4, 1)) == 1
+        for n_models, n_folds, n_jobs in [(50, 4, 8), (3, 1, 8), (7, 9, 2)]:
+            chunks = _model_chunks(n_models, n_folds, n_jobs)
+            assert len(chunks) * n_folds >= min(n_jobs, n_models * n_folds)
+            np.testing.assert_array_equal(np.concatenate(chunks),
+                                          np.arange(n_models))
+
+    def test_crossval_theta0(self):
+        from pyrsa.inference import crossval, sets_k_fold
+        from pyrsa.model import ModelWeighted, fit_mock, fit_optimize
+        m_weighted = ModelWeighted('weighted', self.rdms[[0, 1, 2]])
+        fitter = [fit_mock, fit_optimize]
+        train_set, test_set, _ = sets_k_fold(
+            self.rdms, k_rdm=2, k_pattern=2, rdm_descriptor='session')
+        res = [crossval([self.m, m_weighted], self.rdms, train_set,
+                        test_set, method='corr', fitter=fitter,
+                        calc_noise_ceil=False) for _ in range(2)]
+        np.testing.assert_array_equal(res[0].evaluations,
+                                      res[1].evaluations)
+        self.assertEqual(res[0].fit_iterations.shape, (2, 4))
+        assert np.all(res[0].fit_iterations[1] > 0)
+        theta0 = fit_optimize(m_weighted, self.rdms, method='corr')
+        res_warm = crossval([self.m, m_weighted], self.rdms, train_set,
+                            test_set, method='corr', fitter=fitter,
+                            calc_noise_ceil=False, theta0=[None, theta0])
+        assert np.all(np.isfinite(res_warm.evaluations))
+
     def test_eval_fancy(self):
         from pyrsa.inference import eval_fancy
-        eval_fancy(self.m, self.rdms, N=10, k_rdm=2, k_pattern=2,
-                   pattern_descriptor='type',
-                   rdm_descriptor='session')
+        res = eval_fancy(self.m, self.rdms, N=10, k_rdm=2, k_pattern=2,
+                         pattern_descriptor='type',
+                         rdm_descriptor='session')
+        self.assertEqual(res.evaluations.shape, (10, 1, 4, 6))
+        self.assertEqual(res.noise_ceiling.shape, (2, 10, 2))
+        self.assertEqual(res.variances.shape, (3, 3, 3))
 
     def test_bootstrap_crossval(self):
         from pyrsa.inference import bootstrap_crossval
@@ -98,6 +143,75 @@ class TestCrossval(unittest.TestCase):
             rdm_descriptor='session')
         self.assertEqual(res.evaluations.shape[0], 10)
 
+    def test_bootstrap_crossval_seed(self):
+        from pyrsa.inference import bootstrap_crossval
+        res1 = bootstrap_crossval(self.m, self.rdms, N=6, k_rdm=2,
+                                  k_pattern=2, pattern_descriptor='type',
+                                  rdm_descriptor='session', seed=5)
+        res2 = bootstrap_crossval(self.m, self.rdms, N=6, k_rdm=2,
+                                  k_pattern=2, pattern_descriptor='type',
+                                  rdm_descriptor='session', seed=5,
+                                  n_jobs=2)
+        np.testing.assert_array_equal(res1.evaluations, res2.evaluations)
+        np.testing.assert_array_equal(res1.noise_ceiling, res2.noise_ceiling)
+
+    def test_bootstrap_crossval_streaming(self):
+        from pyrsa.inference import bootstrap_crossval
+        res = bootstrap_crossval(self.m, self.rdms, N=12, k_rdm=2,
+                                 k_pattern=2, n_cv=3, seed=5)
+        res_stream = bootstrap_crossval(self.m, self.rdms, N=12, k_rdm=2,
+                                        k_pattern=2, n_cv=3, seed=5,
+                                        streaming=True, batch_size=5)
+        np.testing.assert_allclose(res.variances, res_stream.variances,
+                                   atol=1e-12)
+        np.testing.assert_allclose(np.mean(res.evaluations, 0),
+                                   res_stream.evaluations[0])
+        self.assertEqual(res_stream.n_samples, 12)
+        res_thin = bootstrap_crossval(self.m, self.rdms, N=12, k_rdm=2,
+                                      k_pattern=2, n_cv=3, seed=5,
+                                      streaming=True, thinning=4,
+                                      batch_size=5)
+        np.testing.assert_array_equal(res.evaluations[::4],
+                                      res_thin.evaluations)
+
+    def test_bootstrap_crossval_methods(self):
+        from pyrsa.inference import bootstrap_crossval
+        results = bootstrap_crossval(self.m, self.rdms, N=5, k_rdm=2,
+                                     k_pattern=2, seed=2,
+                                     method=['cosine', 'corr'])
+        self.assertEqual(len(results), 2)
+        for method, res in zip(['cosine', 'corr'], results):
+            res_single = bootstrap_crossval(self.m, self.rdms, N=5, k_rdm=2,
+                                            k_pattern=2, seed=2,
+                                            method=method)
+            self.assertEqual(res.method, method)
+            np.testing.assert_allclose(res.evaluations,
+                                       res_single.evaluations)
+            np.testing.assert_allclose(res.noise_ceiling,
+                                       res_single.noise_ceiling)
+            np.testing.assert_allclose(res.variances, res_single.variances)
+
+    def test_bootstrap_crossval_checkpoint(self):
+        import os
+        import tempfile
+        from pyrsa.inference import bootstrap_crossval
+        res = bootstrap_crossval(self.m, self.rdms, N=7, k_rdm=2,
+                                 k_pattern=2, seed=3)
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = os.path.join(directory, 'checkpoint.h5')
+            # an interrupted run
+            bootstrap_crossval(self.m, self.rdms, N=4, k_rdm=2, k_pattern=2,
+                               seed=3, checkpoint=checkpoint,
+                               checkpoint_interval=2)
+            res_resumed = bootstrap_crossval(
+                self.m, self.rdms, N=7, k_rdm=2, k_pattern=2,
+                checkpoint=checkpoint, checkpoint_interval=2)
+        np.testing.assert_array_equal(res.evaluations,
+                                      res_resumed.evaluations)
+        np.testing.assert_array_equal(res.noise_ceiling,
+                                      res_resumed.noise_ceiling)
+        np.testing.assert_array_equal(res.variances, res_resumed.variances)
+
     def test_bootstrap_crossval_pattern(self):
         from pyrsa.inference import bootstrap_crossval
         rdms = self.rdms
@@ -133,6 +247,16 @@ class TestCrossval(unittest.TestCase):
                            pattern_descriptor='type',
                            rdm_descriptor='session')
 
+    def test_bootstrap_crossval_invalid(self):
+        from pyrsa.inference import bootstrap_crossval
+        from pyrsa.rdm import RDMs
+        from pyrsa.model import ModelFixed
+        rdms = RDMs(np.random.rand(3, 15))
+        m = ModelFixed('test', np.random.rand(15))
+        res = bootstrap_crossval([m], rdms, N=5, k_pattern=2, k_rdm=1)
+        self.assertEqual(res.variances.shape, (3, 3))
+        self.assertTrue(np.all(np.isnan(res.variances)))
+
     def test_bootstrap_crossval_list(self):
         from pyrsa.inference import bootstrap_crossval
         from pyrsa.model import ModelFixed
@@ -143,6 +267,17 @@ class TestCrossval(unittest.TestCase):
                            pattern_descriptor='type',
                            rdm_descriptor='session')
 
+    def test_concat_sampling(self):
+        from pyrsa.inference.evaluate import _concat_sampling
+        sample1 = np.array([3, 1, 1, 5, 3, 3, 0])
+        sample2 = np.array([5, 2, 3, 1])
+        np.testing.assert_array_equal(
+            _concat_sampling(sample1, sample2), [5, 3, 3, 3, 1, 1])
+        np.testing.assert_array_equal(
+            _concat_sampling(['b', 'a', 'b'], ['a', 'c', 'b']),
+            ['a', 'b', 'b'])
+        self.assertEqual(len(_concat_sampling([], sample2)), 0)
+
     def test_leave_one_out_pattern(self):
         from pyrsa.inference import sets_leave_one_out_pattern
         import pyrsa.rdm as rsr
@@ -217,6 +352,32 @@ class TestCrossval(unittest.TestCase):
         assert test_set[0][0].n_cond == 2
         assert test_set[1][0].n_cond == 3
 
+    def test_fold_lazy(self):
+        from pyrsa.inference import sets_random
+        import pyrsa.rdm as rsr
+        rdm_des = {'session': np.array([0, 1, 2, 2, 4, 5, 6, 7])}
+        pattern_des = {'category': np.array([0, 1, 2, 2, 3])}
+        rdms = rsr.RDMs(dissimilarities=np.random.rand(8, 10),
+                        rdm_descriptors=rdm_des,
+                        pattern_descriptors=pattern_des)
+        train_set, test_set, ceil_set = sets_random(
+            rdms, n_rdm=2, n_pattern=1, n_cv=2,
+            pattern_descriptor='category', rdm_descriptor='session')
+        for train, ceil in zip(train_set, ceil_set):
+            self.assertIsNone(train._rdms)
+            self.assertEqual(len(train), 2)
+            self.assertEqual(train.n_cond, train[0].n_cond)
+            rdms_ceil, pattern_idx = ceil
+            expected = rdms.subsample(
+                'session',
+                np.unique(train[0].rdm_descriptors['session'])
+            ).subset_pattern('category', pattern_idx)
+            np.testing.assert_array_equal(
+                np.sort(rdms_ceil.get_vectors(), axis=0),
+                np.sort(expected.get_vectors(), axis=0))
+            ceil[1] = [0]
+            self.assertEqual(ceil.pattern_idx, [0])
+
     def test_k_fold_rdm(self):
         from pyrsa.inference import sets_k_fold_rdm
         import pyrsa.rdm as rsr
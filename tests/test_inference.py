@@ -87,6 +87,28 @@ class TestBootstrap(unittest.TestCase):
         rdm_sample = bootstrap_sample_pattern(rdms)
         assert rdm_sample[0].n_cond == 5
 
+    def test_pattern_sample_index(self):
+        from pyrsa.inference import bootstrap_sample_pattern
+        from pyrsa.inference.bootstrap import pattern_sample_index
+        from pyrsa.util.rdm_utils import _take_subsample
+        from pyrsa.rdm import RDMs
+        rdms = RDMs(np.random.rand(11, 10))  # 11 5x5 rdms
+        rdm_sample, pattern_idx = bootstrap_sample_pattern(rdms)
+        index, self_pair = pattern_sample_index(rdms, 'index', pattern_idx)
+        vectors = _take_subsample(rdms.get_vectors(), index, self_pair)
+        np.testing.assert_array_equal(vectors, rdm_sample.get_vectors())
+
+    def test_bootstrap_weights(self):
+        from pyrsa.inference.bootstrap import bootstrap_weights
+        from pyrsa.rdm import RDMs
+        rdm_des = {'session': np.array([1, 1, 2, 2, 4, 5, 6, 7, 7, 7, 7])}
+        rdms = RDMs(np.random.rand(11, 10), rdm_descriptors=rdm_des)
+        weights = bootstrap_weights(rdms, 'session', N=20)
+        assert weights.shape == (20, 11)
+        np.testing.assert_array_equal(weights[:, 0], weights[:, 1])
+        np.testing.assert_array_equal(weights[:, 8:], weights[:, 7:-1])
+        assert np.all(np.sum(weights[:, [0, 2, 4, 5, 6, 7]], 1) == 6)
+
 
 class TestEvaluation(unittest.TestCase):
     """ evaluation tests
@@ -125,6 +147,122 @@ class TestEvaluation(unittest.TestCase):
         eval_bootstrap_rdm(m, rdms, N=10)
         eval_bootstrap_rdm(m, rdms, N=10, boot_noise_ceil=True)
 
+    def test_eval_weights(self):
+        from pyrsa.inference.evaluate import _eval_weights, _rdm_groups
+        from pyrsa.inference.noise_ceiling import boot_noise_ceiling
+        from pyrsa.rdm import RDMs, compare
+        rdm_des = {'session': np.array([0, 1, 2, 2, 4, 5, 6, 7, 7, 7, 7])}
+        rdms = RDMs(np.random.rand(11, 10), rdm_descriptors=rdm_des)
+        pred = np.random.rand(1, 10)
+        weights = np.array([[0, 1, 2, 2, 0, 1, 0, 1, 1, 1, 1],
+                            [1, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1]])
+        groups = _rdm_groups(rdms, 'session')
+        for method in ['cosine', 'corr']:
+            evals, noise_ceil = _eval_weights(
+                [pred], rdms.get_vectors(), weights, groups, [method], True)
+            for i in range(2):
+                sample = rdms[np.repeat(np.arange(11), weights[i])]
+                np.testing.assert_allclose(
+                    evals[i, 0], np.mean(compare(pred, sample, method)))
+                np.testing.assert_allclose(
+                    noise_ceil[i],
+                    boot_noise_ceiling(sample, method, 'session'))
+
+    def test_eval_bootstrap_methods(self):
+        from pyrsa.inference import eval_bootstrap
+        from pyrsa.rdm import RDMs
+        from pyrsa.model import ModelFixed
+        rdms = RDMs(np.random.rand(11, 45))  # 11 10x10 rdms
+        m = ModelFixed('test', rdms.get_vectors()[0])
+        methods = ['cosine', 'spearman']
+        results = eval_bootstrap(m, rdms, N=10, method=methods, seed=4)
+        for method, res in zip(methods, results):
+            res_single = eval_bootstrap(m, rdms, N=10, method=method, seed=4)
+            self.assertEqual(res.method, method)
+            np.testing.assert_allclose(res.evaluations,
+                                       res_single.evaluations)
+            np.testing.assert_allclose(res.noise_ceiling,
+                                       res_single.noise_ceiling)
+
+    def test_eval_bootstrap_precision(self):
+        from pyrsa.inference import eval_bootstrap_pattern
+        from pyrsa.rdm import RDMs
+        from pyrsa.model import ModelFixed
+        rdms = RDMs(np.random.rand(11, 45))  # 11 10x10 rdms
+        m = ModelFixed('test', rdms.get_vectors()[0])
+        res = eval_bootstrap_pattern(m, rdms, N=1000, method='spearman',
+                                     seed=1, precision=0.3, batch_size=20)
+        assert res.n_samples < 1000
+        assert res.n_samples % 20 == 0
+        assert res.precision <= 0.3
+        res_fixed = eval_bootstrap_pattern(m, rdms, N=res.n_samples,
+                                           method='spearman', seed=1)
+        np.testing.assert_array_equal(res.evaluations,
+                                      res_fixed.evaluations)
+
+    def test_eval_bootstrap_plan(self):
+        from pyrsa.inference import eval_bootstrap
+        from pyrsa.inference import bootstrap_crossval
+        from pyrsa.inference import ResamplingPlan
+        from pyrsa.rdm import RDMs
+        from pyrsa.model import ModelFixed
+        rdms = RDMs(np.random.rand(11, 45),  # 11 10x10 rdms
+                    rdm_descriptors={'session': np.array(
+                        [0, 1, 2, 2, 4, 5, 6, 7, 7, 7, 7])})
+        m = ModelFixed('test', rdms.get_vectors()[0])
+        plan = ResamplingPlan(rdms, N=8, rdm_descriptor='session')
+        for method in ['cosine', 'rho-a']:
+            res = eval_bootstrap(m, rdms, method=method,
+                                 rdm_descriptor='session', plan=plan)
+            res_again = eval_bootstrap(m, rdms, method=method,
+                                       rdm_descriptor='session', plan=plan)
+            np.testing.assert_array_equal(res.evaluations,
+                                          res_again.evaluations)
+        res = bootstrap_crossval(m, rdms, k_rdm=2, k_pattern=2,
+                                 rdm_descriptor='session', plan=plan)
+        res_parallel = bootstrap_crossval(m, rdms, k_rdm=2,
+                                          k_pattern=2,
+                                          rdm_descriptor='session',
+                                          plan=plan, n_jobs=2)
+        np.testing.assert_array_equal(res.evaluations,
+                                      res_parallel.evaluations)
+        self.assertEqual(res.evaluations.shape[0], 8)
+
+    def test_eval_bootstrap_seed(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from pyrsa.inference import eval_bootstrap
+        from pyrsa.rdm import RDMs
+        from pyrsa.model import ModelFixed
+        rdms = RDMs(np.random.rand(11, 10))  # 11 5x5 rdms
+        m = ModelFixed('test', rdms.get_vectors()[0])
+        res1 = eval_bootstrap(m, rdms, N=10, seed=2)
+        res2 = eval_bootstrap(m, rdms, N=10, seed=2, n_jobs=2)
+        with ThreadPoolExecutor(3) as executor:
+            res3 = eval_bootstrap(m, rdms, N=10, seed=2, n_jobs=3,
+                                  executor=executor)
+        np.testing.assert_array_equal(res1.evaluations, res2.evaluations)
+        np.testing.assert_array_equal(res1.noise_ceiling, res2.noise_ceiling)
+        np.testing.assert_array_equal(res1.evaluations, res3.evaluations)
+
+    def test_eval_bootstrap_rdm_seed(self):
+        from pyrsa.inference import eval_bootstrap_rdm
+        from pyrsa.rdm import RDMs
+        from pyrsa.model import ModelFixed
+        rdms = RDMs(np.random.rand(11, 10))  # 11 5x5 rdms
+        m = ModelFixed('test', rdms.get_vectors()[0])
+        res = eval_bootstrap_rdm(m, rdms, N=10, seed=2)
+        res_parallel = eval_bootstrap_rdm(m, rdms, N=10, seed=2, n_jobs=2)
+        res_precision = eval_bootstrap_rdm(m, rdms, N=10, seed=2,
+                                           precision=1e-6, batch_size=5)
+        # with spearman the samples are evaluated as copies of the rdms
+        res_loop, _ = eval_bootstrap_rdm(m, rdms, N=10, seed=2,
+                                         method=['cosine', 'spearman'])
+        np.testing.assert_allclose(res.evaluations, res_parallel.evaluations)
+        np.testing.assert_allclose(res.evaluations,
+                                   res_precision.evaluations)
+        np.testing.assert_allclose(res.evaluations, res_loop.evaluations)
+        np.testing.assert_allclose(res.noise_ceiling, res_loop.noise_ceiling)
+
     def test_bootstrap_testset(self):
         from pyrsa.inference import bootstrap_testset
         from pyrsa.rdm import RDMs
@@ -209,6 +347,27 @@ class TestEvaluationLists(unittest.TestCase):
         bootstrap_testset([m, m2], rdms, method='cosine', fitter=None, N=100,
                           pattern_descriptor=None, rdm_descriptor=None)
 
+    def test_bootstrap_testset_models(self):
+        from pyrsa.inference import bootstrap_testset
+        from pyrsa.rdm import RDMs
+        from pyrsa.model import ModelFixed, ModelSelect
+        rdms = RDMs(np.random.rand(11, 45))  # 11 10x10 rdms
+        m = ModelFixed('test', rdms.get_vectors()[0])
+        m2 = ModelFixed('test2', rdms.get_vectors()[1])
+        evaluations, _, _ = bootstrap_testset(
+            [m, m2], rdms, method='cosine', N=20)
+        valid = ~np.isnan(evaluations[:, 0])
+        assert np.any(evaluations[valid, 0] != evaluations[valid, 1])
+        m_select = ModelSelect('select', rdms[[0, 1, 2]])
+        np.random.seed(3)
+        serial = bootstrap_testset([m_select, m], rdms, method='cosine',
+                                   N=10)
+        np.random.seed(3)
+        parallel = bootstrap_testset([m_select, m], rdms, method='cosine',
+                                     N=10, n_jobs=2)
+        for result_serial, result_parallel in zip(serial, parallel):
+            np.testing.assert_array_equal(result_serial, result_parallel)
+
     def test_bootstrap_testset_pattern(self):
         from pyrsa.inference import bootstrap_testset_pattern
         from pyrsa.rdm import RDMs
@@ -317,6 +476,28 @@ class TestSaveLoad(unittest.TestCase):
         assert res_loaded.cv_method == cv_method
         assert np.all(res_loaded.evaluations == evaluations)
 
+    def test_save_load_plan(self):
+        from pyrsa.rdm import RDMs
+        from pyrsa.inference import ResamplingPlan
+        from pyrsa.inference import load_plan
+        import io
+        rdms = RDMs(
+            np.random.rand(4, 10),
+            pattern_descriptors={
+                'test': ['test1', 'test1', 'test2', 'test3', 'test']})
+        plan = ResamplingPlan(rdms, N=5, pattern_descriptor='test', seed=2)
+        f = io.BytesIO()  # Essentially a Mock file
+        plan.save(f, file_type='hdf5')
+        plan_loaded = load_plan(f, file_type='hdf5')
+        assert plan_loaded.pattern_descriptor == 'test'
+        for i_sample in range(5):
+            sample = plan.sample(i_sample)
+            sample_loaded = plan_loaded.sample(i_sample)
+            assert np.all(sample.rdm_idx == sample_loaded.rdm_idx)
+            assert np.all(sample.pattern_idx == sample_loaded.pattern_idx)
+            assert np.all(sample.pattern_order
+                          == sample_loaded.pattern_order)
+
 
 class TestsPairTests(unittest.TestCase):
 
@@ -15,6 +15,68 @@ class TestModel(unittest.TestCase):
     def test_creation(self):
         m = model.Model('Test Model')
 
+    def test_predict_vectors(self):
+        from pyrsa.rdm import RDMs
+        rdms = RDMs(np.random.rand(3, 15))
+        pattern_index = np.array([0, 2, 2, 5])
+        models = [(model.ModelFixed('fixed', rdms), None),
+                  (model.ModelSelect('select', rdms), 1),
+                  (model.ModelWeighted('weighted', rdms),
+                   np.array([0.5, -1, 2])),
+                  (model.ModelInterpolate('interpolate', rdms),
+                   np.array([0, 0.3, 0.7]))]
+        for m, theta in models:
+            pred = m.predict_rdm(theta)
+            np.testing.assert_allclose(m.predict_vectors(theta),
+                                       pred.get_vectors())
+            np.testing.assert_allclose(
+                m.predict_vectors(theta, pattern_index),
+                pred.subsample_pattern('index', pattern_index).get_vectors())
+
+
+class TestPredictionCache(unittest.TestCase):
+    """ Tests for the caching of predictions
+    """
+
+    def test_lru(self):
+        import pickle
+        cache = model.PredictionCache(max_bytes=2 * 80)
+        for i in [0, 1, 0, 2]:
+            value = cache.get(i, lambda: np.full(10, i, dtype=float))
+            assert np.all(value == i)
+        assert cache.hits == 1 and cache.misses == 3
+        assert set(cache._entries) == {0, 2}
+        assert cache.n_bytes == 160
+        self.assertRaises(ValueError, value.__setitem__, 0, 1)
+        copied = pickle.loads(pickle.dumps(cache))
+        assert len(copied) == 0 and copied.max_bytes == cache.max_bytes
+
+    def test_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+        cache = model.PredictionCache(max_bytes=5 * 80)
+
+        def request(i):
+            return cache.get(i % 13, lambda: np.full(10, i % 13, float))[0]
+        with ThreadPoolExecutor(8) as executor:
+            values = list(executor.map(request, range(2000)))
+        np.testing.assert_array_equal(values, np.arange(2000) % 13)
+        assert cache.n_bytes == sum(
+            value.nbytes for value in cache._entries.values())
+        assert cache.n_bytes <= cache.max_bytes
+
+    def test_context(self):
+        from pyrsa.model.cache import _cached_prediction
+        m = model.ModelWeighted('weighted', np.random.rand(3, 15))
+        theta = np.array([0.5, 1, 2])
+        pattern_index = np.array([0, 2, 2, 5])
+        with model.prediction_cache([m]):
+            for _ in range(3):
+                np.testing.assert_array_equal(
+                    _cached_prediction(m, theta, pattern_index),
+                    m.predict_vectors(theta, pattern_index))
+            assert m.prediction_cache.hits == 2
+        assert m.prediction_cache is None
+
 
 class TestModelFixed(unittest.TestCase):
     """ Tests for the fixed model class
@@ -76,6 +138,24 @@ class TestModelSelect(unittest.TestCase):
         theta = m.fit(train)
         assert theta == 1
 
+    def test_fit_candidates(self):
+        from pyrsa.rdm import RDMs, compare
+        rdm = np.random.rand(10, 15)
+        data = RDMs(np.random.rand(3, 15))
+        pattern_idx = np.array([0, 1, 2, 4, 5])
+        data = data.subsample_pattern('index', pattern_idx)
+        m = model.ModelSelect('Test Model', rdm)
+        for nan_entry in [None, 3]:
+            if nan_entry is not None:
+                m.rdm_obj.dissimilarities[2, nan_entry] = np.nan
+            evaluations = [np.mean(compare(
+                m.predict_rdm(i).subsample_pattern('index', pattern_idx),
+                data, method='corr')) for i in range(10)]
+            theta = model.fit_select(m, data, method='corr',
+                                     pattern_idx=pattern_idx,
+                                     pattern_descriptor='index')
+            assert theta == np.argmax(evaluations)
+
 
 class TestModelWeighted(unittest.TestCase):
     """ Tests for the fixed model class
@@ -113,6 +193,83 @@ class TestModelWeighted(unittest.TestCase):
         train = rdm_obj.subset('ind', 2)
         theta = m.fit(train)
 
+    def test_loss_gradient(self):
+        from scipy.optimize import check_grad
+        from pyrsa.rdm import RDMs
+        from pyrsa.model.fitter import _loss
+        from pyrsa.model.fitter import _loss_weighted
+        from pyrsa.model.fitter import _weighted_inner_products
+        m = model.ModelWeighted('Test Model', np.random.rand(3, 15))
+        data = RDMs(np.random.rand(4, 15))
+        pattern_idx = np.array([0, 1, 3, 4])
+        data_sub = data.subsample_pattern('index', pattern_idx)
+        theta = np.random.rand(3)
+        for method in ['cosine', 'corr', 'cosine_cov', 'corr_cov']:
+            gram, inner = _weighted_inner_products(
+                m, data_sub, method=method, pattern_idx=pattern_idx,
+                pattern_descriptor='index')
+            loss = _loss(theta, m, data_sub, method=method,
+                         pattern_idx=pattern_idx, pattern_descriptor='index')
+            self.assertAlmostEqual(
+                loss, _loss_weighted(theta, gram, inner)[0])
+            self.assertLess(check_grad(
+                lambda t: _loss_weighted(t, gram, inner)[0],
+                lambda t: _loss_weighted(t, gram, inner)[1], theta), 1e-5)
+
+    def test_fit_nnls(self):
+        from pyrsa.rdm import RDMs
+        from pyrsa.model.fitter import _loss
+        m = model.ModelWeighted('Test Model', np.random.rand(4, 15) - 0.3)
+        data = RDMs(np.random.rand(5, 15))
+        for method in ['cosine', 'corr', 'cosine_cov', 'corr_cov']:
+            theta = model.fit_nnls(m, data, method=method)
+            theta_opt = model.fit_optimize(m, data, method=method)
+            assert np.all(theta >= 0)
+            np.testing.assert_array_equal(
+                theta, model.fit_nnls(m, data, method=method))
+            self.assertLessEqual(
+                _loss(theta, m, data, method=method),
+                _loss(theta_opt, m, data, method=method) + 1e-6)
+
+    def test_fit_optimize_bounds(self):
+        from pyrsa.rdm import RDMs
+        from pyrsa.model.fitter import _loss
+        for _ in range(10):
+            m = model.ModelWeighted('Test Model',
+                                    np.random.rand(6, 45) - 0.3)
+            data = RDMs(np.random.rand(4, 45))
+            for method in ['cosine', 'corr']:
+                theta = model.fit_optimize(m, data, method=method)
+                assert np.all(theta >= 0)
+                self.assertAlmostEqual(
+                    _loss(theta, m, data, method=method),
+                    _loss(model.fit_nnls(m, data, method=method), m, data,
+                          method=method), places=6)
+
+    def test_rank(self):
+        from pyrsa.rdm import RDMs
+        from pyrsa.model import model_from_dict
+        from pyrsa.model.fitter import _loss
+        rdm = np.random.rand(6, 2) @ np.random.rand(2, 15)
+        data = RDMs(np.random.rand(3, 15))
+        m = model.ModelWeighted('Test Model', rdm)
+        m_rank = model.ModelWeighted('Test Model', rdm, rank=2,
+                                     dtype=np.float32)
+        assert m_rank.components.shape == (2, 15)
+        assert m_rank.components.dtype == np.float32
+        theta = np.random.rand(6)
+        np.testing.assert_allclose(m_rank.predict_vectors(theta),
+                                   m.predict_vectors(theta), rtol=1e-4)
+        for method in ['cosine', 'corr']:
+            self.assertAlmostEqual(
+                _loss(model.fit_nnls(m_rank, data, method=method), m, data,
+                      method=method),
+                _loss(model.fit_nnls(m, data, method=method), m, data,
+                      method=method), places=4)
+        m_loaded = model_from_dict(m_rank.to_dict())
+        np.testing.assert_array_equal(m_loaded.components,
+                                      m_rank.components)
+
 
 class TestModelInterpolate(unittest.TestCase):
     """ Tests for the fixed model class
@@ -150,3 +307,26 @@ class TestModelInterpolate(unittest.TestCase):
         train = rdm_obj.subset('ind', 2)
         theta = m.fit(train)
         pre = m.predict(theta)
+
+    def test_fit_grid(self):
+        from pyrsa.rdm import RDMs
+        from pyrsa.model.fitter import _loss
+        m = model.ModelInterpolate('Test Model', np.random.rand(4, 15))
+        data = RDMs(np.random.rand(3, 15))
+        grid = np.linspace(0, 1, 101)
+        for method in ['corr', 'cosine_cov', 'spearman']:
+            theta = model.fit_interpolate(m, data, method=method)
+            assert np.isclose(np.sum(theta), 1)
+            loss = _loss(theta, m, data, method=method)
+            loss_grid = []
+            for i_pair in range(3):
+                for w in grid:
+                    theta_grid = np.zeros(4)
+                    theta_grid[i_pair] = w
+                    theta_grid[i_pair + 1] = 1 - w
+                    loss_grid.append(
+                        _loss(theta_grid, m, data, method=method))
+            if method == 'spearman':
+                assert np.isfinite(loss)
+            else:
+                self.assertLessEqual(loss, np.min(loss_grid) + 1e-8)
@@ -32,6 +32,20 @@ class TestNoiseCeiling(unittest.TestCase):
         _, test_set, ceil_set = sets_k_fold_rdm(rdms, k_rdm=3, random=False)
         _, _ = cv_noise_ceiling(rdms, ceil_set, test_set, method='cosine')
 
+    def test_cv_noise_ceiling_pool_cache(self):
+        from pyrsa.inference import cv_noise_ceiling
+        from pyrsa.inference import sets_k_fold
+        from pyrsa.rdm import RDMs
+        rdms = RDMs(np.random.rand(11, 45))  # 11 10x10 rdms
+        pool_cache = {}
+        for _ in range(2):
+            _, test_set, ceil_set = sets_k_fold(rdms, k_rdm=2, k_pattern=2)
+            nc = cv_noise_ceiling(rdms, ceil_set, test_set, method='corr')
+            nc_cache = cv_noise_ceiling(rdms, ceil_set, test_set,
+                                        method='corr', pool_cache=pool_cache)
+            np.testing.assert_allclose(nc, nc_cache)
+        self.assertEqual(len(pool_cache), 1)
+
     @parameterized.expand([
         ['cosine'],
         ['rho-a'],
@@ -55,3 +69,29 @@ class TestNoiseCeiling(unittest.TestCase):
             descriptors=des
         )
         _, _ = boot_noise_ceiling(rdms, method=method)
+
+    @parameterized.expand([
+        ['cosine'],
+        ['rho-a'],
+        ['corr'],
+    ])
+    def test_boot_noise_ceiling_leave_one_out(self, method):
+        from pyrsa.inference import boot_noise_ceiling
+        from pyrsa.rdm import RDMs, compare
+        from pyrsa.util.inference_util import pool_rdm
+        dis = np.random.rand(11, 10)  # 11 5x5 rdms
+        rdm_des = {'session': np.array([1, 1, 2, 2, 4, 5, 6, 7, 7, 7, 7])}
+        rdms = RDMs(dissimilarities=dis, rdm_descriptors=rdm_des)
+        pooled = pool_rdm(rdms, method=method)
+        noise_min = []
+        noise_max = []
+        for session in np.unique(rdm_des['session']):
+            test = rdms.subset('session', session)
+            train = rdms.subset('session', np.setdiff1d(
+                rdm_des['session'], session))
+            noise_min.append(np.mean(
+                compare(pool_rdm(train, method=method), test, method)))
+            noise_max.append(np.mean(compare(pooled, test, method)))
+        np.testing.assert_allclose(
+            boot_noise_ceiling(rdms, method=method, rdm_descriptor='session'),
+            [np.mean(noise_min), np.mean(noise_max)])
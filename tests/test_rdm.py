@@ -143,6 +143,22 @@ class TestRDM(unittest.TestCase):
         assert_array_equal(rdms_sample.pattern_descriptors['type'],
                            [0, 1, 2, 2, 2, 2])
 
+    def test_rdm_subsample_pattern_values(self):
+        dis = np.random.rand(3, 10)
+        pattern_des = {'type': np.array([3, 1, 2, 2, 0])}
+        rdms = rsr.RDMs(dissimilarities=dis,
+                        pattern_descriptors=pattern_des)
+        rdms_sample = rdms.subsample_pattern('type',
+                                             np.array([2, 0, 0, 1]))
+        selection = np.array([1, 2, 3, 4, 4])
+        matrices = rdms.get_matrices()
+        for matrix in matrices:
+            np.fill_diagonal(matrix, np.nan)
+        matrices = matrices[:, selection][:, :, selection]
+        off_diag = ~np.eye(5, dtype=bool)
+        assert_array_equal(rdms_sample.get_matrices()[:, off_diag],
+                           matrices[:, off_diag])
+
     def test_rdm_idx(self):
         dis = np.zeros((8, 10))
         mes = "Euclidean"
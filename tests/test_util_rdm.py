@@ -30,3 +30,26 @@ class TestRdmUtils(unittest.TestCase):
         assert y.shape[2] == 5
         assert n_rdm == 8
         assert n_cond == 5
+
+    def test_rank_vectors(self):
+        from scipy.stats import rankdata
+        from pyrsa.util.rdm_utils import _rank_vectors
+        x = np.random.randint(0, 4, (7, 10)).astype(float)
+        for method in ['average', 'min', 'max', 'dense', 'ordinal']:
+            ranks = _rank_vectors(x, method=method)
+            ranks_scipy = np.array([rankdata(v, method=method) for v in x])
+            np.testing.assert_array_equal(ranks, ranks_scipy)
+        np.testing.assert_array_equal(_rank_vectors(x.T, axis=0),
+                                      _rank_vectors(x).T)
+
+    def test_rank_vectors_nan(self):
+        from scipy.stats import rankdata
+        from pyrsa.util.rdm_utils import _rank_vectors
+        x = np.random.rand(3, 10)
+        x[:, 2] = np.nan
+        x[1, 5] = np.nan
+        ranks = _rank_vectors(x)
+        for v, r in zip(x, ranks):
+            valid = ~np.isnan(v)
+            np.testing.assert_array_equal(r[valid], rankdata(v[valid]))
+            assert np.all(np.isnan(r[~valid]))